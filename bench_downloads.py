@@ -0,0 +1,539 @@
+"""
+Q-fred 다운로드 벤치마크 / 동작 확인
+
+로컬 HTTP 서버 (Range 지원, 연결당 전송 속도 제한)를 띄워 실제 워커를 돌린다.
+인터넷 없이 실행되며, 127.0.0.1과 localhost를 서로 다른 호스트로 쓴다.
+
+  scheduler : DownloadScheduler - 전체/호스트별 동시 실행 제한, 우선순위, 일시 정지/재개,
+              워커 예외, 종료 (shutdown), 작업마다 스레드를 띄우던 기존 방식과 완료 시간/스레드 수 비교
+              (--check: 제한 위반이나 실패 시 종료 코드 1)
+  segmented : SegmentedDownloader - 연결 수별 속도, 진행 콜백 횟수, 취소 후 이어받기,
+              Range 미지원 서버 (--check: 내용 불일치/이어받기 실패 시 종료 코드 1)
+  info      : 같은 페이지를 여러 번 받을 때 페이지 요청 수/시간 - 정보 캐시 없이 vs 캐시
+              (--check: 작업당 페이지 요청이 1회를 넘거나 캐시가 안 맞으면 종료 코드 1)
+
+사용법: python bench_downloads.py scheduler [--jobs N] [--size MB] [--rate MB/s] [--check]
+        python bench_downloads.py segmented [--size MB] [--rate MB/s] [--check]
+        python bench_downloads.py info [--jobs N] [--size MB] [--check]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_snippets import qf  # Windows 전용 모듈 대체 후 import
+
+from PyQt6.QtCore import QCoreApplication, QObject, pyqtSignal
+
+
+class MediaServer:
+    """/media/<이름>.mp4?size=바이트 - 결정적인 내용, Range 지원, 연결당 속도 제한
+
+    /page/<이름>.html?size=바이트 는 그 파일을 <video>로 넣은 페이지 (yt-dlp generic 추출 대상)
+    &norange=1 을 붙이면 Range 헤더를 무시하고 항상 전체를 200으로 보낸다
+    """
+
+    CHUNK = 64 * 1024
+
+    def __init__(self, rate: float):
+        self.rate = rate  # 연결당 바이트/초 (0이면 제한 없음)
+        self.lock = threading.Lock()
+        self.active = Counter()      # Host 헤더 -> 전송 중인 연결 수
+        self.peak = Counter()        # Host 헤더 -> 최대 동시 연결
+        self.peak_total = 0
+        self.requests = []           # (Host, 경로, Range)
+        self.bytes_sent = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._serve(body=False)
+
+            def do_GET(self):
+                self._serve(body=True)
+
+            def _serve(self, body: bool):
+                page = re.match(r"/page/([\w-]+)\.html(?:\?size=(\d+))?$", self.path)
+                if page:
+                    self._serve_page(page.group(1), page.group(2) or str(1024 * 1024), body)
+                    return
+                match = re.match(r"/media/([\w-]+)\.mp4(?:\?size=(\d+))?(&norange=1)?$", self.path)
+                if not match:
+                    self.send_error(404)
+                    return
+                size = int(match.group(2) or 1024 * 1024)
+                start, end = 0, size - 1
+                ranged = None if match.group(3) else self.headers.get("Range")
+                if ranged:
+                    m = re.match(r"bytes=(\d*)-(\d*)", ranged)
+                    if m and m.group(1):
+                        start = int(m.group(1))
+                        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+                    if start >= size:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{size}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                host = self.headers.get("Host", "").split(":")[0]
+                with server.lock:
+                    server.requests.append((host, self.path, ranged))
+                self.send_response(206 if ranged else 200)
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Length", str(end - start + 1))
+                if ranged:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                self.end_headers()
+                if not body:
+                    return
+                server._track(host, +1)
+                try:
+                    pos = start
+                    began = time.monotonic()
+                    while pos <= end:
+                        n = min(server.CHUNK, end - pos + 1)
+                        self.wfile.write(media_bytes(pos, n))
+                        pos += n
+                        with server.lock:
+                            server.bytes_sent += n
+                        if server.rate:
+                            ahead = (pos - start) / server.rate - (time.monotonic() - began)
+                            if ahead > 0:
+                                time.sleep(ahead)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    server._track(host, -1)
+
+            def _serve_page(self, name, size, body):
+                with server.lock:
+                    server.requests.append((self.headers.get("Host", "").split(":")[0], self.path, None))
+                html = (f"<html><head><title>{name}</title></head><body>"
+                        f"<video controls src=\"/media/{name}.mp4?size={size}\"></video>"
+                        f"</body></html>").encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(html)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(html)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def _track(self, host: str, delta: int):
+        with self.lock:
+            self.active[host] += delta
+            self.peak[host] = max(self.peak[host], self.active[host])
+            self.peak_total = max(self.peak_total, sum(self.active.values()))
+
+    def url(self, name: str, size: int, host: str = "127.0.0.1") -> str:
+        return f"http://{host}:{self.port}/media/{name}.mp4?size={size}"
+
+    def page_url(self, name: str, size: int, host: str = "127.0.0.1") -> str:
+        return f"http://{host}:{self.port}/page/{name}.html?size={size}"
+
+    def count(self, prefix: str) -> int:
+        with self.lock:
+            return sum(1 for _, path, _ in self.requests if path.startswith(prefix))
+
+    def reset_stats(self):
+        with self.lock:
+            self.peak.clear()
+            self.peak_total = 0
+            self.requests.clear()
+            self.bytes_sent = 0
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+_PATTERN = bytes(range(251)) * (((1 << 20) + 251) // 251 + 1)
+
+
+def media_bytes(offset: int, length: int) -> bytes:
+    """offset 위치의 내용 (바이트 값 = 위치 % 251) - 이어받기/구간 다운로드 검증용"""
+    out = bytearray()
+    while length > 0:
+        n = min(length, 1 << 20)
+        start = offset % 251
+        out += _PATTERN[start:start + n]
+        offset += n
+        length -= n
+    return bytes(out)
+
+
+def verify_file(path: str, size: int) -> bool:
+    if not os.path.exists(path) or os.path.getsize(path) != size:
+        return False
+    with open(path, 'rb') as f:
+        pos = 0
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                return True
+            if chunk != media_bytes(pos, len(chunk)):
+                return False
+            pos += len(chunk)
+
+
+def wait_until(app, condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+class JobWatch:
+    """스케줄러 신호로 시작 순서/동시 실행 수/결과 기록"""
+
+    def __init__(self, scheduler, hosts: dict):
+        self.hosts = hosts  # item_id -> 호스트
+        self.order = []
+        self.running = Counter()
+        self.peak = Counter()
+        self.peak_total = 0
+        self.results = {}
+        self.paused = []
+        scheduler.started.connect(self.on_started)
+        scheduler.finished.connect(self.on_finished)
+        scheduler.paused.connect(self.on_paused)
+
+    def on_started(self, item_id):
+        host = self.hosts[item_id]
+        self.order.append(item_id)
+        self.running[host] += 1
+        self.peak[host] = max(self.peak[host], self.running[host])
+        self.peak_total = max(self.peak_total, sum(self.running.values()))
+
+    def _stop(self, item_id):
+        self.running[self.hosts[item_id]] -= 1
+
+    def on_finished(self, item_id, result):
+        self._stop(item_id)
+        self.results[item_id] = result
+
+    def on_paused(self, item_id):
+        self._stop(item_id)
+        self.paused.append(item_id)
+
+
+class BrokenWorker(QObject):
+    """reset()/run()에서 예외를 내는 워커 - 스케줄러가 실패로 끝내고 계속 도는지 확인용"""
+    finished = pyqtSignal(dict)
+
+    def run(self):
+        raise RuntimeError("broken worker")
+
+    def cancel(self):
+        pass
+
+    def reset(self):
+        raise RuntimeError("broken worker")
+
+
+def run_scheduler(jobs: int, size_mb: float, rate_mb: float, check: bool) -> int:
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    server = MediaServer(rate_mb * 1024 * 1024)
+    size = int(size_mb * 1024 * 1024)
+    folder = tempfile.mkdtemp(prefix="qfred_bench_dl_")
+    failures = []
+    try:
+        def make_jobs(tag, count):
+            items = []
+            for i in range(count):
+                host = "127.0.0.1" if i % 2 == 0 else "localhost"
+                url = server.url(f"{tag}{i}", size, host)
+                worker = qf.DownloadWorker(url, os.path.join(folder, tag), 'video')
+                items.append((f"{tag}{i}", worker, url, host))
+            return items
+
+        # 1) 기존 방식: 작업마다 스레드를 바로 시작
+        items = make_jobs("direct", jobs)
+        done = []
+        threads = []
+        start = time.perf_counter()
+        for item_id, worker, url, host in items:
+            worker.finished.connect(lambda r, d=done: d.append(r))
+            threads.append(threading.Thread(target=worker.run, daemon=True))
+            threads[-1].start()
+        ok = wait_until(app, lambda: len(done) == jobs, 120)
+        direct_time = time.perf_counter() - start
+        for thread in threads:
+            thread.join()
+        direct_peak = server.peak_total
+        direct_ok = ok and all(r["success"] for r in done)
+
+        # 2) 스케줄러: 전체 3, 호스트별 2
+        server.reset_stats()
+        scheduler = qf.DownloadScheduler(max_concurrent=3, per_host=2)
+        items = make_jobs("sched", jobs)
+        watch = JobWatch(scheduler, {item_id: host for item_id, _, _, host in items})
+        start = time.perf_counter()
+        for item_id, worker, url, host in items:
+            scheduler.submit(item_id, worker, url)
+        ok = wait_until(app, lambda: len(watch.results) == jobs, 120)
+        sched_time = time.perf_counter() - start
+        runner_threads = len(scheduler._runners)
+        sched_ok = ok and all(r["success"] for r in watch.results.values())
+        files_ok = all(verify_file(os.path.join(folder, "sched", f"{item_id}.mp4"), size)
+                       for item_id, _, _, _ in items)
+
+        print(f"{'mode':>10} {'jobs':>5} {'seconds':>8} {'peak conns':>11} {'threads':>8} {'ok':>4}")
+        print(f"{'direct':>10} {jobs:>5} {direct_time:>8.2f} {direct_peak:>11} {jobs:>8} {str(direct_ok):>4}")
+        print(f"{'scheduled':>10} {jobs:>5} {sched_time:>8.2f} {server.peak_total:>11} "
+              f"{runner_threads:>8} {str(sched_ok and files_ok):>4}")
+        print(f"scheduled peak running: total {watch.peak_total}, per host {dict(watch.peak)}")
+        if not (sched_ok and files_ok):
+            failures.append("scheduled downloads failed or files differ")
+        if watch.peak_total > 3 or max(watch.peak.values()) > 2:
+            failures.append(f"limits exceeded: total {watch.peak_total}, per host {dict(watch.peak)}")
+
+        # 3) 우선순위: 하나씩 실행, 나중에 넣은 높은 우선순위가 먼저
+        scheduler.set_limits(1, 1)
+        items = make_jobs("prio", 4)
+        watch = JobWatch(scheduler, {item_id: host for item_id, _, _, host in items})
+        for n, (item_id, worker, url, host) in enumerate(items):
+            scheduler.submit(item_id, worker, url, priority=5 if n == 3 else 0)
+        wait_until(app, lambda: len(watch.results) == 4, 60)
+        print(f"priority start order: {watch.order}")
+        # 제출은 다음 이벤트 루프에서 배정되므로 prio0이 먼저 시작되어 있을 수도 있다
+        if "prio3" not in watch.order[:2] or watch.order.index("prio3") > watch.order.index("prio1"):
+            failures.append(f"priority not honoured: {watch.order}")
+
+        # 4) 일시 정지/재개: 실행 중인 작업을 멈추면 다음 작업이 시작되고, 재개하면 끝까지 받음
+        scheduler.set_limits(1, 1)
+        items = make_jobs("pause", 2)
+        watch = JobWatch(scheduler, {item_id: host for item_id, _, _, host in items})
+        for item_id, worker, url, host in items:
+            scheduler.submit(item_id, worker, url)
+        wait_until(app, lambda: watch.order, 30)
+        time.sleep(0.2)
+        scheduler.pause("pause0")
+        paused = wait_until(app, lambda: "pause0" in watch.paused, 30)
+        wait_until(app, lambda: "pause1" in watch.results, 60)
+        scheduler.resume("pause0")
+        resumed = wait_until(app, lambda: "pause0" in watch.results, 60)
+        pause_ok = paused and resumed and watch.order == ["pause0", "pause1", "pause0"] and \
+            watch.results["pause0"]["success"] and \
+            verify_file(os.path.join(folder, "pause", "pause0.mp4"), size)
+        print(f"pause/resume: order {watch.order}, ok={pause_ok}")
+        if not pause_ok:
+            failures.append("pause/resume did not complete the paused download")
+
+        # 5) 워커 예외: 실패로 끝나고 자리를 돌려준 뒤 다음 작업을 계속 실행
+        items = make_jobs("broken", 2)
+        watch = JobWatch(scheduler, {item_id: host for item_id, _, _, host in items})
+        scheduler.submit("broken0", BrokenWorker(), items[0][2])
+        scheduler.submit(*items[1][:3])
+        wait_until(app, lambda: len(watch.results) == 2, 60)
+        broken_ok = watch.results.get("broken0", {}).get("error") == "broken worker" and \
+            watch.results.get("broken1", {}).get("success") and scheduler.active_count() == 0
+        print(f"broken worker: order {watch.order}, ok={bool(broken_ok)}")
+        if not broken_ok:
+            failures.append(f"worker exception not contained: {watch.results}")
+        scheduler.shutdown()
+
+        # 6) 종료: 대기 중인 작업은 시작하지 않고, 실행 스레드는 기다리지 않고 바로 끝남
+        scheduler = qf.DownloadScheduler(max_concurrent=1, per_host=1)
+        items = make_jobs("stop", 2)
+        watch = JobWatch(scheduler, {item_id: host for item_id, _, _, host in items})
+        for item_id, worker, url, host in items:
+            scheduler.submit(item_id, worker, url)
+        wait_until(app, lambda: watch.order, 30)
+        start = time.perf_counter()
+        scheduler.shutdown(timeout=5.0)
+        stop_time = time.perf_counter() - start
+        wait_until(app, lambda: "stop0" in watch.results, 5)
+        alive = sum(runner.is_alive() for runner in scheduler._runners)
+        print(f"shutdown: {stop_time:.2f}s, started {watch.order}, runners alive {alive}")
+        if watch.order != ["stop0"] or alive or stop_time > 2.0:
+            failures.append(f"shutdown kept running: started {watch.order}, {stop_time:.2f}s")
+    finally:
+        server.close()
+        shutil.rmtree(folder, ignore_errors=True)
+
+    if not check:
+        return 0
+    for line in failures:
+        print(f"[FAIL] {line}")
+    if not failures:
+        print("[OK] scheduler checks passed")
+    return 1 if failures else 0
+
+
+def run_segmented(size_mb: float, rate_mb: float, check: bool) -> int:
+    server = MediaServer(rate_mb * 1024 * 1024)
+    size = int(size_mb * 1024 * 1024)
+    folder = tempfile.mkdtemp(prefix="qfred_bench_dl_")
+    failures = []
+    try:
+        # 1) 연결 수별: 연결당 속도 제한이 있는 서버에서 총 시간
+        print(f"{'connections':>11} {'seconds':>8} {'MB/s':>7} {'progress calls':>15} {'ok':>4}")
+        for connections in (1, 2, 4, 8):
+            server.reset_stats()
+            path = os.path.join(folder, f"c{connections}.mp4")
+            calls = []
+            dl = qf.SegmentedDownloader(server.url(f"c{connections}", size), path, connections=connections,
+                                        on_progress=lambda *a: calls.append(a))
+            start = time.perf_counter()
+            done = dl.run()
+            seconds = time.perf_counter() - start
+            ok = done and verify_file(path, size) and not os.path.exists(path + ".part.json")
+            print(f"{connections:>11} {seconds:>8.2f} {size / seconds / 1048576:>7.2f} {len(calls):>15} {str(ok):>4}")
+            if not ok:
+                failures.append(f"{connections} connections: file differs")
+        # 예전 방식은 8KB마다 진행 신호
+        print(f"(8KB 단위 신호였다면 {size // 8192}회)")
+
+        # 2) 취소 후 이어받기: 1/4쯤에서 멈추고 다시 run() (멈출 틈이 있게 속도를 낮춤)
+        rate = server.rate
+        server.rate = 2 * 1024 * 1024
+        server.reset_stats()
+        path = os.path.join(folder, "resume.mp4")
+        url = server.url("resume", size)
+        progress = []
+        dl = qf.SegmentedDownloader(url, path, on_progress=lambda d, *a: progress.append(d),
+                                    is_cancelled=lambda: progress and progress[-1] >= size // 4)
+        finished = dl.run()
+        partial = os.path.exists(path + ".part") and os.path.exists(path + ".part.json")
+        # 끊긴 연결의 서버 쪽 전송이 끝난 뒤에 센다
+        deadline = time.monotonic() + 5
+        while sum(server.active.values()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        first_sent = server.bytes_sent
+        server.reset_stats()
+        dl = qf.SegmentedDownloader(url, path)
+        resumed = dl.run()
+        server.rate = rate
+        ok = (not finished and partial and resumed and verify_file(path, size)
+              and dl.resumed_bytes > 0 and server.bytes_sent <= size - dl.resumed_bytes + 1)
+        print(f"resume: first run stopped at {first_sent / 1048576:.1f}MB sent, "
+              f"skipped {dl.resumed_bytes / 1048576:.1f}MB, second run sent {server.bytes_sent / 1048576:.1f}MB, ok={ok}")
+        if not ok:
+            failures.append("resume did not continue from the partial file")
+
+        # 3) Range 미지원 서버: 연결 하나로 전체
+        path = os.path.join(folder, "norange.mp4")
+        dl = qf.SegmentedDownloader(server.url("norange", size) + "&norange=1", path)
+        ok = dl.run() and verify_file(path, size)
+        print(f"no range support: ok={ok}")
+        if not ok:
+            failures.append("fallback without Range support failed")
+    finally:
+        server.close()
+        shutil.rmtree(folder, ignore_errors=True)
+
+    if not check:
+        return 0
+    for line in failures:
+        print(f"[FAIL] {line}")
+    if not failures:
+        print("[OK] segmented download checks passed")
+    return 1 if failures else 0
+
+
+def run_info(jobs: int, size_mb: float, check: bool) -> int:
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    server = MediaServer(0)
+    size = int(size_mb * 1024 * 1024)
+    folder = tempfile.mkdtemp(prefix="qfred_bench_dl_")
+    failures = []
+    try:
+        def run_jobs(tag, cold):
+            server.reset_stats()
+            qf.INFO_CACHE.clear()
+            url = server.page_url("clip", size)
+            start = time.perf_counter()
+            ok = True
+            for i in range(jobs):
+                if cold:
+                    qf.INFO_CACHE.clear()
+                worker = qf.DownloadWorker(url, os.path.join(folder, f"{tag}{i}"), 'video')
+                done = []
+                worker.finished.connect(done.append)
+                thread = threading.Thread(target=worker.run, daemon=True)
+                thread.start()
+                ok = wait_until(app, lambda: done, 60) and done[0]["success"] and ok
+                thread.join()
+                # generic 추출기는 페이지 안 영상 제목을 "clip (1)"처럼 붙인다
+                out = os.path.join(folder, f"{tag}{i}")
+                files = [f for f in os.listdir(out) if f.endswith(".mp4")] if os.path.isdir(out) else []
+                ok = ok and len(files) == 1 and verify_file(os.path.join(out, files[0]), size)
+            return time.perf_counter() - start, server.count("/page/"), server.count("/media/"), ok
+
+        print(f"{'mode':>8} {'jobs':>5} {'seconds':>8} {'page reqs':>10} {'media reqs':>11} {'ok':>4}")
+        results = {}
+        for tag, cold in (("cold", True), ("cached", False)):
+            seconds, pages, media, ok = run_jobs(tag, cold)
+            results[tag] = (pages, media, ok)
+            print(f"{tag:>8} {jobs:>5} {seconds:>8.2f} {pages:>10} {media:>11} {str(ok):>4}")
+        print(f"cache: {qf.INFO_CACHE.stats()}")
+
+        # 예전에는 작업마다 extract_info + download()로 페이지를 두 번 해석했다
+        if results["cold"][0] != jobs:
+            failures.append(f"cold: {results['cold'][0]} page requests for {jobs} jobs")
+        if results["cached"][0] != 1:
+            failures.append(f"cached: {results['cached'][0]} page requests, expected 1")
+        if not (results["cold"][2] and results["cached"][2]):
+            failures.append("downloads failed or files differ")
+    finally:
+        server.close()
+        shutil.rmtree(folder, ignore_errors=True)
+
+    if not check:
+        return 0
+    for line in failures:
+        print(f"[FAIL] {line}")
+    if not failures:
+        print("[OK] info reuse checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q-fred 다운로드 벤치마크")
+    sub = parser.add_subparsers(dest="command")
+    p_sched = sub.add_parser("scheduler", help="대기열 동시 실행 제한/우선순위/일시 정지")
+    p_sched.add_argument("--jobs", type=int, default=12)
+    p_sched.add_argument("--size", type=float, default=2.0, help="파일 크기 (MB)")
+    p_sched.add_argument("--rate", type=float, default=4.0, help="연결당 전송 속도 (MB/s)")
+    p_sched.add_argument("--check", action="store_true", help="실패 시 종료 코드 1")
+    p_seg = sub.add_parser("segmented", help="구간 병렬 다운로드/이어받기")
+    p_seg.add_argument("--size", type=float, default=16.0, help="파일 크기 (MB)")
+    p_seg.add_argument("--rate", type=float, default=8.0, help="연결당 전송 속도 (MB/s)")
+    p_seg.add_argument("--check", action="store_true", help="실패 시 종료 코드 1")
+    p_info = sub.add_parser("info", help="추출한 정보 재사용 (작업당 페이지 요청 수)")
+    p_info.add_argument("--jobs", type=int, default=10)
+    p_info.add_argument("--size", type=float, default=0.5, help="파일 크기 (MB)")
+    p_info.add_argument("--check", action="store_true", help="실패 시 종료 코드 1")
+    args = parser.parse_args()
+
+    if args.command == "scheduler":
+        sys.exit(run_scheduler(args.jobs, args.size, args.rate, args.check))
+    if args.command == "segmented":
+        sys.exit(run_segmented(args.size, args.rate, args.check))
+    if args.command == "info":
+        sys.exit(run_info(args.jobs, args.size, args.check))
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
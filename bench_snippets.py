@@ -0,0 +1,748 @@
+"""
+Q-fred 스니펫 엔진 벤치마크
+
+  match    : 트리거 개수별 키 입력당 매칭 시간 (기존 선형 스캔 vs TriggerAutomaton)
+  stress   : 가짜 리스너/주입기로 엔진을 구동해 초당 치환 횟수 측정
+             (리스너 유지 모드 vs 치환마다 재시작 모드)
+  pipeline : 스니펫 10~100k개 라이브러리에서 on_press/on_release에 합성 키 입력을 넣어
+             키 입력 처리 시간, 종결키→매칭, 매칭→주입 지연, 키당 메모리 할당, 스레드 수 측정
+             (--check: 기준 초과 시 종료 코드 1 → CI 회귀 검사용)
+  import   : CSV 라이브러리 대량 가져오기/내보내기 시간 (저장소별, add() 반복과 비교)
+  reload   : 대량 가져오기 직후 스냅샷을 쓰기 전에 종료됐다고 보고 저장소를 다시 읽어
+             가져온 스니펫이 모두 남아 있는지 확인 (압축 중인 .old가 있는 경우 포함, 실패 시 종료 코드 1)
+  search   : 목록 검색 시간 (기존 전체 소문자 비교 vs SnippetSearchIndex, 글자 단위 입력 포함,
+             사용 횟수를 반영한 순위 검색, 저장소별)
+
+Windows 전용 부분 (winreg, ctypes.windll, pynput 훅, 클립보드)은 대체물로 바꾸므로
+Linux에서도 실행된다.
+
+사용법: python bench_snippets.py match [--iterations N]
+        python bench_snippets.py stress [--count N] [--realtime]
+        python bench_snippets.py pipeline [--sizes 10,1000,...] [--keys N] [--check]
+        python bench_snippets.py import [--count N] [--sample N]
+        python bench_snippets.py reload [--count N]
+        python bench_snippets.py search [--count N] [--backend json|sqlite]
+"""
+
+import argparse
+import ctypes
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+
+def _pynput_standin():
+    """pynput 대체 (Linux에서 X 서버 없이는 import 불가) - 엔진이 쓰는 부분만"""
+    import enum
+    keyboard = types.ModuleType('pynput.keyboard')
+    keyboard.Key = enum.Enum('Key', 'alt_l alt_r alt_gr ctrl_l ctrl_r shift shift_l shift_r cmd '
+                                    'space tab backspace esc enter left right up down home end delete')
+
+    class Controller:
+        def press(self, key):
+            pass
+
+        def release(self, key):
+            pass
+
+    class Listener:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+    keyboard.Controller = Controller
+    keyboard.Listener = Listener
+    package = types.ModuleType('pynput')
+    package.keyboard = keyboard
+    sys.modules['pynput'] = package
+    sys.modules['pynput.keyboard'] = keyboard
+
+
+def _install_standins():
+    """import 시 콘솔 숨김/SendInput 등 Windows 호출이 실행되지 않도록 대체"""
+    class _WinDLL:
+        def __getattr__(self, name):
+            return self
+
+        def __call__(self, *args, **kwargs):
+            return 0
+
+    ctypes.windll = _WinDLL()
+    try:
+        import winreg  # noqa: F401
+    except ImportError:
+        sys.modules['winreg'] = types.ModuleType('winreg')
+    try:
+        import pynput.keyboard  # noqa: F401
+    except ImportError:
+        _pynput_standin()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+_install_standins()
+
+import qfred_pyqt as qf  # noqa: E402
+from qfred_pyqt import TriggerAutomaton  # noqa: E402
+
+SIZES = (10, 1_000, 10_000, 100_000)
+ALPHABET = string.ascii_lowercase + string.digits + ';:.'
+
+
+def make_trigger_map(count: int, rng: random.Random) -> dict:
+    """길이 2~8의 임의 트리거 count개 생성"""
+    result = {}
+    while len(result) < count:
+        trigger = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(2, 8)))
+        result[trigger] = f"content {len(result)}"
+    return result
+
+
+def make_snapshots(trigger_map: dict, count: int, rng: random.Random) -> list:
+    """종결키 시점의 버퍼 스냅샷 (절반은 트리거로 끝남)"""
+    triggers = list(trigger_map)
+    snapshots = []
+    for i in range(count):
+        prefix = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 8)))
+        tail = rng.choice(triggers) if i % 2 == 0 else ''.join(rng.choice(ALPHABET) for _ in range(4))
+        snapshots.append(prefix + tail)
+    return snapshots
+
+
+def linear_scan(trigger_map: dict, snapshot: str):
+    """기존 방식: 모든 트리거에 endswith"""
+    best = None
+    best_len = 0
+    for trigger, content in trigger_map.items():
+        if snapshot.endswith(trigger) and len(trigger) > best_len:
+            best = (trigger, content)
+            best_len = len(trigger)
+    return best
+
+
+def timed(fn, snapshots) -> float:
+    """스냅샷 하나당 평균 소요 시간 (µs)"""
+    start = time.perf_counter()
+    for snap in snapshots:
+        fn(snap)
+    return (time.perf_counter() - start) / len(snapshots) * 1e6
+
+
+def run_match(iterations: int):
+    rng = random.Random(42)
+    print(f"{'triggers':>9} {'build ms':>10} {'states':>9} {'linear µs':>11} {'automaton µs':>13}")
+    for size in SIZES:
+        trigger_map = make_trigger_map(size, rng)
+        snapshots = make_snapshots(trigger_map, iterations, rng)
+
+        start = time.perf_counter()
+        automaton = TriggerAutomaton(trigger_map)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # 선형 스캔은 큰 라이브러리에서 느리므로 표본만 측정
+        linear_samples = snapshots[:max(20, iterations * 100 // size)]
+        for snap in linear_samples:
+            expected = linear_scan(trigger_map, snap)
+            got = automaton.longest_suffix(snap)
+            assert (expected and expected[0]) == (got and got[0]), (snap, expected, got)
+
+        linear_us = timed(lambda s: linear_scan(trigger_map, s), linear_samples)
+        automaton_us = timed(automaton.longest_suffix, snapshots)
+        print(f"{size:>9} {build_ms:>10.1f} {len(automaton):>9} {linear_us:>11.2f} {automaton_us:>13.2f}")
+
+
+class FakeListener:
+    """pynput Listener 대체 - 키 이벤트를 직접 전달하고 win32_event_filter도 흉내냄"""
+    active = None
+    created = 0
+
+    def __init__(self, on_press, on_release, win32_event_filter=None, **kwargs):
+        self.on_press = on_press
+        self.on_release = on_release
+        self.event_filter = win32_event_filter
+        FakeListener.created += 1
+
+    def start(self):
+        FakeListener.active = self
+
+    def stop(self):
+        if FakeListener.active is self:
+            FakeListener.active = None
+
+    def deliver(self, key, press=True, extra=0) -> bool:
+        """이벤트 전달. 필터에서 걸러지면 False"""
+        if self.event_filter:
+            data = types.SimpleNamespace(dwExtraInfo=extra)
+            if self.event_filter(0x100 if press else 0x101, data) is False:
+                return False
+        (self.on_press if press else self.on_release)(key)
+        return True
+
+
+class FakeInjector:
+    """SendInput 대체 - 주입된 이벤트를 활성 리스너로 되돌려 보냄 (실제 훅과 동일)"""
+
+    def __init__(self):
+        self.events = 0
+        self.leaked = 0    # 리스너 콜백까지 도달한 자체 주입 이벤트
+        self.unhooked = 0  # 리스너가 없던 시점의 이벤트
+
+    def __call__(self, count, arr, size):
+        for i in range(count):
+            ki = arr[i].ki
+            self.events += 1
+            if ki.wVk == qf.VK_BACK:
+                key = qf.Key.backspace
+            elif ki.wVk:
+                key = types.SimpleNamespace(vk=ki.wVk)
+            else:
+                key = types.SimpleNamespace(vk=None, char=chr(ki.wScan))
+            listener = FakeListener.active
+            if listener is None:
+                self.unhooked += 1
+            elif listener.deliver(key, press=not ki.dwFlags & qf.KEYEVENTF_KEYUP, extra=ki.dwExtraInfo):
+                self.leaked += 1
+        return count
+
+
+class _NoSleepTime:
+    """_replace 안의 고정 대기를 제거해 엔진 자체 오버헤드만 측정"""
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(seconds):
+        pass
+
+
+def type_text(listener: FakeListener, text: str):
+    for ch in text:
+        key = types.SimpleNamespace(vk=ord(ch.upper()))
+        listener.deliver(key, press=True)
+        listener.deliver(key, press=False)
+
+
+def run_stress(count: int, persistent: bool, realtime: bool):
+    folder = tempfile.mkdtemp(prefix="qfred_bench_")
+    manager = qf.SnippetManager(os.path.join(folder, "snippets.json"))
+    manager.add("addr", "Seoul, Gangnam-gu 123")
+    engine = qf.SnippetEngine(manager, persistent_listener=persistent)
+    engine.refresh_triggers()
+    engine.listener_factory = FakeListener
+    engine.CHECK_DELAY = 0
+    engine.REPLACE_DEBOUNCE = 0
+
+    injector = FakeInjector()
+    ctypes.windll.user32.SendInput = injector
+    FakeListener.created = 0
+    qf.INPUT_CACHE.clear()
+    qf.INPUT_CACHE.hits = qf.INPUT_CACHE.misses = 0
+
+    done = threading.Semaphore(0)
+    original_replace = engine._replace
+
+    def _replace(trigger, content):
+        try:
+            original_replace(trigger, content)
+        finally:
+            done.release()
+
+    engine._replace = _replace
+    saved_time = qf.time
+    if not realtime:
+        qf.time = _NoSleepTime()
+    missed = 0
+    engine.start()
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            listener = FakeListener.active
+            type_text(listener, "addr")
+            listener.deliver(qf.Key.space, press=True)
+            if not done.acquire(timeout=2.0):
+                missed += 1
+            # 재시작 모드에서는 finally에서 리스너가 다시 만들어질 때까지 대기
+            while engine.is_replacing or FakeListener.active is None:
+                time.sleep(0)
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.stop()
+        manager.close()
+        qf.time = saved_time
+
+    mode = "persistent" if persistent else "restart"
+    print(f"{mode:>10} {count - missed:>6} {count / elapsed:>10.1f} {FakeListener.created:>9} "
+          f"{injector.events:>8} {injector.leaked:>7} {injector.unhooked:>9} "
+          f"{qf.INPUT_CACHE.hits:>6} {qf.INPUT_CACHE.misses:>6}")
+
+
+class FakeClipboard:
+    """pyperclip 대체 - 실제 클립보드를 건드리지 않음"""
+
+    def __init__(self):
+        self.text = ""
+
+    def copy(self, text):
+        self.text = text
+
+    def paste(self):
+        return self.text
+
+
+class TimedInjector(FakeInjector):
+    """치환마다 첫 SendInput 시각 기록"""
+
+    def __init__(self):
+        super().__init__()
+        self.first_call = None
+
+    def __call__(self, count, arr, size):
+        if self.first_call is None:
+            self.first_call = time.perf_counter()
+        return super().__call__(count, arr, size)
+
+
+# --check 기준 (CI 머신 편차를 감안해 넉넉히)
+CHECK_LIMITS = {
+    'keystroke_us': 100.0,     # 일반 키 on_press+on_release 평균
+    'match_ms': 20.0,          # 종결키 → 매칭 확정 (디스패처 경유) 중앙값
+    'inject_ms': 20.0,         # 매칭 확정 → 첫 SendInput 중앙값
+    'retained_blocks': 0.5,    # 키당 남는 메모리 블록 (누수 감지)
+    'extra_threads': 1,        # 엔진 시작으로 늘어나는 스레드 (디스패처)
+    'scaling': 10.0,           # 최대 크기 / 최소 크기 키 처리 시간 비
+}
+
+
+def make_library(count: int, rng: random.Random) -> list:
+    """on_press로 입력 가능한 문자(영문 소문자/숫자)만 쓰는 스니펫 목록"""
+    alphabet = string.ascii_lowercase + string.digits
+    triggers = set()
+    while len(triggers) < count:
+        triggers.add(''.join(rng.choice(alphabet) for _ in range(rng.randint(2, 8))))
+    now = time.time()
+    return [{"id": f"s{i}", "trigger": t, "content": f"expanded {i}", "createdAt": now}
+            for i, t in enumerate(sorted(triggers))]
+
+
+def char_key(ch: str):
+    return types.SimpleNamespace(vk=ord(ch.upper()))
+
+
+def run_pipeline_size(size: int, keys: int, expansions: int, rng: random.Random) -> dict:
+    folder = tempfile.mkdtemp(prefix="qfred_bench_")
+    manager = qf.SnippetManager(os.path.join(folder, "snippets.json"))
+    manager.snippets = make_library(size, rng)
+    manager.save()
+    manager.flush()  # 백그라운드 저장이 측정에 섞이지 않게
+    triggers = [s["trigger"] for s in manager.snippets]
+
+    threads_before = threading.active_count()
+    engine = qf.SnippetEngine(manager, persistent_listener=True)
+    engine.listener_factory = FakeListener
+    engine.CHECK_DELAY = 0
+    engine.REPLACE_DEBOUNCE = 0
+
+    injector = TimedInjector()
+    ctypes.windll.user32.SendInput = injector
+    qf.pyperclip = FakeClipboard()
+
+    matched_at = []
+    done = threading.Semaphore(0)
+    original_commit = engine._commit_match
+    original_replace = engine._replace
+
+    def _commit_match(trigger, content):
+        matched_at.append(time.perf_counter())
+        return original_commit(trigger, content)
+
+    def _replace(trigger, content):
+        try:
+            original_replace(trigger, content)
+        finally:
+            done.release()
+
+    engine._commit_match = _commit_match
+    engine._replace = _replace
+    saved_time = qf.time
+    qf.time = _NoSleepTime()
+    engine.start()
+    try:
+        extra_threads = threading.active_count() - threads_before
+        listener = FakeListener.active
+
+        # 1) 일반 키 처리 시간 (매칭 안 되는 임의 입력, 가끔 백스페이스)
+        stream = [rng.choice(string.ascii_lowercase) for _ in range(keys)]
+        start = time.perf_counter()
+        for i, ch in enumerate(stream):
+            key = qf.Key.backspace if i % 17 == 16 else char_key(ch)
+            listener.deliver(key, press=True)
+            listener.deliver(key, press=False)
+        keystroke_us = (time.perf_counter() - start) / keys * 1e6
+
+        # 2) 키당 메모리: 일시 할당 최대치와 남는 블록 수
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        peaks = []
+        for ch in stream[:2000]:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            key = char_key(ch)
+            listener.deliver(key, press=True)
+            listener.deliver(key, press=False)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename')
+                       if stat.traceback[0].filename == qf.__file__)
+        sampled = len(stream[:2000])
+
+        # 3) 종결키 → 매칭 → 주입 지연
+        match_ms = []
+        inject_ms = []
+        missed = 0
+        for _ in range(expansions):
+            trigger = rng.choice(triggers)
+            listener.deliver(qf.Key.esc, press=True)  # 이전 입력과 이어지지 않게
+            for ch in trigger:
+                listener.deliver(char_key(ch), press=True)
+                listener.deliver(char_key(ch), press=False)
+            matched_at.clear()
+            injector.first_call = None
+            pressed = time.perf_counter()
+            listener.deliver(qf.Key.space, press=True)
+            if not done.acquire(timeout=2.0) or not matched_at:
+                missed += 1
+                continue
+            match_ms.append((matched_at[0] - pressed) * 1000)
+            inject_ms.append((injector.first_call - matched_at[0]) * 1000)
+            while engine.is_replacing:
+                time.sleep(0)
+        threads_running = threading.active_count() - threads_before
+    finally:
+        engine.stop()
+        manager.close()
+        qf.time = saved_time
+
+    return {
+        'size': size,
+        'keystroke_us': keystroke_us,
+        'match_ms': statistics.median(match_ms) if match_ms else float('inf'),
+        'match_p99_ms': max(match_ms) if match_ms else float('inf'),
+        'inject_ms': statistics.median(inject_ms) if inject_ms else float('inf'),
+        'peak_bytes': statistics.mean(peaks),
+        'retained_blocks': retained / sampled,
+        'extra_threads': max(extra_threads, threads_running),
+        'missed': missed,
+        'leaked': injector.leaked,
+    }
+
+
+def run_pipeline(sizes, keys: int, expansions: int, check: bool) -> int:
+    rng = random.Random(7)
+    print(f"{'snippets':>9} {'key µs':>8} {'match ms':>9} {'p99 ms':>8} {'inject ms':>10} "
+          f"{'B/key':>7} {'blk/key':>8} {'threads':>8} {'missed':>7} {'leaked':>7}")
+    results = []
+    for size in sizes:
+        r = run_pipeline_size(size, keys, expansions, rng)
+        results.append(r)
+        print(f"{r['size']:>9} {r['keystroke_us']:>8.2f} {r['match_ms']:>9.3f} {r['match_p99_ms']:>8.3f} "
+              f"{r['inject_ms']:>10.3f} {r['peak_bytes']:>7.0f} {r['retained_blocks']:>8.3f} "
+              f"{r['extra_threads']:>8} {r['missed']:>7} {r['leaked']:>7}")
+
+    if not check:
+        return 0
+    failures = []
+    for r in results:
+        for name in ('keystroke_us', 'match_ms', 'inject_ms', 'retained_blocks', 'extra_threads'):
+            if r[name] > CHECK_LIMITS[name]:
+                failures.append(f"{r['size']} snippets: {name} {r[name]:.3f} > {CHECK_LIMITS[name]}")
+        if r['missed'] or r['leaked']:
+            failures.append(f"{r['size']} snippets: missed={r['missed']} leaked={r['leaked']}")
+    if len(results) > 1:
+        ratio = results[-1]['keystroke_us'] / max(results[0]['keystroke_us'], 1e-9)
+        if ratio > CHECK_LIMITS['scaling']:
+            failures.append(f"keystroke time grows {ratio:.1f}x from {results[0]['size']} "
+                            f"to {results[-1]['size']} snippets")
+    for line in failures:
+        print(f"[FAIL] {line}")
+    if not failures:
+        print("[OK] all within limits")
+    return 1 if failures else 0
+
+
+def write_csv_library(path: str, count: int, rng: random.Random):
+    import csv
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["trigger", "content"])
+        for s in make_library(count, rng):
+            writer.writerow([s["trigger"], s["content"] + ", line\nbreak"])
+
+
+def run_import(count: int, sample: int):
+    rng = random.Random(11)
+    folder = tempfile.mkdtemp(prefix="qfred_bench_")
+    source = os.path.join(folder, "library.csv")
+    write_csv_library(source, count, rng)
+    size_mb = os.path.getsize(source) / 1024 / 1024
+    print(f"{count} snippets, {size_mb:.1f} MB CSV")
+    print(f"{'backend':>8} {'parse s':>8} {'import s':>9} {'refreshes':>10} {'export s':>9} "
+          f"{'add() s/N':>10} {'est. add() s':>13}")
+
+    for backend in qf.SNIPPET_STORES:
+        sub = os.path.join(folder, backend)
+        os.makedirs(sub)
+        manager = qf.SnippetManager(os.path.join(sub, "snippets.json"), backend=backend)
+        refreshes = []
+        manager.subscribe(lambda forms: refreshes.append('delta'), reset=lambda: refreshes.append('reset'))
+        try:
+            start = time.perf_counter()
+            records = list(qf.iter_snippet_file(source))
+            parse = time.perf_counter() - start
+
+            start = time.perf_counter()
+            report = manager.bulk_import(records)
+            manager.flush()
+            imported = time.perf_counter() - start
+            assert report["added"] == count, report
+
+            start = time.perf_counter()
+            exported = manager.export_file(os.path.join(sub, "export.csv"))
+            export = time.perf_counter() - start
+            assert exported == len(manager.snippets), exported
+
+            # 비교: 하나씩 add() (스니펫마다 저장 + 엔진 갱신)
+            start = time.perf_counter()
+            for i in range(sample):
+                manager.add(f"zz{i}", "content")
+            manager.flush()
+            per_add = (time.perf_counter() - start) / max(sample, 1)
+        finally:
+            manager.close()
+        print(f"{backend:>8} {parse:>8.2f} {imported:>9.2f} {refreshes.count('reset'):>10} {export:>9.2f} "
+              f"{per_add * 1000:>8.2f}ms {per_add * count:>13.1f}")
+
+
+def run_reload(count: int) -> int:
+    """bulk_import 직후 다시 읽기 - 저장 스레드를 멈춰 스냅샷이 쓰이지 않은 상태를 만듦"""
+    failures = []
+    for backend in qf.SNIPPET_STORES:
+        for stale in (False, True):
+            folder = tempfile.mkdtemp(prefix="qfred_bench_")
+            path = os.path.join(folder, "snippets.json")
+            manager = qf.SnippetManager(path, backend=backend)
+            try:
+                manager.add("before", "journal")
+                persister = getattr(manager.store, "persister", None)
+                if persister is not None:
+                    persister.stop()
+                    if stale:
+                        # 이전 압축의 스냅샷도 아직 안 쓰인 상태 (.old 대기)
+                        manager.store.compact(manager.snippets)
+                        manager.add("between", "journal")
+                records = [{"trigger": s["trigger"], "content": s["content"]}
+                           for s in make_library(count, random.Random(3))]
+                report = manager.bulk_import(records)
+                expected = {(s["trigger"], s["content"]) for s in manager.snippets}
+
+                reopened = qf.SNIPPET_STORES[backend](path)
+                try:
+                    loaded = {(s["trigger"], s["content"]) for s in (reopened.load() or [])}
+                finally:
+                    reopened.close()
+            finally:
+                manager.close()
+            ok = loaded == expected
+            label = f"{backend}{' (.old pending)' if stale else ''}"
+            print(f"{label:>24}: imported {report['added']}, reloaded {len(loaded)}/{len(expected)} "
+                  f"{'ok' if ok else 'MISSING'}")
+            if not ok:
+                failures.append(label)
+            if persister is None:
+                break  # .old는 JSON 저장소에만 있음
+    for label in failures:
+        print(f"[FAIL] {label}: import lost on reload")
+    if not failures:
+        print("[OK] imports survive reload")
+    return 1 if failures else 0
+
+
+def make_text_library(count: int, rng: random.Random) -> list:
+    """단어로 된 내용 + 한글/영문 트리거 (목록 검색용)"""
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+             for _ in range(5000)]
+    words += ["감사합니다", "안녕하세요", "주소", "전화번호", "회의", "일정"]
+    korean = "ㄱㄴㄷㄹㅁㅂㅅㅇㅈㅊㅋㅌㅍㅎ"
+    now = time.time()
+    snippets = []
+    for i in range(count):
+        if i % 3 == 0:
+            trigger = ''.join(rng.choice(korean) for _ in range(rng.randint(2, 3))) + str(i)
+        else:
+            trigger = rng.choice(words)[:6] + str(i)
+        content = ' '.join(rng.choice(words) for _ in range(rng.randint(5, 30)))
+        snippets.append({"id": f"s{i}", "trigger": trigger, "content": content.capitalize(),
+                         "createdAt": now})
+    return snippets
+
+
+def linear_filter(rows: list, text: str) -> list:
+    """기존 load_snippets_list의 필터 (rows: (id, trigger, content))"""
+    text = text.lower()
+    return [id for id, trigger, content in rows
+            if text in trigger.lower() or text in content.lower()]
+
+
+def run_search(count: int, backend: str):
+    rng = random.Random(5)
+    folder = tempfile.mkdtemp(prefix="qfred_bench_")
+    manager = qf.SnippetManager(os.path.join(folder, "snippets.json"), backend=backend)
+    library = make_text_library(count, rng)
+    if backend == 'json':
+        manager.snippets = library
+    else:
+        manager.bulk_import(library)
+    rows = [(s["id"], s["trigger"], s["content"]) for s in manager.store.iter_snippets(manager.snippets)]
+    try:
+        start = time.perf_counter()
+        manager.search("x")
+        first = time.perf_counter() - start
+        ready = manager._search.wait_ready(120)
+        build = time.perf_counter() - start
+        print(f"{count} snippets ({backend}): first search {first * 1000:.0f} ms (plain filter), "
+              f"index ready after {build:.2f}s ({'yes' if ready else 'no'})")
+
+        contents = [content for _, _, content in rows]
+        words = [contents[i].split()[rng.randrange(5)] for i in rng.sample(range(len(rows)), 20)]
+        queries = words + ["Zzq", "감사", "감사합니", "ㄱㅅ", "rt", "rkatk", "ㄱ", "감"] + \
+            [w[:1] for w in words[:5]] + [w[:2] for w in words[:5]] + [w[:3] for w in words[:5]]
+        for id, _, _ in rng.sample(rows, 2000):
+            for _ in range(rng.randint(1, 20)):
+                manager.record_use(id)
+
+        print(f"{'query':>12} {'hits':>6} {'linear ms':>10} {'index ms':>9} {'ranked ms':>10}")
+        linear_total = index_total = ranked_total = 0.0
+        short = []
+        for query in queries:
+            manager._search._last = None
+            start = time.perf_counter()
+            expected = linear_filter(rows, query)
+            linear = time.perf_counter() - start
+            start = time.perf_counter()
+            found = manager.search(query)
+            indexed = time.perf_counter() - start
+            manager._search._last = None
+            start = time.perf_counter()
+            ranked = manager.search(query, ranked=True)
+            ranking = time.perf_counter() - start
+            linear_total += linear
+            index_total += indexed
+            ranked_total += ranking
+            if len(query) <= 2:
+                short.append(indexed)
+            # 색인은 한글 트리거를 두벌식 키로도 찾으므로 기존 결과를 모두 포함해야 함
+            assert set(expected) <= set(found) <= set(ranked), query
+            print(f"{query:>12} {len(found):>6} {linear * 1000:>10.2f} {indexed * 1000:>9.2f} "
+                  f"{ranking * 1000:>10.2f}")
+
+        # 글자 단위로 입력 (이전 결과가 NARROW_LIMIT 이하면 그 안에서 좁히기) - 색인 조회 결과와 같아야 함
+        typing = []
+        narrowed = 0
+        for word in [w for w in words if len(w) >= 6][:10] or words[:5]:
+            manager._search._last = None
+            for i in range(1, len(word) + 1):
+                last = manager._search._last
+                start = time.perf_counter()
+                found = manager.search(word[:i])
+                typing.append(time.perf_counter() - start)
+                if last and len(last[2]) <= manager._search.NARROW_LIMIT:
+                    narrowed += 1
+                saved, manager._search._last = manager._search._last, None
+                assert manager.search(word[:i]) == found, word[:i]
+                manager._search._last = saved
+        print(f"per-keystroke search: median {statistics.median(typing) * 1000:.2f} ms, "
+              f"max {max(typing) * 1000:.2f} ms ({narrowed}/{len(typing)} narrowed); "
+              f"1-2 char queries max {max(short) * 1000:.2f} ms")
+        print(f"total: linear {linear_total * 1000:.1f} ms, index {index_total * 1000:.1f} ms, "
+              f"ranked {ranked_total * 1000:.1f} ms")
+
+        # 엔진 스레드의 사용 기록 (set_usage)과 UI 스레드의 순위 검색이 겹쳐도 예외가 없어야 함
+        stop = threading.Event()
+
+        def record():
+            while not stop.is_set():
+                manager.record_use(rows[rng.randrange(len(rows))][0])
+
+        recorder = threading.Thread(target=record, daemon=True)
+        recorder.start()
+        calls = errors = 0
+        deadline = time.perf_counter() + 2.0
+        while time.perf_counter() < deadline:
+            manager._search._last = None
+            try:
+                manager.search(words[0][:1], ranked=True)
+            except RuntimeError:
+                errors += 1
+            calls += 1
+        stop.set()
+        recorder.join()
+        print(f"ranked search during record_use: {calls} calls, {errors} errors")
+    finally:
+        manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q-fred 스니펫 엔진 벤치마크")
+    sub = parser.add_subparsers(dest="command")
+    p_match = sub.add_parser("match", help="트리거 개수별 매칭 시간")
+    p_match.add_argument("--iterations", type=int, default=2000)
+    p_stress = sub.add_parser("stress", help="가짜 리스너/주입기로 초당 치환 횟수 측정")
+    p_stress.add_argument("--count", type=int, default=500)
+    p_stress.add_argument("--realtime", action="store_true", help="_replace의 실제 대기 시간 유지")
+    p_pipe = sub.add_parser("pipeline", help="라이브러리 크기별 키 입력→매칭→주입 지연")
+    p_pipe.add_argument("--sizes", default="10,1000,10000,100000")
+    p_pipe.add_argument("--keys", type=int, default=20000, help="측정할 일반 키 입력 수")
+    p_pipe.add_argument("--expansions", type=int, default=200, help="측정할 치환 횟수")
+    p_pipe.add_argument("--check", action="store_true", help="기준 초과 시 종료 코드 1")
+    p_import = sub.add_parser("import", help="대량 가져오기/내보내기 시간")
+    p_import.add_argument("--count", type=int, default=50000)
+    p_import.add_argument("--sample", type=int, default=200, help="비교용 add() 반복 횟수")
+    p_reload = sub.add_parser("reload", help="대량 가져오기 직후 다시 읽기 확인")
+    p_reload.add_argument("--count", type=int, default=2000)
+    p_search = sub.add_parser("search", help="목록 검색 시간")
+    p_search.add_argument("--count", type=int, default=50000)
+    p_search.add_argument("--backend", choices=list(qf.SNIPPET_STORES), default='json')
+    args = parser.parse_args()
+
+    if args.command == "pipeline":
+        sizes = [int(x) for x in args.sizes.split(",") if x]
+        sys.exit(run_pipeline(sizes, args.keys, args.expansions, args.check))
+    elif args.command == "import":
+        run_import(args.count, args.sample)
+    elif args.command == "reload":
+        sys.exit(run_reload(args.count))
+    elif args.command == "search":
+        run_search(args.count, args.backend)
+    elif args.command == "stress":
+        print(f"{'mode':>10} {'done':>6} {'exp/sec':>10} {'listeners':>9} "
+              f"{'injected':>8} {'leaked':>7} {'unhooked':>9} {'hits':>6} {'misses':>6}")
+        for persistent in (True, False):
+            run_stress(args.count, persistent, args.realtime)
+    else:
+        run_match(getattr(args, "iterations", 2000))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,23 @@ Q-fred - Smart Snippet Manager for Windows (PyQt6 Version)
 시스템 전역에서 단축어를 감지하고 치환하는 프로그램
 """
 
+import atexit
+import bisect
+import csv
+import functools
+import glob
 import json
+import logging
+import logging.handlers
+import math
 import os
+import re
 import sys
+import heapq
+import itertools
 import threading
 import time
+from collections import Counter, OrderedDict, deque
 
 # PyInstaller frozen exe: Qt 플러그인 경로 설정
 if getattr(sys, 'frozen', False):
@@ -17,6 +29,7 @@ import pyperclip
 import yt_dlp
 import uuid
 import shutil
+import sqlite3
 import winreg
 from urllib.parse import urlparse, parse_qs
 
@@ -67,13 +80,16 @@ VK_SHIFT = 0x10
 VK_INSERT = 0x2D
 VK_V = 0x56
 
+# 자체 주입 이벤트 표식 (dwExtraInfo) - 리스너가 이 값을 보고 자기 입력을 걸러냄
+QFRED_INJECT_TAG = 0x51465244  # 'QFRD'
+
 class KEYBDINPUT(ctypes.Structure):
     _fields_ = [
         ('wVk', ctypes.c_ushort),
         ('wScan', ctypes.c_ushort),
         ('dwFlags', ctypes.c_ulong),
         ('time', ctypes.c_ulong),
-        ('dwExtraInfo', ctypes.POINTER(ctypes.c_ulong)),
+        ('dwExtraInfo', ctypes.c_size_t),  # ULONG_PTR
     ]
 
 class INPUT(ctypes.Structure):
@@ -88,6 +104,7 @@ def _send_key(vk, flags=0):
     inp.type = INPUT_KEYBOARD
     inp.ki.wVk = vk
     inp.ki.dwFlags = flags
+    inp.ki.dwExtraInfo = QFRED_INJECT_TAG
     arr = (INPUT * 1)(inp)
     return ctypes.windll.user32.SendInput(1, arr, ctypes.sizeof(INPUT))
 
@@ -97,14 +114,38 @@ def _make_input(vk, flags=0):
     inp.type = INPUT_KEYBOARD
     inp.ki.wVk = vk
     inp.ki.dwFlags = flags
+    inp.ki.dwExtraInfo = QFRED_INJECT_TAG
     return inp
 
-def send_backspaces(count):
-    """백스페이스를 count번 전송 (한 번에 down+up 원자적)"""
+def _send_events(events):
+    """INPUT 목록을 SendInput 한 번으로 전송"""
+    if not events:
+        return 0
+    arr = (INPUT * len(events))(*events)
+    return ctypes.windll.user32.SendInput(len(events), arr, ctypes.sizeof(INPUT))
+
+def _build_backspace_events(count):
+    """백스페이스 down/up 쌍 count개"""
+    events = []
+    for _ in range(count):
+        events.append(_make_input(VK_BACK))
+        events.append(_make_input(VK_BACK, KEYEVENTF_KEYUP))
+    return events
+
+def send_backspaces(count, interval=0.02, batched=False):
+    """백스페이스를 count번 전송
+
+    batched=True면 모든 down/up 쌍을 SendInput 한 번으로,
+    아니면 한 쌍씩 interval초 간격으로 전송 (느린 앱/콘솔용)
+    """
+    if batched:
+        _send_events(_build_backspace_events(count))
+        return
     for _ in range(count):
         arr = (INPUT * 2)(_make_input(VK_BACK), _make_input(VK_BACK, KEYEVENTF_KEYUP))
         ctypes.windll.user32.SendInput(2, arr, ctypes.sizeof(INPUT))
-        time.sleep(0.02)
+        if interval > 0:
+            time.sleep(interval)
 
 KEYEVENTF_UNICODE = 0x0004
 
@@ -130,24 +171,40 @@ def send_paste_shift_insert():
     )
     ctypes.windll.user32.SendInput(4, arr, ctypes.sizeof(INPUT))
 
-def is_console_window():
-    """포그라운드 윈도우가 콘솔/터미널인지 감지 (클래스명 + 프로세스명)"""
+CONSOLE_PROCESSES = (
+    'windowsterminal.exe', 'cmd.exe', 'powershell.exe',
+    'pwsh.exe', 'conhost.exe', 'bash.exe', 'wsl.exe',
+    'mintty.exe', 'alacritty.exe', 'wezterm-gui.exe',
+    'hyper.exe', 'code.exe', 'antigravity.exe',
+)
+
+# 포그라운드 앱 판별 캐시: (hwnd, pid) -> (만료 시각, 클래스명, 프로세스명)
+# 같은 창에 연속 치환할 때 클래스명/프로세스 조회를 반복하지 않음
+_FOREGROUND_CACHE_TTL = 5.0
+_foreground_cache = {}
+
+def get_foreground_app():
+    """포그라운드 윈도우 정보 (hwnd, 클래스명, 프로세스명) - 이름은 소문자"""
     hwnd = ctypes.windll.user32.GetForegroundWindow()
+    pid = ctypes.wintypes.DWORD()
+    try:
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    except:
+        pass
+
+    # hwnd가 재사용돼도 pid가 다르면 다른 창으로 취급
+    key = (hwnd, pid.value)
+    now = time.monotonic()
+    cached = _foreground_cache.get(key)
+    if cached and cached[0] > now:
+        return hwnd, cached[1], cached[2]
 
-    # 1차: 윈도우 클래스명 체크
     class_name = ctypes.create_unicode_buffer(256)
     ctypes.windll.user32.GetClassNameW(hwnd, class_name, 256)
     name = class_name.value.lower()
-    _debug_console_info(name, "")  # 디버그
-    if ('console' in name or 'terminal' in name
-            or 'cascadia' in name or 'mintty' in name
-            or 'cmd' in name or 'powershell' in name):
-        return True
 
-    # 2차: 프로세스명 체크 (Windows Terminal 등 WinUI3 기반)
+    proc = ""
     try:
-        pid = ctypes.wintypes.DWORD()
-        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
         PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
         handle = ctypes.windll.kernel32.OpenProcess(
             PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
@@ -158,24 +215,81 @@ def is_console_window():
                 handle, 0, exe_buf, ctypes.byref(size))
             ctypes.windll.kernel32.CloseHandle(handle)
             proc = os.path.basename(exe_buf.value).lower()
-            _debug_console_info(name, proc)  # 디버그
-            if proc in ('windowsterminal.exe', 'cmd.exe', 'powershell.exe',
-                        'pwsh.exe', 'conhost.exe', 'bash.exe', 'wsl.exe',
-                        'mintty.exe', 'alacritty.exe', 'wezterm-gui.exe',
-                        'hyper.exe', 'code.exe', 'antigravity.exe'):
-                return True
     except:
         pass
+    _debug_console_info(name, proc)  # 디버그
 
-    return False
+    if len(_foreground_cache) > 64:
+        _foreground_cache.clear()
+    _foreground_cache[key] = (now + _FOREGROUND_CACHE_TTL, name, proc)
+    return hwnd, name, proc
 
-def _debug_console_info(class_name, proc_name):
-    """콘솔 감지 디버그 로그"""
+def is_console_app(class_name, proc_name):
+    """클래스명/프로세스명으로 콘솔/터미널 여부 판정"""
+    # 1차: 윈도우 클래스명 체크
+    if ('console' in class_name or 'terminal' in class_name
+            or 'cascadia' in class_name or 'mintty' in class_name
+            or 'cmd' in class_name or 'powershell' in class_name):
+        return True
+    # 2차: 프로세스명 체크 (Windows Terminal 등 WinUI3 기반)
+    return proc_name in CONSOLE_PROCESSES
+
+def is_console_window():
+    """포그라운드 윈도우가 콘솔/터미널인지 감지 (클래스명 + 프로세스명)"""
+    _, class_name, proc_name = get_foreground_app()
+    return is_console_app(class_name, proc_name)
+
+def is_ime_open(hwnd):
+    """대상 윈도우의 IME가 한글(조합) 모드인지. 알 수 없으면 None"""
+    WM_IME_CONTROL = 0x0283
+    IMC_GETOPENSTATUS = 0x0005
+    SMTO_ABORTIFHUNG = 0x0002
     try:
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '_debug.txt'), 'a', encoding='utf-8') as f:
-            f.write(f"CONSOLE_DETECT: class='{class_name}', proc='{proc_name}'\n")
+        ime_hwnd = ctypes.windll.imm32.ImmGetDefaultIMEWnd(ctypes.wintypes.HWND(hwnd))
+        if not ime_hwnd:
+            return None
+        result = ctypes.c_size_t()
+        ok = ctypes.windll.user32.SendMessageTimeoutW(
+            ctypes.wintypes.HWND(ime_hwnd), WM_IME_CONTROL, IMC_GETOPENSTATUS, 0,
+            SMTO_ABORTIFHUNG, 50, ctypes.byref(result))
+        if not ok:
+            return None
+        return bool(result.value)
     except:
-        pass
+        return None
+
+def _make_debug_logger():
+    """디버그 로거 (QFRED_DEBUG=1일 때만 _debug.txt에 기록)
+
+    버퍼(MemoryHandler)에 모았다가 일정 개수마다 회전 파일로 내보내므로
+    치환 경로에서 매번 파일을 열지 않는다.
+    """
+    logger = logging.getLogger("qfred.debug")
+    logger.propagate = False
+    if os.environ.get('QFRED_DEBUG', '') not in ('', '0'):
+        try:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_debug.txt')
+            target = logging.handlers.RotatingFileHandler(
+                path, maxBytes=512 * 1024, backupCount=2, encoding='utf-8')
+            target.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            handler = logging.handlers.MemoryHandler(
+                capacity=50, flushLevel=logging.ERROR, target=target)
+            logger.addHandler(handler)
+            logger.setLevel(logging.DEBUG)
+            atexit.register(handler.close)
+        except:
+            pass
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+        logger.setLevel(logging.CRITICAL + 1)
+    return logger
+
+debug_log = _make_debug_logger()
+
+def _debug_console_info(class_name, proc_name):
+    """콘솔 감지 디버그 로그"""
+    if debug_log.isEnabledFor(logging.DEBUG):
+        debug_log.debug("CONSOLE_DETECT: class='%s', proc='%s'", class_name, proc_name)
 
 
 # IMM32 for IME control (트리거 입력 필드 한/영 전환)
@@ -185,8 +299,8 @@ try:
 except:
     pass
 
-def send_unicode_string(text):
-    """SendInput + KEYEVENTF_UNICODE로 문자열 원자적 전송 (클립보드 불필요, 한번에 출력)"""
+def _build_unicode_events(text):
+    """문자열 → KEYEVENTF_UNICODE down/up 목록 (줄바꿈은 Enter 키)"""
     events = []
     for char in text:
         if char == '\n':
@@ -198,6 +312,7 @@ def send_unicode_string(text):
             down.ki.wVk = 0
             down.ki.wScan = ord(char)
             down.ki.dwFlags = KEYEVENTF_UNICODE
+            down.ki.dwExtraInfo = QFRED_INJECT_TAG
             events.append(down)
 
             up = INPUT()
@@ -205,24 +320,112 @@ def send_unicode_string(text):
             up.ki.wVk = 0
             up.ki.wScan = ord(char)
             up.ki.dwFlags = KEYEVENTF_UNICODE | KEYEVENTF_KEYUP
+            up.ki.dwExtraInfo = QFRED_INJECT_TAG
             events.append(up)
+    return events
 
-    if events:
-        arr = (INPUT * len(events))(*events)
-        ctypes.windll.user32.SendInput(len(events), arr, ctypes.sizeof(INPUT))
+class InputArrayCache:
+    """스니펫별로 만들어 둔 (INPUT * n) 배열 LRU 캐시
+
+    자주 쓰는 긴 스니펫은 매번 글자마다 INPUT 구조체를 만드는 비용이 크므로
+    스니펫 id별로 완성된 배열을 재사용한다. 캐시된 이벤트 총수가 max_events를
+    넘으면 오래 안 쓴 것부터 버린다. 내용이 바뀌었으면 (수정 직후 등) 새로 만든다.
+    """
+
+    def __init__(self, max_events: int = 200_000):
+        self.max_events = max_events
+        self.total_events = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (text, arr, n)
+        self._lock = threading.Lock()
+
+    def get(self, key, text: str):
+        """(배열, 이벤트 수). 없거나 내용이 다르면 새로 만들어 저장"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == text:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+        events = _build_unicode_events(text)
+        n = len(events)
+        arr = (INPUT * n)(*events)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_events -= old[2]
+            if n <= self.max_events:
+                self._entries[key] = (text, arr, n)
+                self.total_events += n
+                while self.total_events > self.max_events:
+                    _, (_, _, evicted) = self._entries.popitem(last=False)
+                    self.total_events -= evicted
+        return arr, n
+
+    def invalidate(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_events -= old[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_events = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "events": self.total_events,
+            }
+
+
+INPUT_CACHE = InputArrayCache()
+
+def _unicode_array(text, cache_key=None):
+    """문자열의 (INPUT 배열, 이벤트 수). cache_key가 있으면 캐시 사용"""
+    if cache_key is not None:
+        return INPUT_CACHE.get(cache_key, text)
+    events = _build_unicode_events(text)
+    return (INPUT * len(events))(*events), len(events)
+
+def send_unicode_string(text, cache_key=None):
+    """SendInput + KEYEVENTF_UNICODE로 문자열 원자적 전송 (클립보드 불필요, 한번에 출력)"""
+    arr, n = _unicode_array(text, cache_key)
+    if n:
+        ctypes.windll.user32.SendInput(n, arr, ctypes.sizeof(INPUT))
+
+def send_replacement(backspace_count, text, cache_key=None):
+    """백스페이스 + 치환 텍스트를 SendInput 한 번으로 전송 (중간에 다른 입력이 끼지 않음)"""
+    text_arr, text_n = _unicode_array(text, cache_key)
+    back_n = backspace_count * 2
+    size = ctypes.sizeof(INPUT)
+    arr = (INPUT * (back_n + text_n))(*_build_backspace_events(backspace_count))
+    if text_n:
+        ctypes.memmove(ctypes.addressof(arr) + back_n * size, text_arr, text_n * size)
+    ctypes.windll.user32.SendInput(back_n + text_n, arr, size)
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QTextEdit, QPushButton, QListWidget, QListWidgetItem,
     QFrame, QScrollArea, QSystemTrayIcon, QMenu, QSplitter, QMessageBox,
     QSizePolicy, QStackedWidget, QSpacerItem, QDialog, QFileDialog, QCheckBox,
-    QComboBox, QProgressBar, QGridLayout, QSlider
+    QComboBox, QProgressBar, QGridLayout, QSlider, QListView, QStyledItemDelegate, QStyle,
+    QAbstractItemView
+)
+from PyQt6.QtCore import (
+    Qt, QSize, pyqtSignal, QObject, QTimer, QEvent, QThread, QPoint, QFileSystemWatcher,
+    QAbstractListModel, QModelIndex, QRect, QRectF
 )
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, QObject, QTimer, QEvent, QThread, QPoint
 from PyQt6.QtNetwork import QLocalServer, QLocalSocket
 from PyQt6.QtGui import (
     QIcon, QPixmap, QFont, QColor, QPalette, QAction, QFontDatabase, QCursor,
-    QImage, QPainter, QPen, QBrush
+    QImage, QPainter, QPen, QBrush, QFontMetrics
 )
 
 # 설정 파일 경로
@@ -256,6 +459,8 @@ class AppSettings:
                 {"name": "Music", "folder": "Music"},
             ],
             'default_format': 'video',
+            'persistent_listener': True,
+            'storage_backend': 'json',
         }
         self.load()
 
@@ -308,6 +513,36 @@ class AppSettings:
         os.makedirs(folder, exist_ok=True)
         return os.path.join(folder, "snippets.json")
 
+    @property
+    def persistent_listener(self) -> bool:
+        """치환 중에도 키보드 리스너를 유지할지 (False면 치환마다 재시작)"""
+        return self._settings.get('persistent_listener', True)
+
+    @persistent_listener.setter
+    def persistent_listener(self, value: bool):
+        self._settings['persistent_listener'] = value
+        self.save()
+
+    @property
+    def storage_backend(self) -> str:
+        """스니펫 저장 방식: 'json' (snippets.json) 또는 'sqlite' (snippets.db)"""
+        return self._settings.get('storage_backend', 'json')
+
+    @storage_backend.setter
+    def storage_backend(self, value: str):
+        self._settings['storage_backend'] = value
+        self.save()
+
+    @property
+    def ranked_search(self) -> bool:
+        """스니펫 검색 결과를 관련도/사용 횟수순으로 정렬할지"""
+        return self._settings.get('ranked_search', False)
+
+    @ranked_search.setter
+    def ranked_search(self, value: bool):
+        self._settings['ranked_search'] = value
+        self.save()
+
     @property
     def download_folder(self) -> str:
         return self._settings.get('download_folder', self.DEFAULT_DOWNLOAD_FOLDER)
@@ -326,6 +561,26 @@ class AppSettings:
         self._settings['download_groups'] = value
         self.save()
 
+    @property
+    def download_concurrency(self) -> int:
+        """동시에 실행할 다운로드 수"""
+        return self._settings.get('download_concurrency', 3)
+
+    @download_concurrency.setter
+    def download_concurrency(self, value: int):
+        self._settings['download_concurrency'] = value
+        self.save()
+
+    @property
+    def download_per_host(self) -> int:
+        """같은 사이트에서 동시에 받을 다운로드 수"""
+        return self._settings.get('download_per_host', 2)
+
+    @download_per_host.setter
+    def download_per_host(self, value: int):
+        self._settings['download_per_host'] = value
+        self.save()
+
     @property
     def default_format(self) -> str:
         return self._settings.get('default_format', 'video')
@@ -596,38 +851,46 @@ QWERTY_TO_KOREAN = {
 }
 
 
+def _build_syllable_table():
+    """완성형 음절(가~힣) 인덱스 -> QWERTY 키 문자열 표
+
+    음절 = 0xAC00 + (초성 * 21 + 중성) * 28 + 종성 이므로 NFD 없이 산술로 분해한다.
+    """
+    def key(jamo):
+        return UNICODE_JAMO.get(jamo) or KOREAN_TO_QWERTY.get(jamo, jamo)
+
+    table = []
+    for index in range(11172):
+        cho, rest = divmod(index, 588)
+        jung, jong = divmod(rest, 28)
+        keys = key(chr(0x1100 + cho)) + key(chr(0x1161 + jung))
+        if jong:
+            keys += key(chr(0x11A7 + jong))
+        table.append(keys)
+    return table
+
+HANGUL_SYLLABLE_QWERTY = _build_syllable_table()
+
+
+@functools.lru_cache(maxsize=4096)
 def convert_to_qwerty(text: str) -> str:
     """한글(완성형/자모)을 QWERTY 키 입력으로 변환"""
-    import unicodedata
-    result = ''
+    result = []
     for char in text:
-        if '\uAC00' <= char <= '\uD7A3':
-            decomposed = unicodedata.normalize('NFD', char)
-            for jamo in decomposed:
-                if jamo in UNICODE_JAMO:
-                    result += UNICODE_JAMO[jamo]
-                elif jamo in KOREAN_TO_QWERTY:
-                    result += KOREAN_TO_QWERTY[jamo]
-                else:
-                    result += jamo
-        elif char in KOREAN_TO_QWERTY:
-            result += KOREAN_TO_QWERTY[char]
+        code = ord(char)
+        if 0xAC00 <= code <= 0xD7A3:
+            result.append(HANGUL_SYLLABLE_QWERTY[code - 0xAC00])
         else:
-            result += char
-    return result
+            result.append(KOREAN_TO_QWERTY.get(char, char))
+    return ''.join(result)
 
 
 def convert_to_korean(qwerty: str) -> str:
     """QWERTY 키 입력을 한글 자모로 변환"""
-    result = ''
-    for char in qwerty:
-        if char in QWERTY_TO_KOREAN:
-            result += QWERTY_TO_KOREAN[char]
-        else:
-            result += char
-    return result
+    return ''.join([QWERTY_TO_KOREAN.get(char, char) for char in qwerty])
 
 
+@functools.lru_cache(maxsize=4096)
 def calc_visual_len(qwerty_trigger: str) -> int:
     """QWERTY 트리거의 화면 표시 글자수 계산 (한글 겹받침 고려)
     예: 'rt'(ㄱㅅ) → IME가 ㄳ으로 합침 → 1글자, 'dx'(ㅇㅌ) → 합칠 수 없음 → 2글자
@@ -675,35 +938,1371 @@ class TriggerLineEdit(QLineEdit):
         super().inputMethodEvent(event)
 
 
-class SnippetManager:
-    """스니펫 데이터 관리"""
+def _normalize_snippet(s: dict) -> dict:
+    """저장된 스니펫 레코드를 표준 형태로"""
+    return {
+        "id": s.get("id") or str(uuid.uuid4()),
+        "trigger": s.get("trigger", "").replace(" ", ""),
+        "content": s.get("content", ""),
+        "createdAt": s.get("createdAt", time.time())
+    }
+
+
+def normalize_trigger(trigger_input: str) -> str:
+    """입력된 트리거를 저장 형태로 (한글 포함 시 자모 단위로 정규화)"""
+    trigger_input = trigger_input.strip()
+    has_korean = any('\uAC00' <= c <= '\uD7A3' or '\u3131' <= c <= '\u3163' for c in trigger_input)
+    if has_korean:
+        return convert_to_korean(convert_to_qwerty(trigger_input))
+    return trigger_input
+
+
+SNIPPET_FILE_FORMATS = ('.csv', '.tsv', '.json')
+
+def iter_snippet_file(path: str):
+    """가져오기 파일에서 (trigger, content) 레코드를 하나씩 읽기
+
+    CSV/TSV: 헤더 (trigger,content / abbreviation,text 등)가 있으면 열 이름으로, 없으면 첫 두 열.
+    JSON: [{"trigger", "content"}, ...] 또는 {"snippets": [...]} (Q-fred 내보내기 형식 포함).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("snippets", [])
+        for item in data:
+            if isinstance(item, dict):
+                yield {"trigger": str(item.get("trigger") or item.get("abbreviation") or ""),
+                       "content": str(item.get("content") or item.get("text") or "")}
+        return
+
+    delimiter = '\t' if ext == '.tsv' else ','
+    trigger_names = ('trigger', 'abbreviation', 'shortcut', 'keyword', '트리거', '단축어')
+    content_names = ('content', 'text', 'snippet', 'phrase', 'expansion', '내용')
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        trigger_col, content_col = 0, 1
+        first = next(reader, None)
+        if first is None:
+            return
+        header = [h.strip().lower() for h in first]
+        if any(h in trigger_names for h in header) and any(h in content_names for h in header):
+            trigger_col = next(i for i, h in enumerate(header) if h in trigger_names)
+            content_col = next(i for i, h in enumerate(header) if h in content_names)
+        else:
+            reader = itertools.chain([first], reader)
+        for row in reader:
+            if len(row) > max(trigger_col, content_col):
+                yield {"trigger": row[trigger_col], "content": row[content_col]}
+            elif row:
+                yield {"trigger": row[0], "content": ""}
+
+
+def write_snippet_file(path: str, snippets):
+    """스니펫을 파일로 하나씩 기록 (CSV/TSV/JSON, 전체를 메모리에 모으지 않음). 기록 수 반환"""
+    ext = os.path.splitext(path)[1].lower()
+    count = 0
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        if ext == '.json':
+            f.write('{"snippets": [\n')
+            for s in snippets:
+                if count:
+                    f.write(',\n')
+                json.dump({"id": s["id"], "trigger": s["trigger"], "content": s["content"],
+                           "createdAt": s.get("createdAt")}, f, ensure_ascii=False)
+                count += 1
+            f.write('\n]}\n')
+        else:
+            writer = csv.writer(f, delimiter='\t' if ext == '.tsv' else ',')
+            writer.writerow(["trigger", "content"])
+            for s in snippets:
+                writer.writerow([s["trigger"], s["content"]])
+                count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def file_signature(path: str):
+    """파일 변경 감지용 (수정 시각, 크기). 없으면 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def write_json_atomic(path: str, data, generations: int = 0):
+    """임시 파일 + fsync + 교체로 JSON 저장 (중간에 죽어도 기존 파일 유지)
+
+    generations > 0이면 기존 파일을 path.1 ~ path.N 세대로 보관한다.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if generations > 0 and os.path.exists(path):
+        for i in range(generations - 1, 0, -1):
+            older = f"{path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{path}.{i + 1}")
+        first = f"{path}.1"
+        try:
+            if os.path.exists(first):
+                os.remove(first)
+            os.link(path, first)  # 하드링크: 복사 없이 현재 파일 보관
+        except OSError:
+            shutil.copy2(path, first)
+    os.replace(tmp, path)
+
+
+class JsonPersister:
+    """JSON 파일 쓰기 지연 저장 스레드 (스니펫 스냅샷, 사용 횟수, 다운로드 작업 기록)
+
+    연속 변경은 delay초 동안 모아 한 번만 쓰고 (계속 바뀌는 중이어도 max_delay초
+    안에는 저장), 실제 쓰기는 UI 스레드 밖에서 write_json_atomic으로 한다.
+    """
+
+    def __init__(self, path: str, generations: int = 3, delay: float = 0.5, max_delay: float = 5.0,
+                 after_write=None):
+        self.path = path
+        self.after_write = after_write  # 매 저장 후 호출 (저장 스레드)
+        self.generations = generations
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending = None      # 아직 쓰지 않은 최신 스냅샷
+        self._callbacks = []      # 최신 스냅샷 저장 후 호출할 함수
+        self._first_at = 0.0      # 첫 미저장 요청 시각
+        self._last_at = 0.0       # 마지막 요청 시각
+        self._writing = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="JsonPersister", daemon=True)
+        self._thread.start()
+
+    def schedule(self, snapshot: list, on_written=None):
+        """스냅샷 저장 예약 (이전 미저장 스냅샷은 버림)
+
+        on_written은 이 스냅샷 (또는 그 이후 스냅샷)이 디스크에 기록된 뒤 저장 스레드에서 호출된다.
+        """
+        now = time.monotonic()
+        with self._cond:
+            if self._pending is None:
+                self._first_at = now
+            self._pending = snapshot
+            if on_written:
+                self._callbacks.append(on_written)
+            self._last_at = now
+            self._cond.notify()
+
+    def flush(self, timeout: float = 10.0):
+        """예약된 저장을 즉시 수행하고 끝날 때까지 대기"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._first_at = self._last_at = -self.max_delay
+            self._cond.notify()
+            while (self._pending is not None or self._writing) and self._thread.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+    def stop(self):
+        self.flush()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending is not None:
+                        now = time.monotonic()
+                        due = min(self._last_at + self.delay, self._first_at + self.max_delay)
+                        if now >= due:
+                            break
+                        self._cond.wait(due - now)
+                    elif self._stopping:
+                        return
+                    else:
+                        self._cond.wait()
+                snapshot, self._pending = self._pending, None
+                callbacks, self._callbacks = self._callbacks, []
+                self._writing = True
+            try:
+                write_json_atomic(self.path, snapshot, self.generations)
+                if self.after_write:
+                    self.after_write()
+                for callback in callbacks:
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"[Storage] 저장 후 처리 실패: {e}")
+            except Exception as e:
+                print(f"[Storage] 저장 실패: {e}")
+                with self._cond:
+                    # 다음 요청이 없으면 재시도
+                    if self._pending is None:
+                        self._pending = snapshot
+                        self._first_at = self._last_at = time.monotonic()
+                    self._callbacks[:0] = callbacks
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+
+class JsonSnippetStore:
+    """snippets.json 저장소 (기본)
+
+    추가/수정/삭제는 snippets.journal에 JSON 한 줄씩 덧붙이고 (O(1) 디스크 I/O),
+    저널이 COMPACT_BYTES를 넘으면 전체 스냅샷을 백그라운드에서 원자적으로 저장한 뒤 비운다.
+    로드 시 스냅샷 → snippets.journal.old (압축 중이던 저널) → snippets.journal 순으로 재생.
+    """
+
+    GENERATIONS = 3
+    COMPACT_BYTES = 256 * 1024
+    has_search_index = False  # 검색 색인은 SnippetSearchIndex가 메모리에 만듦
 
     def __init__(self, snippets_file: str):
-        self.snippets = []
         self.snippets_file = snippets_file
-        self.load()
+        self.journal_file = os.path.join(os.path.dirname(snippets_file), "snippets.journal")
+        self.persister = JsonPersister(snippets_file, generations=self.GENERATIONS,
+                                          after_write=lambda: self._note_own_write(self.snippets_file))
+        self._journal = None
+        self._journal_size = 0
+        # 직접 쓴 파일의 서명 - 파일 감시에서 자기 쓰기를 외부 변경으로 오인하지 않게
+        self.own_signatures = {}
+
+    def watch_paths(self) -> list:
+        """외부 변경을 감시할 파일"""
+        return [self.snippets_file, self.journal_file]
+
+    def _note_own_write(self, path: str):
+        self.own_signatures[path] = file_signature(path)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snippets_file)
+
+    def _read(self, path: str) -> list:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and "snippets" in data:
+            return [_normalize_snippet(s) for s in data["snippets"]]
+        if not isinstance(data, list):
+            raise ValueError("snippets.json 형식 오류")
+        return data
+
+    def load(self) -> list:
+        """스니펫 목록 로드 (스냅샷 + 저널 재생, 둘 다 없으면 None)"""
+        snapshot = self._load_snapshot()
+        entries = self.history()
+        for path in self.watch_paths():
+            self._note_own_write(path)
+        if snapshot is None and not entries:
+            return None
+        if not entries:
+            return snapshot
+        snippets = self._replay(snapshot, entries)
+        if self._journal_size_on_disk() > self.COMPACT_BYTES:
+            self.compact(snippets)
+        return snippets
+
+    def read_external(self) -> list:
+        """다른 곳에서 바뀐 파일 다시 읽기 (복구/압축 등 파일을 건드리는 동작 없음)
+
+        스냅샷이 동기화 도중이라 읽을 수 없으면 예외 → 호출 측에서 나중에 재시도.
+        """
+        snapshot = self._read(self.snippets_file) if self.exists() else None
+        return self._replay(snapshot, self.history())
 
-    def load(self):
-        if os.path.exists(self.snippets_file):
+    @staticmethod
+    def _replay(snapshot, entries) -> list:
+        by_id = {s["id"]: s for s in (snapshot or [])}
+        for entry in entries:
+            if entry.get("op") == "put" and isinstance(entry.get("snippet"), dict):
+                snippet = _normalize_snippet(entry["snippet"])
+                by_id[snippet["id"]] = snippet
+            elif entry.get("op") == "put_many" and isinstance(entry.get("snippets"), list):
+                for snippet in entry["snippets"]:
+                    if isinstance(snippet, dict):
+                        snippet = _normalize_snippet(snippet)
+                        by_id[snippet["id"]] = snippet
+            elif entry.get("op") == "delete":
+                by_id.pop(entry.get("id"), None)
+        return list(by_id.values())
+
+    def _journal_size_on_disk(self) -> int:
+        try:
+            return os.path.getsize(self.journal_file)
+        except OSError:
+            return 0
+
+    def _read_journal(self, path: str) -> list:
+        """저널 항목 목록 (마지막 줄이 쓰다 만 것이면 무시)"""
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    print(f"[Storage] 저널 손상 줄 무시: {os.path.basename(path)}")
+        return entries
+
+    def history(self) -> list:
+        """마지막 압축 이후의 변경 기록 (오래된 것부터)"""
+        return self._read_journal(f"{self.journal_file}.old") + self._read_journal(self.journal_file)
+
+    def _append(self, entry: dict, snippets):
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.journal_file), exist_ok=True)
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+            self._journal_size = self._journal.tell()
+            if self._journal_size and not self._ends_with_newline():
+                self._journal.write("\n")  # 쓰다 만 줄과 붙지 않게
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        self._journal.write(line)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_size += len(line.encode('utf-8'))
+        self._note_own_write(self.journal_file)
+        if self._journal_size > self.COMPACT_BYTES:
+            self.compact(snippets)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.journal_file, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def compact(self, snippets):
+        """저널을 .old로 돌리고 전체 스냅샷 저장 예약 (저장되면 .old 삭제)
+
+        이전 압축의 .old가 아직 남아 있으면 (저장 대기/실패) 이번 저널은 그대로 둔다.
+        """
+        old = f"{self.journal_file}.old"
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        rotated = False
+        if not os.path.exists(old) and os.path.exists(self.journal_file):
+            os.replace(self.journal_file, old)
+            rotated = True
+            self._note_own_write(self.journal_file)
+        self._journal_size = self._journal_size_on_disk()
+
+        def _remove_old():
+            if rotated:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        self.persister.schedule(list(snippets), on_written=_remove_old)
+
+    def _load_snapshot(self) -> list:
+        """snippets.json 로드 (파일이 없으면 None)
+
+        본 파일이 깨졌으면 보관 세대 (.1 → .N)에서 복구하고, 모두 실패하면 예외.
+        깨진 파일은 덮어쓰이지 않게 .corrupt-시각 으로 옮겨 둔다.
+        """
+        if not self.exists():
+            return None
+        try:
+            return self._read(self.snippets_file)
+        except Exception as e:
+            error = e
+        corrupt = f"{self.snippets_file}.corrupt-{int(time.time())}"
+        try:
+            shutil.copy2(self.snippets_file, corrupt)
+            print(f"[Storage] snippets.json 읽기 실패 ({error}) - {os.path.basename(corrupt)}로 보관")
+        except:
+            pass
+        for i in range(1, self.GENERATIONS + 1):
+            backup = f"{self.snippets_file}.{i}"
+            if not os.path.exists(backup):
+                continue
+            try:
+                snippets = self._read(backup)
+            except:
+                continue
+            print(f"[Storage] {os.path.basename(backup)}에서 복구: {len(snippets)}개")
+            write_json_atomic(self.snippets_file, snippets)
+            return snippets
+        raise error
+
+    def save_all(self, snippets):
+        self.compact(snippets)
+
+    def replace_all(self, snippets: list):
+        """전체 교체 (다른 저장소에서 넘겨받을 때) - 저널을 지우고 스냅샷을 바로 씀"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        for path in (f"{self.journal_file}.old", self.journal_file):
             try:
-                with open(self.snippets_file, 'r', encoding='utf-8') as f:
+                os.remove(path)
+            except OSError:
+                pass
+        self._journal_size = 0
+        write_json_atomic(self.snippets_file, snippets, self.GENERATIONS)
+        for path in self.watch_paths():
+            self._note_own_write(path)
+
+    def put_many(self, changed: list, snippets):
+        """여러 스니펫 반영 - 저널에 한 줄로 기록 (fsync, 크면 바로 압축)
+
+        스냅샷이 디스크에 쓰이기 전에 종료돼도 다음 로드 때 저널에서 재생된다.
+        """
+        self._append({"op": "put_many", "snippets": list(changed), "ts": time.time()}, snippets)
+
+    def iter_snippets(self, snippets):
+        return iter(list(snippets))
+
+    def resident(self, snippet: dict) -> dict:
+        """저장 후 메모리에 둘 형태 - JSON 저장소는 그대로"""
+        return snippet
+
+    def put(self, snippet: dict, snippets):
+        self._append({"op": "put", "snippet": snippet, "ts": time.time()}, snippets)
+
+    def remove(self, id: str, snippets):
+        self._append({"op": "delete", "id": id, "ts": time.time()}, snippets)
+
+    def filter_ids(self, text: str, snippets) -> list:
+        """색인 없이 찾기 (검색 색인을 만드는 동안) - 트리거/내용에 검색어가 들어간 id"""
+        text = text.strip().lower()
+        return [s["id"] for s in snippets if text in s["trigger"].lower() or text in s["content"].lower()]
+
+    def flush(self):
+        self.persister.flush()
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self.persister.stop()
+
+
+class LazySnippet(dict):
+    """내용(content)을 처음 읽을 때 저장소에서 가져오는 스니펫
+
+    트리거/메타데이터만 메모리에 두고, snippet["content"]는 저장소의 LRU 캐시를 거쳐
+    조회한다 (dict에 저장하지 않으므로 메모리에 계속 남지 않음).
+    """
+    __slots__ = ('_store',)
+
+    def __init__(self, store, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._store = store
+
+    def __missing__(self, key):
+        if key == "content":
+            return self._store.fetch_content(self["id"])
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+# 검색 색인 (SnippetSearchIndex) - 내용은 저장하지 않는 FTS5 표 두 개
+#   snippet_search: 3글자 이상 (trigram), snippet_grams: 1~2글자 (글자/두 글자 토큰)
+SEARCH_INDEX_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS snippet_search USING fts5(hay, tokenize='trigram', content='');
+    CREATE VIRTUAL TABLE IF NOT EXISTS snippet_grams USING fts5(
+        grams, tokenize='ascii', content='', detail=none);
+"""
+
+_GRAM_TOKENS = {}  # 1~2글자 -> 색인 토큰
+
+
+def search_haystack(trigger: str, content: str) -> str:
+    """검색 대상 문자열 - 트리거 두벌식 키 / 트리거 / 내용 (소문자)"""
+    return f"{convert_to_qwerty(trigger).lower()}\x1f{trigger.lower()}\x1f{content.lower()}"
+
+
+def _gram_token(gram: str) -> str:
+    """1~2글자를 ascii 토큰으로 ("k" → "6b", "kg" → "6bx67")"""
+    token = _GRAM_TOKENS.get(gram)
+    if token is None:
+        token = _GRAM_TOKENS[gram] = "x".join(format(ord(ch), 'x') for ch in gram)
+    return token
+
+
+def search_grams(hay: str) -> str:
+    """검색 대상의 모든 글자/두 글자 토큰 (trigram 색인이 찾지 못하는 1~2글자 검색어용)"""
+    grams = set(hay)
+    grams.update([a + b for a, b in zip(hay, hay[1:])])
+    return " ".join(map(_gram_token, grams))
+
+
+class SqliteSnippetStore:
+    """snippets.db 저장소 - 변경된 행만 기록 (WAL, id/trigger 인덱스)
+
+    처음 열 때 같은 폴더의 snippets.json이 있으면 한 번만 가져온다.
+    로드 시 내용은 읽지 않고 (LazySnippet), 필요할 때 CONTENT_CACHE_SIZE개 LRU로 가져온다.
+    """
+
+    CONTENT_CACHE_SIZE = 256
+    SEARCH_INDEX_VERSION = "1"
+    has_search_index = True  # snippets.db 안의 검색 색인 (트리거로 자동 갱신)
+
+    SEARCH_TRIGGERS = """
+        CREATE TRIGGER snippets_search_insert AFTER INSERT ON snippets BEGIN
+            INSERT INTO snippet_search(rowid, hay) VALUES (new.seq, snippet_hay(new.trigger, new.content));
+            INSERT INTO snippet_grams(rowid, grams) VALUES (new.seq, snippet_grams(new.trigger, new.content));
+        END;
+        CREATE TRIGGER snippets_search_delete AFTER DELETE ON snippets BEGIN
+            INSERT INTO snippet_search(snippet_search, rowid, hay)
+                VALUES ('delete', old.seq, snippet_hay(old.trigger, old.content));
+            INSERT INTO snippet_grams(snippet_grams, rowid, grams)
+                VALUES ('delete', old.seq, snippet_grams(old.trigger, old.content));
+        END;
+        CREATE TRIGGER snippets_search_update AFTER UPDATE OF trigger, content ON snippets BEGIN
+            INSERT INTO snippet_search(snippet_search, rowid, hay)
+                VALUES ('delete', old.seq, snippet_hay(old.trigger, old.content));
+            INSERT INTO snippet_grams(snippet_grams, rowid, grams)
+                VALUES ('delete', old.seq, snippet_grams(old.trigger, old.content));
+            INSERT INTO snippet_search(rowid, hay) VALUES (new.seq, snippet_hay(new.trigger, new.content));
+            INSERT INTO snippet_grams(rowid, grams) VALUES (new.seq, snippet_grams(new.trigger, new.content));
+        END;
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snippets (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            trigger TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_snippets_trigger ON snippets(trigger);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, snippets_file: str):
+        self.snippets_file = snippets_file
+        self.db_file = os.path.join(os.path.dirname(snippets_file), "snippets.db")
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self._lock = threading.Lock()
+        self._content_cache = OrderedDict()  # id -> content
+        self.conn = self._connect()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._migrate_from_json()
+
+    def _connect(self):
+        """쓰기용 연결 - 검색 색인 트리거가 부르는 함수 등록 (색인을 만드는 동안 쓰기는 기다림)"""
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=60)
+        conn.create_function("snippet_hay", 2, search_haystack, deterministic=True)
+        conn.create_function("snippet_grams", 2, lambda trigger, content:
+                             search_grams(search_haystack(trigger, content)), deterministic=True)
+        return conn
+
+    def _get_meta(self, key: str):
+        """호출 측에서 _lock을 잡고 부름 (연결은 여러 스레드가 같이 씀)"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _migrate_from_json(self):
+        """snippets.json (+ 저널)을 가져옴 - 처음 열 때, 그리고 JSON 저장소로 돌아갔다가 다시 켤 때
+
+        JSON 쪽 파일은 읽기만 한다 (복구/압축으로 다시 쓰지 않음). 가져오면 DB 내용을 교체.
+        """
+        with self._lock:
+            if self._get_meta("json_migrated"):
+                return
+        snippets = None
+        json_store = JsonSnippetStore(self.snippets_file)
+        try:
+            if json_store.exists() or json_store.history():
+                snippets = json_store.read_external()
+        except:
+            print("[Storage] snippets.json 읽기 실패 - 가져오기 생략")
+        finally:
+            json_store.close()
+        with self._lock, self.conn:
+            if snippets is not None:
+                self._content_cache.clear()
+                self.conn.execute("DELETE FROM snippets")
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO snippets (id, trigger, content, created_at) VALUES (?, ?, ?, ?)",
+                    [(s["id"], s["trigger"], s["content"], s.get("createdAt", time.time()))
+                     for s in map(_normalize_snippet, snippets)])
+                print(f"[Storage] snippets.json → snippets.db: {len(snippets)}개 가져옴")
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('initialized', '1')")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                              (str(time.time()),))
+
+    @staticmethod
+    def release_to_json(snippets_file: str):
+        """SQLite 저장소를 끄고 JSON으로 열 때 - 사용 중이던 snippets.db 내용을 snippets.json으로 옮김
+
+        옮긴 뒤 json_migrated를 지우므로, 다시 켜면 그동안의 JSON 변경을 가져온다.
+        """
+        db_file = os.path.join(os.path.dirname(snippets_file), "snippets.db")
+        if not os.path.exists(db_file):
+            return
+        conn = sqlite3.connect(db_file, timeout=60)
+        try:
+            if conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone() is None:
+                return
+            snippets = [{"id": r[0], "trigger": r[1], "content": r[2], "createdAt": r[3]} for r in conn.execute(
+                "SELECT id, trigger, content, created_at FROM snippets ORDER BY seq")]
+            json_store = JsonSnippetStore(snippets_file)
+            try:
+                json_store.replace_all(snippets)
+            finally:
+                json_store.close()
+            with conn:
+                conn.execute("DELETE FROM meta WHERE key = 'json_migrated'")
+            print(f"[Storage] snippets.db → snippets.json: {len(snippets)}개 (SQLite 저장소 해제)")
+        except Exception as e:
+            print(f"[Storage] snippets.db 내용 옮기기 실패: {e}")
+        finally:
+            conn.close()
+
+    def exists(self) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'initialized'").fetchone()
+            return row is not None or self.conn.execute("SELECT 1 FROM snippets LIMIT 1").fetchone() is not None
+
+    def load(self) -> list:
+        if not self.exists():
+            return None
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, trigger, created_at FROM snippets ORDER BY seq").fetchall()
+        return [LazySnippet(self, id=r[0], trigger=r[1], createdAt=r[2]) for r in rows]
+
+    def watch_paths(self) -> list:
+        """SQLite 파일은 공유 드라이브 동기화 대상이 아님 (WAL은 여러 기기 동시 사용 불가)"""
+        return []
+
+    def fetch_content(self, id: str) -> str:
+        """스니펫 내용 조회 (LRU 캐시)"""
+        with self._lock:
+            content = self._content_cache.get(id)
+            if content is not None:
+                self._content_cache.move_to_end(id)
+                return content
+            row = self.conn.execute("SELECT content FROM snippets WHERE id = ?", (id,)).fetchone()
+            content = row[0] if row else ""
+            self._content_cache[id] = content
+            if len(self._content_cache) > self.CONTENT_CACHE_SIZE:
+                self._content_cache.popitem(last=False)
+            return content
+
+    def save_all(self, snippets):
+        # 내용을 먼저 모두 읽어 둔 뒤 (LazySnippet은 조회 시 잠금 사용) 한 트랜잭션으로 교체
+        rows = [(s["id"], s["trigger"], s["content"], s.get("createdAt", time.time())) for s in snippets]
+        with self._lock, self.conn:
+            self._content_cache.clear()
+            self.conn.execute("DELETE FROM snippets")
+            self.conn.executemany(
+                "INSERT INTO snippets (id, trigger, content, created_at) VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('initialized', '1')")
+
+    def put_many(self, changed: list, snippets):
+        """여러 스니펫을 한 트랜잭션으로 추가/수정"""
+        rows = [(s["id"], s["trigger"], s["content"], s.get("createdAt", time.time())) for s in changed]
+        with self._lock, self.conn:
+            for s in changed:
+                self._content_cache.pop(s["id"], None)
+            self.conn.executemany(
+                "INSERT INTO snippets (id, trigger, content, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET trigger = excluded.trigger, content = excluded.content",
+                rows)
+
+    def resident(self, snippet: dict) -> dict:
+        """저장 후 메모리에 둘 형태 - 내용 없는 LazySnippet (수정으로 들어간 내용도 지움)"""
+        if isinstance(snippet, LazySnippet):
+            dict.pop(snippet, "content", None)
+            return snippet
+        return LazySnippet(self, id=snippet["id"], trigger=snippet["trigger"],
+                           createdAt=snippet.get("createdAt", time.time()))
+
+    def iter_snippets(self, snippets):
+        """내보내기용 - 별도 읽기 연결로 행을 하나씩"""
+        conn = self.open_reader()
+        try:
+            cursor = conn.execute(
+                "SELECT id, trigger, content, created_at FROM snippets ORDER BY seq")
+            for r in cursor:
+                yield {"id": r[0], "trigger": r[1], "content": r[2], "createdAt": r[3]}
+        finally:
+            conn.close()
+
+    def put(self, snippet: dict, snippets):
+        with self._lock, self.conn:
+            self._content_cache.pop(snippet["id"], None)
+            self.conn.execute(
+                "INSERT INTO snippets (id, trigger, content, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET trigger = excluded.trigger, content = excluded.content",
+                (snippet["id"], snippet["trigger"], snippet["content"], snippet.get("createdAt", time.time())))
+
+    def remove(self, id: str, snippets):
+        with self._lock, self.conn:
+            self._content_cache.pop(id, None)
+            self.conn.execute("DELETE FROM snippets WHERE id = ?", (id,))
+
+    def ensure_search_index(self):
+        """검색 색인 (SEARCH_INDEX_SCHEMA + 트리거)이 없으면 만든다 - SnippetSearchIndex의 백그라운드 스레드
+
+        별도 연결의 한 트랜잭션에서 기존 행을 모두 넣고 트리거를 건다 (그동안 읽기는 계속됨).
+        """
+        with self._lock:
+            if self._get_meta("search_index") == self.SEARCH_INDEX_VERSION:
+                return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT value FROM meta WHERE key = 'search_index'").fetchone() != (
+                    self.SEARCH_INDEX_VERSION,):
+                start = time.time()
+                for name in ("snippets_search_insert", "snippets_search_delete", "snippets_search_update"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                conn.execute("DROP TABLE IF EXISTS snippet_search")
+                conn.execute("DROP TABLE IF EXISTS snippet_grams")
+                # executescript는 COMMIT을 먼저 하므로 한 문장씩 실행
+                for statement in SEARCH_INDEX_SCHEMA.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute("INSERT INTO snippet_search(rowid, hay) "
+                             "SELECT seq, snippet_hay(trigger, content) FROM snippets")
+                conn.execute("INSERT INTO snippet_grams(rowid, grams) "
+                             "SELECT seq, snippet_grams(trigger, content) FROM snippets")
+                for statement in self.SEARCH_TRIGGERS.split("END;"):
+                    if statement.strip():
+                        conn.execute(statement + "END;")
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('search_index', ?)",
+                             (self.SEARCH_INDEX_VERSION,))
+                print(f"[Storage] 검색 색인 생성: {time.time() - start:.1f}s")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def open_reader(self):
+        """별도 읽기 연결 (백그라운드 작업용 - 치환 중 내용 조회를 막지 않음)"""
+        return sqlite3.connect(self.db_file)
+
+    def _read(self, conn, sql: str, params=()) -> list:
+        """conn (open_reader 연결)이 없으면 기본 연결을 잠그고 읽음"""
+        if conn is not None:
+            return conn.execute(sql, params).fetchall()
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def search_match(self, table: str, expr: str, conn=None) -> list:
+        """검색 색인 (snippet_search/snippet_grams)에서 찾은 스니펫 seq (오름차순)"""
+        found = self._read(conn, f"SELECT group_concat(rowid) FROM {table} WHERE {table} MATCH ?", (expr,))[0][0]
+        return list(map(int, found.split(","))) if found else []
+
+    def fetch_contents(self, ids: list, conn=None) -> dict:
+        """여러 스니펫 내용을 한 번에 {id: 내용} (검색 좁히기용 - 내용 LRU 캐시는 건드리지 않음)"""
+        found = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            sql = f"SELECT id, content FROM snippets WHERE id IN ({','.join('?' * len(chunk))})"
+            found.update(self._read(conn, sql, chunk))
+        return found
+
+    def seq_ids(self, seqs=None, conn=None) -> list:
+        """(seq, id) 목록 - seqs가 None이면 전체 (seq는 AUTOINCREMENT라 다시 쓰이지 않음)"""
+        if seqs is None:
+            return self._read(conn, "SELECT seq, id FROM snippets")
+        return self._read(conn, f"SELECT seq, id FROM snippets WHERE seq IN ({','.join(map(str, seqs))})")
+
+    def filter_ids(self, text: str, snippets) -> list:
+        """색인 없이 찾기 (검색 색인을 만드는 동안) - 내용은 메모리로 읽지 않고 SQL로 비교"""
+        text = text.strip().lower()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id FROM snippets WHERE instr(lower(trigger), ?) > 0 OR instr(lower(content), ?) > 0 "
+                "ORDER BY seq", (text, text)).fetchall()
+        return [r[0] for r in rows]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            try:
+                self.conn.close()
+            except:
+                pass
+
+
+SNIPPET_STORES = {
+    'json': JsonSnippetStore,
+    'sqlite': SqliteSnippetStore,
+}
+
+
+class SnippetUsage:
+    """스니펫별 치환 횟수 (저장 폴더의 usage.json)
+
+    엔진 스레드에서 record()로 올리고, 파일 쓰기는 JsonPersister로 모아서 한다.
+    형식: {"counts": {id: 횟수}, "lastUsed": {id: 시각}}
+    """
+
+    def __init__(self, folder: str):
+        self.path = os.path.join(folder, "usage.json")
+        self.counts = {}
+        self.last_used = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    if isinstance(data, dict) and "snippets" in data:
-                        self.snippets = []
-                        for s in data["snippets"]:
-                            self.snippets.append({
-                                "id": s.get("id", str(uuid.uuid4())),
-                                "trigger": s.get("trigger", "").replace(" ", ""),
-                                "content": s.get("content", ""),
-                                "createdAt": s.get("createdAt", time.time())
-                            })
-                    else:
-                        self.snippets = data
+                self.counts = {k: int(v) for k, v in data.get("counts", {}).items()}
+                self.last_used = dict(data.get("lastUsed", {}))
             except:
-                self.snippets = self._get_defaults()
+                pass
+        self._persister = JsonPersister(self.path, generations=0, delay=2.0, max_delay=30.0)
+
+    def _schedule(self):
+        self._persister.schedule({"counts": dict(self.counts), "lastUsed": dict(self.last_used)})
+
+    def record(self, id: str) -> int:
+        """치환 1회 기록, 누적 횟수 반환"""
+        with self._lock:
+            count = self.counts[id] = self.counts.get(id, 0) + 1
+            self.last_used[id] = time.time()
+            self._schedule()
+        return count
+
+    def get(self, id: str) -> int:
+        return self.counts.get(id, 0)
+
+    def forget(self, id: str):
+        with self._lock:
+            if self.counts.pop(id, None) is not None:
+                self.last_used.pop(id, None)
+                self._schedule()
+
+    def flush(self):
+        self._persister.flush()
+
+    def close(self):
+        self._persister.stop()
+
+
+class SnippetSearchIndex:
+    """스니펫 목록 검색 색인
+
+    검색 대상은 스니펫마다 "트리거 두벌식 키 / 트리거 / 내용" 소문자 문자열이고
+    ("감" → "rka"처럼 한글 검색어는 두벌식 키 형태로도 찾음),
+    3글자 이상은 FTS5 trigram 색인, 1~2글자는 글자 토큰 색인에서 찾는다.
+    색인에는 내용을 저장하지 않는다 - 저장소가 색인을 가지고 있으면 (snippets.db) 그것을 쓰고,
+    아니면 메모리 DB에 만든다. 일치가 많은 1~2글자 결과는 slot 비트맵으로 기억해 둔다.
+    검색어를 이어서 입력하면 (이전 검색어를 포함) 이전 결과가 NARROW_LIMIT 이하일 때 그 안에서만 비교한다.
+    색인은 백그라운드 스레드에서 만들고, 준비되기 전 (ready가 False)에는 SnippetManager가 단순 비교로 찾는다.
+    search()는 목록 순서 (slot 순서), rank()는 점수 순서로 돌려준다.
+    """
+    FUZZY_LIMIT = 200  # 일치 결과가 이보다 적을 때만 트리거 퍼지 검색 추가
+    NARROW_LIMIT = 100  # 이전 결과가 이 이하면 색인 대신 이전 결과만 확인 (처음 좁힐 때 내용을 읽으므로 작게)
+    DENSE_RATIO = 8    # 전체의 1/8 이상 일치한 1~2글자 검색어는 결과를 비트맵으로 기억
+    DENSE_LIMIT = 32   # 기억하는 1~2글자 검색어 수
+    _BIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+
+    def __init__(self, rows, usage=None, store=None, contents=None):
+        """rows: 목록 순서대로 (id, trigger, content), usage: SnippetUsage (순위 가산점)
+
+        store가 색인을 가진 저장소면 (has_search_index) content는 쓰지 않는다 (None이어도 됨).
+        contents: id 목록 -> {id: 내용} (이전 결과 안에서 좁힐 때 사용, 없으면 매번 색인 조회)
+        """
+        self._store = store if getattr(store, "has_search_index", False) else None
+        self._contents = contents
+        self._ids = []    # slot -> id (삭제되면 None)
+        self._heads = []  # slot -> (트리거 두벌식 키, 트리거) 소문자
+        self._boost = []  # slot -> 사용 횟수 가산점
+        self._slot = {}   # id -> slot
+        self._seqs = {}   # 저장소 색인 rowid (seq) -> slot
+        self._boosted = set()  # 가산점이 있는 slot
+        self._fuzzy_text = None  # 퍼지 검색용 트리거 키 묶음 (트리거가 바뀌면 다시 만듦)
+        self._last = None  # (검색어, 두벌식 키, 결과 slot 목록, 좁힐 때 읽은 slot -> 검색 대상 문자열)
+        self._dense = OrderedDict()  # 1~2글자 -> 일치 slot 비트맵 (bytearray)
+        self._db = None  # 메모리 색인 (저장소 색인을 쓰면 None)
+        self._lock = threading.Lock()
+        self._pending = []  # 색인을 만드는 동안 들어온 변경
+        self.ready = False
+        threading.Thread(target=self._build, args=(list(rows), usage),
+                         name="SearchIndexBuild", daemon=True).start()
+
+    @staticmethod
+    def usage_boost(count: int) -> float:
+        """사용 횟수 가산점 - 로그 증가, 최대 15점 (일치 종류 구간을 넘지 않게)"""
+        return min(15.0, 5.0 * math.log2(1 + count)) if count else 0.0
+
+    @staticmethod
+    def _head(trigger: str) -> tuple:
+        return convert_to_qwerty(trigger).lower(), trigger.lower()
+
+    def _build(self, rows, usage):
+        """백그라운드 스레드 - 트리거 목록과 (필요하면) 메모리 FTS 색인을 만든 뒤 밀린 변경 반영"""
+        try:
+            db = None
+            seqs = {}  # 저장소 색인의 rowid (seq) -> slot
+            if self._store is not None:
+                self._store.ensure_search_index()
+            else:
+                db = sqlite3.connect(':memory:', check_same_thread=False)
+                db.executescript(SEARCH_INDEX_SCHEMA)
+                with db:
+                    for slot, (id, trigger, content) in enumerate(rows):
+                        hay = search_haystack(trigger, content)
+                        db.execute("INSERT INTO snippet_search(rowid, hay) VALUES (?, ?)", (slot, hay))
+                        db.execute("INSERT INTO snippet_grams(rowid, grams) VALUES (?, ?)",
+                                   (slot, search_grams(hay)))
+            ids, heads, boost, slots = [], [], [], {}
+            for id, trigger, content in rows:
+                slots[id] = len(ids)
+                ids.append(id)
+                heads.append(self._head(trigger))
+                boost.append(self.usage_boost(usage.get(id)) if usage else 0.0)
+            dense = self._dense_letters(db, slots, seqs, len(ids))
+        except Exception as e:
+            print(f"[Search] 색인 생성 실패, 단순 비교로 검색: {e}")
+            return
+        with self._lock:
+            self._db, self._ids, self._heads, self._boost, self._slot = db, ids, heads, boost, slots
+            self._seqs = seqs
+            self._boosted = {slot for slot, value in enumerate(boost) if value}
+            self._dense = dense
+            for op, args in self._pending:
+                op(*args)
+            self._pending = []
+            self.ready = True
+
+    def _dense_letters(self, db, slots: dict, seqs: dict, count: int) -> OrderedDict:
+        """자주 나오는 글자 (전체의 1/DENSE_RATIO 이상)의 1글자 검색 결과를 미리 비트맵으로
+
+        저장소 색인이면 seqs (seq -> slot)도 여기서 채운다.
+        """
+        conn = db if db is not None else self._store.open_reader()
+        try:
+            if db is None:
+                seqs.update((seq, slots[id]) for seq, id in self._store.seq_ids(conn=conn) if id in slots)
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.snippet_grams_vocab "
+                         "USING fts5vocab(main, snippet_grams, row)")
+            terms = sorted((doc, term) for term, doc in conn.execute(
+                "SELECT term, doc FROM temp.snippet_grams_vocab WHERE doc * ? >= ?", (self.DENSE_RATIO, count))
+                if "x" not in term)
+            dense = OrderedDict()
+            for doc, term in terms[-self.DENSE_LIMIT:]:
+                dense[chr(int(term, 16))] = self._bits(self._fetch(conn, "snippet_grams", f'"{term}"', seqs),
+                                                       count)
+            return dense
+        finally:
+            if db is None:
+                conn.close()
+
+    def _defer(self, op, *args) -> bool:
+        """색인이 아직 준비 중이면 변경을 모아 둠"""
+        with self._lock:
+            if not self.ready:
+                self._pending.append((op, args))
+                return True
+        return False
+
+    def _fts_delete(self, slot: int, hay: str):
+        self._db.execute("INSERT INTO snippet_search(snippet_search, rowid, hay) VALUES ('delete', ?, ?)",
+                         (slot, hay))
+        self._db.execute("INSERT INTO snippet_grams(snippet_grams, rowid, grams) VALUES ('delete', ?, ?)",
+                         (slot, search_grams(hay)))
+
+    def put(self, snippet, old=None):
+        """추가/수정 - 기존 스니펫은 같은 slot을 다시 써서 순서 유지
+
+        old: 수정 전 (trigger, content) - 메모리 색인에서 이전 토큰을 지울 때 필요.
+        """
+        args = (snippet["id"], snippet["trigger"], snippet["content"], old)
+        if not self._defer(self._put, *args):
+            self._put(*args)
+
+    def _put(self, id, trigger, content, old):
+        slot = self._slot.get(id)
+        if slot is None:
+            slot = self._slot[id] = len(self._ids)
+            self._ids.append(id)
+            self._heads.append(None)
+            self._boost.append(0.0)
+        elif self._db is not None and old is not None:
+            self._fts_delete(slot, search_haystack(*old))
+        head = self._head(trigger)
+        if head != self._heads[slot]:
+            self._heads[slot] = head
+            self._fuzzy_text = None
+        if self._db is not None or self._dense:
+            hay = search_haystack(trigger, content)
+            if self._db is not None:
+                self._db.execute("INSERT INTO snippet_search(rowid, hay) VALUES (?, ?)", (slot, hay))
+                self._db.execute("INSERT INTO snippet_grams(rowid, grams) VALUES (?, ?)",
+                                 (slot, search_grams(hay)))
+            for gram, bits in self._dense.items():
+                self._set_bit(bits, slot, gram in hay)
+        self._last = None
+
+    def remove(self, snippet):
+        """삭제 - 저장소 색인은 트리거가 지우므로 내용을 읽지 않음"""
+        if self._store is None:
+            args = (snippet["id"], snippet["trigger"], snippet["content"])
         else:
+            args = (snippet["id"], None, None)
+        if not self._defer(self._remove, *args):
+            self._remove(*args)
+
+    def _remove(self, id, trigger, content):
+        slot = self._slot.pop(id, None)
+        if slot is None:
+            return
+        if self._db is not None:
+            self._fts_delete(slot, search_haystack(trigger, content))
+        self._ids[slot] = None
+        self._heads[slot] = None
+        self._boost[slot] = 0.0
+        self._boosted.discard(slot)
+        for bits in self._dense.values():
+            self._set_bit(bits, slot, False)
+        self._fuzzy_text = None
+        self._last = None
+
+    def set_usage(self, id: str, count: int):
+        """사용 횟수 변경 반영 (엔진 스레드에서 호출 - rank()가 읽는 가산점은 _lock 안에서 바꿈)"""
+        if not self._defer(self._set_usage, id, count):
+            with self._lock:
+                self._set_usage(id, count)
+
+    def _set_usage(self, id, count):
+        slot = self._slot.get(id)
+        if slot is not None:
+            self._boost[slot] = self.usage_boost(count)
+            if self._boost[slot]:
+                self._boosted.add(slot)
+            else:
+                self._boosted.discard(slot)
+
+    @staticmethod
+    def _set_bit(bits: bytearray, slot: int, on: bool):
+        if slot >> 3 >= len(bits):
+            bits.extend(bytes((slot >> 3) + 1 - len(bits)))
+        if on:
+            bits[slot >> 3] |= 1 << (slot & 7)
+        else:
+            bits[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+
+    @staticmethod
+    def _bits(slots: list, count: int) -> bytearray:
+        bits = bytearray((count >> 3) + 1)
+        for slot in slots:
+            bits[slot >> 3] |= 1 << (slot & 7)
+        return bits
+
+    def _bits_slots(self, value: int) -> list:
+        flags = format(value, 'b')[::-1].encode().translate(self._BIT_FLAGS)
+        return list(itertools.compress(range(len(flags)), flags))
+
+    def _fetch(self, conn, table: str, expr: str, seqs: dict) -> list:
+        """FTS 색인 조회 → slot 목록 (slot 순서) - 메모리 색인은 rowid가 slot, 저장소 색인은 seq로 찾음"""
+        if self._store is not None:
+            found = self._store.search_match(table, expr, conn)
+            missing = [seq for seq in found if seq not in seqs]
+            if missing and self.ready:
+                # 색인을 만든 뒤 추가된 스니펫 - id로 slot을 찾아 기억
+                for seq, id in self._store.seq_ids(missing, conn):
+                    if id in self._slot:
+                        seqs[seq] = self._slot[id]
+            return sorted(seqs[seq] for seq in found if seq in seqs)
+        found = conn.execute(f"SELECT group_concat(rowid) FROM {table} WHERE {table} MATCH ?",
+                             (expr,)).fetchone()[0]
+        return list(map(int, found.split(","))) if found else []
+
+    def _query(self, table: str, expr: str) -> list:
+        return self._fetch(self._db, table, expr, self._seqs)
+
+    def _match(self, term: str) -> list:
+        if len(term) >= 3:
+            return self._query("snippet_search", '"' + term.replace('"', '""') + '"')
+        bits = self._dense.get(term)
+        if bits is not None:
+            self._dense.move_to_end(term)
+            return self._bits_slots(int.from_bytes(bits, 'little'))
+        slots = self._query("snippet_grams", '"' + _gram_token(term) + '"')
+        if len(slots) * self.DENSE_RATIO >= len(self._ids):
+            self._dense[term] = self._bits(slots, len(self._ids))
+            if len(self._dense) > self.DENSE_LIMIT:
+                self._dense.popitem(last=False)
+        return slots
+
+    def _narrow(self, slots: list, hays: dict, query: str, key: str) -> tuple:
+        """이전 결과 안에서만 비교 → (결과 slot 목록, 검색 대상 문자열)
+
+        내용은 처음 좁힐 때 한 번만 읽고, 다음 입력부터는 남은 결과의 문자열만 다시 확인한다.
+        """
+        need = [slot for slot in slots if slot not in hays]
+        if need:
+            heads, ids = self._heads, self._ids
+            contents = self._contents([ids[slot] for slot in need])
+            hays = dict(hays)
+            for slot in need:
+                # search_haystack과 같은 형태 (heads는 이미 소문자)
+                hays[slot] = f"{heads[slot][0]}\x1f{heads[slot][1]}\x1f{contents.get(ids[slot], '').lower()}"
+        found = [slot for slot in slots if query in hays[slot] or key in hays[slot]]
+        return found, {slot: hays[slot] for slot in found}
+
+    def _find(self, query: str, key: str) -> list:
+        last = self._last
+        if last and last[0] == query and last[1] == key:
+            return last[2]
+        hays = {}
+        if last and last[0] in query and last[1] in key and (
+                not last[2] or self._contents is not None and len(last[2]) <= self.NARROW_LIMIT):
+            # 이전 검색어를 포함하는 검색어의 결과는 이전 결과의 부분집합
+            slots, hays = self._narrow(last[2], last[3], query, key)
+        else:
+            slots = self._match(query)
+            if key != query:
+                bits = self._dense.get(key)
+                if bits is not None and len(query) < 3:
+                    # 두벌식 키 쪽이 비트맵이면 (예: "ㄱ" → "r") 비트 OR로 합침
+                    self._dense.move_to_end(key)
+                    slots = self._bits_slots(int.from_bytes(self._bits(slots, len(self._ids)), 'little')
+                                             | int.from_bytes(bits, 'little'))
+                else:
+                    slots = sorted(set(slots).union(self._match(key)))
+        self._last = (query, key, slots, hays)
+        return slots
+
+    @staticmethod
+    def _keys(text: str):
+        return text.strip().lower(), convert_to_qwerty(text.strip()).lower()
+
+    def search(self, text: str) -> list:
+        """검색어를 포함하는 스니펫 id 목록 (목록 순서)"""
+        query, key = self._keys(text)
+        if not query:
+            return [id for id in self._ids if id is not None]
+        return [self._ids[slot] for slot in self._find(query, key)]
+
+    def _fuzzy(self, key: str) -> dict:
+        """트리거 키에 검색어 글자가 순서대로 들어 있는 slot -> 점수 (글자가 붙어 있을수록 높음)"""
+        if self._fuzzy_text is None:
+            # 한 줄에 트리거 키 하나 - 정규식 한 번으로 전체를 훑음
+            starts, parts, pos = [], [], 0
+            for slot, head in enumerate(self._heads):
+                if head is not None:
+                    starts.append((pos, slot))
+                    parts.append(head[0])
+                    pos += len(head[0]) + 1
+            self._fuzzy_text = ("\n".join(parts), [p for p, _ in starts], [s for _, s in starts])
+        text, offsets, slots = self._fuzzy_text
+        pattern = re.compile("[^\n]*?".join(re.escape(ch) for ch in key))
+        found = {}
+        for m in pattern.finditer(text):
+            slot = slots[bisect.bisect_right(offsets, m.start()) - 1]
+            if slot not in found:
+                found[slot] = 10.0 * len(key) / (m.end() - m.start())
+        return found
+
+    def rank(self, text: str) -> list:
+        """점수순 스니펫 id 목록
+
+        트리거 일치 100 > 트리거 접두 60 > 트리거 포함 40 > 내용 포함 20 > 트리거 퍼지 (최대 10),
+        여기에 사용 횟수 가산점 (최대 15)을 더한다. 같은 점수는 목록 순서.
+        """
+        query, key = self._keys(text)
+        if not query:
+            return self.search(text)
+        found = self._find(query, key)
+        if len(found) < self.FUZZY_LIMIT:
+            scores = {slot: self._score(query, key, slot) for slot in found}
+            if len(key) >= 2:
+                for slot, score in self._fuzzy(key).items():
+                    if slot not in scores:
+                        scores[slot] = score + self._boost[slot]
+            return [self._ids[slot] for slot in sorted(scores, key=lambda slot: (-scores[slot], slot))]
+        # 결과가 많으면 대부분 내용 일치 (20점) - 트리거에 검색어가 있거나 가산점이 있는 것만 점수를 매기고
+        # 나머지는 목록 순서 그대로 뒤에 붙인다
+        heads = self._heads
+        special = [slot for slot in found if query in heads[slot][1] or key in heads[slot][0]]
+        with self._lock:
+            boosted = tuple(self._boosted)  # 엔진 스레드가 set_usage로 바꿀 수 있음
+        special += [slot for slot in boosted if self._contains(found, slot)]
+        scores = {slot: self._score(query, key, slot) for slot in special}
+        top = sorted(scores, key=lambda slot: (-scores[slot], slot))
+        return [self._ids[slot] for slot in top] + [self._ids[slot] for slot in found if slot not in scores]
+
+    @staticmethod
+    def _contains(slots: list, slot: int) -> bool:
+        """정렬된 slot 목록에 있는지"""
+        i = bisect.bisect_left(slots, slot)
+        return i < len(slots) and slots[i] == slot
+
+    def _score(self, query: str, key: str, slot: int) -> float:
+        """일치 종류 점수 + 사용 횟수 가산점"""
+        trigger_key, trigger = self._heads[slot]
+        if trigger == query or trigger_key == key:
+            score = 100.0
+        elif trigger.startswith(query) or trigger_key.startswith(key):
+            score = 60.0
+        elif query in trigger or key in trigger_key:
+            score = 40.0
+        else:
+            score = 20.0
+        return score + self._boost[slot]
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        """색인 생성 완료 대기 (벤치마크용)"""
+        deadline = time.time() + timeout
+        while not self.ready and time.time() < deadline:
+            time.sleep(0.01)
+        return self.ready
+
+
+class SnippetManager:
+    """스니펫 데이터 관리 (저장 방식은 SNIPPET_STORES 중 선택)
+
+    트리거 색인 (원문/qwerty 변환형 -> 스니펫 id)을 편집마다 증분 갱신하고,
+    바뀐 트리거만 subscribe()로 등록된 함수에 {트리거: 스니펫 또는 None}으로 알린다.
+    같은 트리거가 여러 개면 목록에서 뒤에 있는 스니펫이 유효하다.
+    """
+
+    def __init__(self, snippets_file: str, backend: str = 'json'):
+        self._by_id = {}  # id -> 스니펫 (삽입 순서 유지)
+        self._order = {}  # id -> 목록 내 순서
+        self._order_counter = itertools.count()
+        self._forms = {}  # id -> 색인된 트리거 형태들
+        self._trigger_index = {}  # 트리거 형태 -> {id: 순서}
+        self._len_counts = Counter()  # 트리거 길이 -> 개수 (max_trigger_len용)
+        self._listeners = []
+        self._reset_listeners = []
+        self._search = None  # SnippetSearchIndex (처음 검색할 때 생성)
+        self.snippets_file = snippets_file
+        if backend != 'sqlite':
+            SqliteSnippetStore.release_to_json(snippets_file)
+        self.store = SNIPPET_STORES.get(backend, JsonSnippetStore)(snippets_file)
+        self.usage = SnippetUsage(os.path.dirname(os.path.abspath(snippets_file)))
+        self.load()
+
+    @property
+    def snippets(self) -> list:
+        return list(self._by_id.values())
+
+    @snippets.setter
+    def snippets(self, value: list):
+        self._by_id = {s["id"]: s for s in value}
+        self._rebuild_index()
+
+    def subscribe(self, callback, reset=None):
+        """트리거 변경 알림 등록 - callback({트리거 형태: 유효 스니펫 또는 None})
+
+        reset은 대량 변경 후 한 번 호출된다 (전체 다시 읽기).
+        """
+        self._listeners.append(callback)
+        if reset:
+            self._reset_listeners.append(reset)
+
+    def _emit_reset(self):
+        for callback in self._reset_listeners:
+            callback()
+
+    def _emit(self, forms):
+        if not forms or not self._listeners:
+            return
+        changes = {form: self._effective(form) for form in forms}
+        for callback in self._listeners:
+            callback(changes)
+
+    @staticmethod
+    def _trigger_forms(trigger: str) -> tuple:
+        qwerty_trigger = convert_to_qwerty(trigger)
+        if qwerty_trigger != trigger:
+            return (qwerty_trigger, trigger)
+        return (qwerty_trigger,)
+
+    def _rebuild_index(self):
+        self._search = None
+        self._order = {}
+        self._order_counter = itertools.count()
+        self._forms = {}
+        self._trigger_index = {}
+        self._len_counts = Counter()
+        for snippet in self._by_id.values():
+            self._order[snippet["id"]] = next(self._order_counter)
+            self._index_add(snippet)
+
+    def _index_add(self, snippet) -> tuple:
+        id = snippet["id"]
+        forms = self._trigger_forms(snippet["trigger"])
+        self._forms[id] = forms
+        order = self._order[id]
+        for form in forms:
+            ids = self._trigger_index.get(form)
+            if ids is None:
+                ids = self._trigger_index[form] = {}
+                self._len_counts[len(form)] += 1
+            ids[id] = order
+        return forms
+
+    def _search_put(self, snippet, old=None):
+        """검색 색인 갱신 - old: 수정 전 (trigger, content)"""
+        if self._search is not None:
+            self._search.put(snippet, old)
+
+    def _search_remove(self, snippet):
+        if self._search is not None:
+            self._search.remove(snippet)
+
+    def _index_remove(self, id: str) -> tuple:
+        forms = self._forms.pop(id, ())
+        for form in forms:
+            ids = self._trigger_index.get(form)
+            if ids is None:
+                continue
+            ids.pop(id, None)
+            if not ids:
+                del self._trigger_index[form]
+                self._len_counts[len(form)] -= 1
+                if not self._len_counts[len(form)]:
+                    del self._len_counts[len(form)]
+        return forms
+
+    def _effective(self, form: str):
+        ids = self._trigger_index.get(form)
+        if not ids:
+            return None
+        return self._by_id[max(ids, key=ids.get)]
+
+    @property
+    def max_trigger_len(self) -> int:
+        return max(self._len_counts, default=0)
+
+    def load(self):
+        INPUT_CACHE.clear()
+        try:
+            loaded = self.store.load()
+        except:
+            self.snippets = self._get_defaults()
+            return
+        if loaded is None:
             self.snippets = self._get_defaults()
             self.save()
+        else:
+            self.snippets = loaded
 
     def _get_defaults(self):
         return [
@@ -711,9 +2310,161 @@ class SnippetManager:
         ]
 
     def save(self):
-        os.makedirs(os.path.dirname(self.snippets_file), exist_ok=True)
-        with open(self.snippets_file, 'w', encoding='utf-8') as f:
-            json.dump(self.snippets, f, ensure_ascii=False, indent=2)
+        self.store.save_all(self._by_id.values())
+        for id, snippet in list(self._by_id.items()):
+            self._by_id[id] = self.store.resident(snippet)
+
+    def flush(self):
+        """예약된 저장을 즉시 디스크에 반영"""
+        self.store.flush()
+        self.usage.flush()
+
+    def close(self):
+        self.store.close()
+        self.usage.close()
+
+    def get(self, id: str):
+        return self._by_id.get(id)
+
+    def get_content(self, id: str):
+        """스니펫 내용 (없으면 None) - 지연 로드 저장소면 여기서 가져옴"""
+        snippet = self._by_id.get(id)
+        return snippet["content"] if snippet is not None else None
+
+    def search(self, text: str, ranked: bool = False) -> list:
+        """목록 검색 - 트리거/내용에 검색어가 들어간 스니펫 id
+
+        ranked면 트리거 일치/접두/퍼지와 사용 횟수로 정렬, 아니면 목록 순서.
+        """
+        if self._search is None:
+            # 색인은 백그라운드에서 만듦 - 저장소 색인을 쓰면 내용은 읽지 않음 (지연 로드 유지)
+            lazy = self.store.has_search_index
+            self._search = SnippetSearchIndex(
+                [(s["id"], s["trigger"], None if lazy else s["content"]) for s in self._by_id.values()],
+                self.usage, self.store,
+                self.store.fetch_contents if lazy else (lambda ids: {id: self._by_id[id]["content"] for id in ids}))
+        if not self._search.ready:
+            return self.store.filter_ids(text, self._by_id.values())
+        return self._search.rank(text) if ranked else self._search.search(text)
+
+    def record_use(self, id: str):
+        """치환 1회 기록 (엔진 스레드) - 검색 순위 가산점도 갱신"""
+        count = self.usage.record(id)
+        search = self._search
+        if search is not None:
+            search.set_usage(id, count)
+
+    def find_by_trigger(self, trigger: str):
+        """트리거로 스니펫 조회 (없으면 None)"""
+        ids = self._trigger_index.get(trigger)
+        if not ids:
+            return None
+        # 색인은 qwerty 변환형도 가지므로 트리거 원문이 같은 것 중 목록 앞쪽
+        for id in sorted(ids, key=ids.get):
+            if self._by_id[id]["trigger"] == trigger:
+                return self._by_id[id]
+        return None
+
+    def apply_external(self, snippets: list) -> int:
+        """외부에서 바뀐 전체 목록과 비교해 달라진 스니펫만 반영 (저장소에는 다시 쓰지 않음)
+
+        바뀐 트리거만 엔진에 알리고, 바뀐 스니펫 수를 반환한다.
+        """
+        incoming = {s["id"]: s for s in snippets}
+        forms = set()
+        changed = 0
+        for id in [id for id in self._by_id if id not in incoming]:
+            forms.update(self._index_remove(id))
+            self._search_remove(self._by_id[id])
+            del self._by_id[id]
+            self._order.pop(id, None)
+            INPUT_CACHE.invalidate(id)
+            changed += 1
+        for id, snippet in incoming.items():
+            current = self._by_id.get(id)
+            if current is None:
+                self._by_id[id] = snippet
+                self._order[id] = next(self._order_counter)
+                forms.update(self._index_add(snippet))
+                self._search_put(snippet)
+                changed += 1
+            elif current["trigger"] != snippet["trigger"] or current["content"] != snippet["content"]:
+                forms.update(self._index_remove(id))
+                old = (current["trigger"], current["content"])
+                current["trigger"] = snippet["trigger"]
+                current["content"] = snippet["content"]
+                forms.update(self._index_add(current))
+                self._search_put(current, old)
+                INPUT_CACHE.invalidate(id)
+                changed += 1
+        self._emit(forms)
+        return changed
+
+    def bulk_import(self, records, on_duplicate: str = 'skip') -> dict:
+        """대량 가져오기 - 검증, 트리거 중복 처리 후 저장 한 번, 엔진 갱신 한 번
+
+        on_duplicate: 'skip' (기존 유지), 'replace' (기존 내용 교체), 'rename' (트리거_2 ...)
+        같은 파일 안의 중복은 뒤의 것이 이긴다. 결과 집계 dict 반환.
+        """
+        report = {"added": 0, "replaced": 0, "renamed": 0, "skipped": 0, "invalid": 0}
+        existing = {}
+        for s in self._by_id.values():
+            existing.setdefault(s["trigger"], s)
+        pending = {}  # trigger -> content (입력 순서 유지)
+        for record in records:
+            # 공백은 종결키라 트리거에 들어갈 수 없음 (load와 동일하게 제거)
+            trigger = normalize_trigger(str(record.get("trigger", "")).replace(" ", ""))
+            content = str(record.get("content", "")).strip()
+            if not trigger or not content:
+                report["invalid"] += 1
+                continue
+            if trigger in pending:
+                report["skipped"] += 1
+                del pending[trigger]
+            pending[trigger] = content
+
+        changed = []
+        now = time.time()
+        for trigger, content in pending.items():
+            current = existing.get(trigger)
+            if current is not None:
+                if on_duplicate == 'replace':
+                    if current["content"] != content:
+                        current["content"] = content
+                        INPUT_CACHE.invalidate(current["id"])
+                        changed.append(current)
+                    report["replaced"] += 1
+                    continue
+                if on_duplicate != 'rename':
+                    report["skipped"] += 1
+                    continue
+                n = 2
+                while f"{trigger}_{n}" in existing or f"{trigger}_{n}" in pending:
+                    n += 1
+                trigger = f"{trigger}_{n}"
+                report["renamed"] += 1
+            snippet = {"id": str(uuid.uuid4()), "trigger": trigger, "content": content, "createdAt": now}
+            self._by_id[snippet["id"]] = snippet
+            self._order[snippet["id"]] = next(self._order_counter)
+            self._index_add(snippet)
+            existing[trigger] = snippet
+            changed.append(snippet)
+            report["added"] += 1
+
+        if changed:
+            self.store.put_many(changed, self._by_id.values())
+            for snippet in changed:
+                self._by_id[snippet["id"]] = self.store.resident(snippet)
+            self._search = None  # 다음 검색 때 백그라운드에서 다시 만듦 (하나씩 갱신하는 것보다 빠름)
+            self._emit_reset()
+        return report
+
+    def import_file(self, path: str, on_duplicate: str = 'skip') -> dict:
+        return self.bulk_import(iter_snippet_file(path), on_duplicate)
+
+    def export_file(self, path: str) -> int:
+        """현재 스니펫을 파일로 내보내기 (형식은 확장자로)"""
+        return write_snippet_file(path, self.store.iter_snippets(self._by_id.values()))
 
     def add(self, trigger: str, content: str):
         snippet = {
@@ -722,42 +2473,346 @@ class SnippetManager:
             "content": content,
             "createdAt": time.time()
         }
-        self.snippets.append(snippet)
-        self.save()
+        self._by_id[snippet["id"]] = snippet
+        self._order[snippet["id"]] = next(self._order_counter)
+        forms = self._index_add(snippet)
+        self._search_put(snippet)
+        self.store.put(snippet, self._by_id.values())
+        snippet = self._by_id[snippet["id"]] = self.store.resident(snippet)
+        self._emit(forms)
         return snippet
 
     def update(self, id: str, trigger: str, content: str):
-        for s in self.snippets:
-            if s["id"] == id:
-                s["trigger"] = trigger
-                s["content"] = content
-                break
-        self.save()
+        s = self._by_id.get(id)
+        if s is None:
+            return
+        old_forms = self._index_remove(id)
+        old = (s["trigger"], s["content"]) if self._search is not None else None
+        s["trigger"] = trigger
+        s["content"] = content
+        new_forms = self._index_add(s)
+        self._search_put(s, old)
+        INPUT_CACHE.invalidate(id)
+        self.store.put(s, self._by_id.values())
+        self._by_id[id] = self.store.resident(s)
+        self._emit(set(old_forms) | set(new_forms))
 
     def delete(self, id: str):
-        self.snippets = [s for s in self.snippets if s["id"] != id]
-        self.save()
+        snippet = self._by_id.pop(id, None)
+        if snippet is None:
+            return
+        forms = self._index_remove(id)
+        self._search_remove(snippet)
+        self._order.pop(id, None)
+        INPUT_CACHE.invalidate(id)
+        self.usage.forget(id)
+        self.store.remove(id, self._by_id.values())
+        self._emit(forms)
+
+    def get_trigger_ids(self):
+        """트리거 (qwerty 변환형 포함) -> 스니펫 id"""
+        return {form: self._effective(form)["id"] for form in self._trigger_index}
+
+
+class TriggerAutomaton:
+    """트리거 최장 접미사 매칭용 Aho-Corasick 오토마톤
+
+    상태 0이 루트. best[s]에 상태 s 문자열의 접미사 중 가장 긴 트리거 상태를
+    미리 계산해 두어, 입력 끝에서 최장 트리거 조회가 스니펫 개수와 무관하게
+    O(max_len)이 된다.
+    """
+
+    def __init__(self, trigger_map: dict):
+        self.goto = [{}]      # 상태별 전이 (문자 -> 상태)
+        self.fail = [0]       # 실패 링크
+        self.value = [None]   # 트리거 끝 상태면 (trigger, content)
+        self.best = [0]       # 가장 긴 매칭 상태 (0 = 없음)
+        self.max_len = 0
+        for trigger, content in trigger_map.items():
+            if trigger:
+                self._insert(trigger, content)
+        self._build_links()
+
+    def __len__(self):
+        return len(self.goto)
+
+    def _insert(self, trigger: str, content):
+        state = 0
+        for ch in trigger:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.value.append(None)
+                self.best.append(0)
+                self.goto[state][ch] = nxt
+            state = nxt
+        self.value[state] = (trigger, content)
+        if len(trigger) > self.max_len:
+            self.max_len = len(trigger)
+
+    def _build_links(self):
+        """BFS로 실패 링크와 최장 매칭 상태 계산"""
+        goto, fail, value, best = self.goto, self.fail, self.value, self.best
+        queue = []
+        for child in goto[0].values():
+            best[child] = child if value[child] else 0
+            queue.append(child)
+        i = 0
+        while i < len(queue):
+            state = queue[i]
+            i += 1
+            for ch, child in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                best[child] = child if value[child] else best[fail[child]]
+                queue.append(child)
+
+    def step(self, state: int, ch: str) -> int:
+        """상태에서 문자 하나 전이"""
+        goto = self.goto
+        while state and ch not in goto[state]:
+            state = self.fail[state]
+        return goto[state].get(ch, 0)
+
+    def match(self, state: int, excluded=None):
+        """상태에서 끝나는 가장 긴 트리거 (trigger, content), 없으면 None
+
+        excluded에 든 트리거는 건너뛰고 그 다음으로 긴 접미사 트리거를 찾는다.
+        """
+        m = self.best[state]
+        if excluded:
+            while m and self.value[m][0] in excluded:
+                m = self.best[self.fail[m]]
+        return self.value[m]
+
+    def longest_suffix(self, text: str):
+        """text의 접미사 중 가장 긴 트리거 (trigger, content), 없으면 None"""
+        if not self.max_len:
+            return None
+        state = 0
+        for ch in text[-self.max_len:]:
+            state = self.step(state, ch)
+        return self.match(state)
+
+
+class SnippetDispatcher:
+    """엔진 작업을 처리하는 단일 상주 스레드
+
+    키 입력마다 스레드를 만들지 않고, 제한된 큐에 (실행 시각, 작업)을 넣어
+    지연 실행한다. 큐가 가득 차면 새 작업은 버린다.
+    stop()으로 버려지는 작업은 예약할 때 넘긴 on_drop을 호출해 정리할 수 있다.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._heap = []               # (due, seq, fn, args, on_drop)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            self._stopping = False
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="SnippetDispatcher", daemon=True)
+            self._thread.start()
 
-    def get_trigger_map(self):
-        result = {}
-        for s in self.snippets:
-            qwerty_trigger = convert_to_qwerty(s["trigger"])
-            result[qwerty_trigger] = s["content"]
-            if qwerty_trigger != s["trigger"]:
-                result[s["trigger"]] = s["content"]
-        return result
+    def stop(self, timeout: float = None):
+        """대기 작업을 버리고 (on_drop 호출) 스레드 종료
+
+        실행 중인 작업은 끝날 때까지 기다린다 (timeout None이면 끝까지 - 치환 도중에 끊지 않음).
+        """
+        with self._cond:
+            self._stopping = True
+            dropped = [entry[4] for entry in self._heap if entry[4]]
+            self._heap.clear()
+            self._cond.notify()
+            thread = self._thread
+            self._thread = None
+        for on_drop in dropped:
+            try:
+                on_drop()
+            except Exception:
+                pass
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def schedule(self, delay: float, fn, *args, on_drop=None) -> bool:
+        """delay초 후 fn(*args) 실행 예약. 큐가 가득 찼거나 정지 중이면 False
+
+        on_drop: 실행 전에 stop()으로 버려지면 호출 (정지한 스레드에서)
+        """
+        with self._cond:
+            if self._stopping or self._thread is None or len(self._heap) >= self.maxsize:
+                return False
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), fn, args, on_drop))
+            self._cond.notify()
+            return True
+
+    def _run(self):
+        me = threading.current_thread()
+        while True:
+            with self._cond:
+                # stop() 후 start()로 새 스레드가 떴으면 이전 스레드는 작업을 더 꺼내지 않음
+                while not self._stopping and self._thread is me:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping or self._thread is not me:
+                    return
+                _, _, fn, args, _ = heapq.heappop(self._heap)
+            try:
+                fn(*args)
+            except Exception:
+                pass
+
+
+# 치환 단계별 대기 시간 (초) - 기존 고정값
+DEFAULT_TIMING = {
+    'ime_settle': 0.1,           # 종결키 후 IME 조합 완료 대기
+    'unhook_settle': 0.05,       # 리스너 중지 후 대기 (재시작 모드)
+    'backspace_interval': 0.02,  # 백스페이스 사이 간격
+    'after_backspace': 0.05,     # 백스페이스 후 입력 전 대기
+    'after_unicode': 0.1,        # UNICODE 입력 후 대기
+    'clipboard_settle': 0.05,    # 클립보드 복사 후 붙여넣기 전 대기
+    'after_paste': 0.2,          # 붙여넣기 후 클립보드 복원 전 대기
+}
+
+# 주입 방식: paced (백스페이스 한 키씩 간격), batched (백스페이스 한 번에),
+# atomic (백스페이스 + 텍스트를 SendInput 한 번에)
+INJECT_MODES = ('paced', 'batched', 'atomic')
+
+# IME가 영문 모드라 조합 대기가 필요 없는 경우의 빠른 경로
+FAST_PATH_TIMING = {
+    'ime_settle': 0.0,
+    'backspace_interval': 0.005,
+    'after_backspace': 0.0,
+    'after_unicode': 0.0,
+}
+
+
+class TimingProfiles:
+    """대상 앱별 치환 타이밍 프로필
+
+    timing_profiles.json (저장 폴더) 형식:
+        {"default": {...}, "apps": {"notepad.exe": {"ime_settle": 0.03, "fast_path": false,
+                                                    "inject_mode": "paced"}}}
+    우선순위: 기본값 < 빠른 경로 (IME 영문 모드일 때) < 앱별 설정.
+    inject_mode 미지정 시 콘솔은 paced, GUI는 IME 영문 모드면 atomic, 아니면 batched.
+    실제 적용된 값과 소요 시간은 timing_stats.json에 앱별로 기록한다.
+    """
+
+    STATS_SAVE_INTERVAL = 30.0
+
+    def __init__(self, folder: str):
+        self.profiles_file = os.path.join(folder, "timing_profiles.json")
+        self.stats_file = os.path.join(folder, "timing_stats.json")
+        self.default = dict(DEFAULT_TIMING)
+        self.apps = {}
+        self.stats = {}
+        self._stats_dirty = False
+        self._last_stats_save = time.monotonic()
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.profiles_file):
+            try:
+                with open(self.profiles_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.default.update(data.get("default", {}))
+                self.apps = {k.lower(): v for k, v in data.get("apps", {}).items()}
+            except:
+                pass
+        if os.path.exists(self.stats_file):
+            try:
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+            except:
+                self.stats = {}
+
+    def resolve(self, proc_name: str, ime_open, console: bool = False) -> dict:
+        """앱과 IME 상태에 맞는 타이밍 (ime_open=None이면 보수적으로 기본값)"""
+        app = self.apps.get(proc_name, {})
+        timing = dict(self.default)
+        fast = ime_open is False and app.get("fast_path", True)
+        if fast:
+            timing.update(FAST_PATH_TIMING)
+        timing.update({k: v for k, v in app.items() if k in DEFAULT_TIMING})
+
+        mode = app.get("inject_mode") or self.default.get("inject_mode")
+        if mode not in INJECT_MODES:
+            mode = 'paced' if console else ('atomic' if fast else 'batched')
+        timing['inject_mode'] = mode
+        return timing
+
+    def record(self, proc_name: str, timing: dict, elapsed: float):
+        """적용된 대기 시간과 총 소요 시간 기록 (파일 저장은 주기적으로)"""
+        entry = self.stats.setdefault(proc_name or "(unknown)", {"count": 0, "avg_ms": 0.0})
+        entry["count"] += 1
+        entry["avg_ms"] += (elapsed * 1000 - entry["avg_ms"]) / entry["count"]
+        entry["last_ms"] = round(elapsed * 1000, 1)
+        entry["timing"] = timing
+        self._stats_dirty = True
+        if time.monotonic() - self._last_stats_save >= self.STATS_SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if not self._stats_dirty:
+            return
+        self._stats_dirty = False
+        self._last_stats_save = time.monotonic()
+        try:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        except:
+            pass
 
 
 class SnippetEngine(QObject):
-    """전역 키보드 후킹 및 치환 엔진 (pynput 사용)"""
+    """전역 키보드 후킹 및 치환 엔진 (pynput 사용)
+
+    persistent_listener=True면 리스너 하나를 계속 유지하고, dwExtraInfo 표식이
+    붙은 자체 주입 이벤트만 win32_event_filter에서 걸러낸다. False면 기존처럼
+    치환할 때마다 리스너를 멈췄다가 새로 만든다.
+    """
 
-    def __init__(self, manager: SnippetManager):
+    CHECK_DELAY = 0.05       # 종결키 후 트리거 체크까지 대기 (IME 조합 완료)
+    REPLACE_DEBOUNCE = 0.3   # 마지막 치환 후 재발동 방지 시간
+    OVERLAY_REBUILD = 256    # 증분 변경이 이만큼 쌓이면 백그라운드에서 오토마톤 재구성
+
+    def __init__(self, manager: SnippetManager, persistent_listener: bool = True):
         super().__init__()
         self.manager = manager
-        self.buffer = ""
+        self.persistent_listener = persistent_listener
+        self.listener_factory = pynput_keyboard.Listener
         self.running = False
-        self.trigger_map = {}
+        self.trigger_ids = {}
+        self.visual_lens = {}
+        self.automaton = TriggerAutomaton({})
         self.max_trigger_len = 0
+        # 키 입력마다 전진하는 오토마톤 상태 스택과 입력 문자 (Backspace 시 pop)
+        self._states = deque(maxlen=5)
+        self._chars = deque(maxlen=5)
+        # 오토마톤 구성 이후 바뀐 트리거: 추가/수정분 (트리거 -> (순번, 값)), 무효화분 (트리거 -> 순번)
+        self._overlay = {}
+        self._overlay_lens = Counter()
+        self._removed = {}
+        self._delta_seq = 0
+        self._generation = 0
+        self._rebuilding = False
+        self._match_lock = threading.Lock()
+        self.dispatcher = SnippetDispatcher()
+        self.timing = TimingProfiles(os.path.dirname(manager.snippets_file))
         self.is_replacing = False
         self._last_replace_time = 0.0
         self.listener = None
@@ -766,16 +2821,137 @@ class SnippetEngine(QObject):
         self.alt_pressed = False
         self.shift_pressed = False
         self.refresh_triggers()
+        manager.subscribe(self.apply_trigger_changes, reset=self.refresh_triggers)
 
     def refresh_triggers(self):
-        self.trigger_map = self.manager.get_trigger_map()
-        if self.trigger_map:
-            self.max_trigger_len = max(len(t) for t in self.trigger_map.keys())
-        else:
-            self.max_trigger_len = 0
+        """전체 트리거로 오토마톤 재구성 (일반 편집은 apply_trigger_changes로 증분 반영)"""
+        # 오토마톤 값은 (트리거, 스니펫 id) - 내용은 치환할 때 가져옴
+        trigger_ids = self.manager.get_trigger_ids()
+        # 트리거별 화면 글자수 미리 계산 (치환 시 지울 백스페이스 수)
+        visual_lens = {t: calc_visual_len(t) for t in trigger_ids}
+        automaton = TriggerAutomaton(trigger_ids)
+        with self._match_lock:
+            self.trigger_ids = trigger_ids
+            self.visual_lens = visual_lens
+            self._overlay.clear()
+            self._overlay_lens.clear()
+            self._removed.clear()
+            self._generation += 1
+            self._swap_automaton(automaton, automaton.max_len)
+
+    def _swap_automaton(self, automaton, max_len):
+        """오토마톤 교체 (_match_lock 안에서). 기존 상태 번호는 무효이므로 입력 문자로 다시 계산"""
+        self.automaton = automaton
+        self.max_trigger_len = max_len
+        chars = deque(self._chars, maxlen=max_len + 5)
+        states = deque(maxlen=max_len + 5)
+        state = 0
+        for ch in chars:
+            state = automaton.step(state, ch)
+            states.append(state)
+        self._chars = chars
+        self._states = states
+
+    def apply_trigger_changes(self, changes: dict):
+        """SnippetManager 변경분 반영 - 트리거 하나당 O(트리거 길이)
+
+        오토마톤은 그대로 두고 추가/수정된 트리거는 _overlay에, 기존 값이 무효가 된
+        트리거는 _removed에 기록한다. 변경이 쌓이면 백그라운드에서 재구성한다.
+        """
+        with self._match_lock:
+            self._delta_seq += 1
+            seq = self._delta_seq
+            for form, snippet in changes.items():
+                if not form:
+                    continue
+                # 오토마톤에 있던 값은 (있다면) 더 이상 유효하지 않음
+                self._removed[form] = seq
+                if form in self._overlay:
+                    self._overlay_lens[len(form)] -= 1
+                    del self._overlay[form]
+                if snippet is None:
+                    self.trigger_ids.pop(form, None)
+                    self.visual_lens.pop(form, None)
+                    continue
+                self._overlay[form] = (seq, (form, snippet["id"]))
+                self._overlay_lens[len(form)] += 1
+                self.trigger_ids[form] = snippet["id"]
+                self.visual_lens[form] = calc_visual_len(form)
+            max_len = max(self.manager.max_trigger_len, self.automaton.max_len)
+            if max_len != self.max_trigger_len:
+                self.max_trigger_len = max_len
+                if max_len + 5 > self._states.maxlen:
+                    self._states = deque(self._states, maxlen=max_len + 5)
+                    self._chars = deque(self._chars, maxlen=max_len + 5)
+            pending = len(self._removed)
+        if pending >= self.OVERLAY_REBUILD:
+            self._start_rebuild()
+
+    def _start_rebuild(self):
+        """현재 트리거로 오토마톤을 백그라운드에서 다시 만들고, 그동안의 변경분은 유지"""
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+
+        def _run():
+            try:
+                with self._match_lock:
+                    trigger_ids = dict(self.trigger_ids)
+                    seq = self._delta_seq
+                    generation = self._generation
+                automaton = TriggerAutomaton(trigger_ids)
+                with self._match_lock:
+                    if generation != self._generation:
+                        return  # 그사이 전체 재구성됨
+                    for form, (form_seq, _) in list(self._overlay.items()):
+                        if form_seq <= seq:
+                            self._overlay_lens[len(form)] -= 1
+                            del self._overlay[form]
+                    self._removed = {f: r for f, r in self._removed.items() if r > seq}
+                    self._swap_automaton(automaton, max(automaton.max_len, self.max_trigger_len))
+            except Exception as e:
+                print(f"[Engine] 트리거 재구성 실패: {e}")
+            finally:
+                self._rebuilding = False
+
+        threading.Thread(target=_run, name="TriggerRebuild", daemon=True).start()
+
+    def _lookup(self, state: int, text: str):
+        """입력 끝에서 가장 긴 트리거 (오토마톤 + 증분 변경분), _match_lock 안에서 호출"""
+        found = self.automaton.match(state, self._removed)
+        if self._overlay:
+            found_len = len(found[0]) if found else 0
+            for length in sorted(self._overlay_lens, reverse=True):
+                if length < found_len:
+                    break
+                if length > len(text) or not self._overlay_lens[length]:
+                    continue
+                hit = self._overlay.get(text[-length:])
+                if hit:
+                    return hit[1]
+        return found
+
+    def _reset_state(self):
+        """입력 상태 초기화 (루트 상태로)"""
+        self._states.clear()
+        self._chars.clear()
+
+    def _make_listener(self):
+        return self.listener_factory(
+            on_press=self.on_press,
+            on_release=self.on_release,
+            win32_event_filter=self._win32_event_filter,
+        )
+
+    def _win32_event_filter(self, msg, data):
+        """자체 주입(SendInput) 이벤트는 콜백으로 전달하지 않음 (시스템에는 그대로 전달)"""
+        if getattr(data, 'dwExtraInfo', None) == QFRED_INJECT_TAG:
+            return False
+        return True
 
     def on_press(self, key):
-        if self.is_replacing:
+        # 리스너 유지 모드에서는 자체 입력이 이미 걸러지므로 치환 중 실제 입력도 추적
+        if self.is_replacing and not self.persistent_listener:
             return
 
         vk = getattr(key, 'vk', None)
@@ -791,51 +2967,54 @@ class SnippetEngine(QObject):
             self.shift_pressed = True
             return
         if key == Key.cmd:
-            self.buffer = ""
+            self._reset_state()
             return
 
-        # Modifier가 눌려있으면 버퍼 초기화
+        # Modifier가 눌려있으면 상태 초기화
         if self.ctrl_pressed or self.alt_pressed:
-            self.buffer = ""
+            self._reset_state()
             return
 
-        # 종결키 처리: 버퍼 즉시 캡처 & 초기화 후 지연 체크
+        # 종결키 처리: 현재 상태의 매칭 여부만 O(1) 확인 후 즉시 초기화
         if key == Key.space or key == Key.tab:
-            buf_snapshot = self.buffer
-            self.buffer = ""  # 즉시 초기화 → 중복 스페이스 이벤트 방지
-            if buf_snapshot:
-                def _delayed_check(snapshot=buf_snapshot):
-                    time.sleep(0.05)  # IME 조합 완료 대기
-                    if self.is_replacing:
-                        return
-                    self._check_triggers_snapshot(snapshot)
-                threading.Thread(target=_delayed_check, daemon=True).start()
+            with self._match_lock:
+                states = self._states
+                match = self._lookup(states[-1], ''.join(self._chars)) if states else None
+                states.clear()  # 즉시 초기화 → 중복 스페이스 이벤트 방지
+                self._chars.clear()
+            if match:
+                # IME 조합 완료 대기 후 디스패처 스레드에서 체크
+                self.dispatcher.schedule(self.CHECK_DELAY, self._delayed_check, match)
             return
 
-        # Backspace 처리
+        # Backspace 처리: 직전 상태로 복귀
         if key == Key.backspace:
-            if self.buffer:
-                self.buffer = self.buffer[:-1]
+            with self._match_lock:
+                if self._states:
+                    self._states.pop()
+                if self._chars:
+                    self._chars.pop()
             return
 
-        # 네비게이션 키 - 버퍼 초기화
+        # 네비게이션 키 - 상태 초기화
         if key in [Key.esc, Key.enter, Key.left, Key.right, Key.up, Key.down, Key.home, Key.end, Key.delete]:
-            self.buffer = ""
+            self._reset_state()
             return
 
-        # 일반 문자 키 처리 (VK 코드 기반, Shift 인식)
+        # 일반 문자 키 처리 (VK 코드 기반, Shift 인식) → 오토마톤 전진
         try:
             if vk and vk in VK_TO_CHAR:
                 normal, shifted = VK_TO_CHAR[vk]
                 char = shifted if self.shift_pressed else normal
-                self.buffer += char
-                if len(self.buffer) > self.max_trigger_len + 5:
-                    self.buffer = self.buffer[-(self.max_trigger_len + 5):]
+                with self._match_lock:
+                    states = self._states
+                    states.append(self.automaton.step(states[-1] if states else 0, char))
+                    self._chars.append(char)
         except:
             pass
 
     def on_release(self, key):
-        if self.is_replacing:
+        if self.is_replacing and not self.persistent_listener:
             return
         # Modifier 키 해제 추적
         if key == Key.ctrl_l or key == Key.ctrl_r:
@@ -845,57 +3024,92 @@ class SnippetEngine(QObject):
         if key in (Key.shift, Key.shift_l, Key.shift_r):
             self.shift_pressed = False
 
-    def _check_triggers_snapshot(self, snapshot: str) -> bool:
-        """스냅샷 기반 트리거 체크 (self.buffer 건드리지 않음)"""
+    def _delayed_check(self, match):
+        if self.is_replacing:
+            return
+        self._commit_match(*match)
+
+    def _commit_match(self, trigger: str, snippet_id: str) -> bool:
+        """매칭된 트리거 치환 시작"""
         now = time.monotonic()
         elapsed = now - self._last_replace_time
         if self.is_replacing:
             return False
         # 디바운스: 마지막 치환 후 300ms 이내 재발동 방지
-        if elapsed < 0.3:
+        if elapsed < self.REPLACE_DEBOUNCE:
             return False
-        # 최장 매칭: 여러 트리거가 매칭되면 가장 긴 것 우선
-        best_trigger = None
-        best_content = None
-        best_len = 0
-        for trigger, content in self.trigger_map.items():
-            if snapshot.endswith(trigger) and len(trigger) > best_len:
-                best_trigger = trigger
-                best_content = content
-                best_len = len(trigger)
-        if best_trigger:
-            self.is_replacing = True
-            self.buffer = ""
-            threading.Thread(target=self._replace, args=(best_trigger, best_content), daemon=True).start()
-            return True
-        return False
+        self.is_replacing = True
+        self._reset_state()
+        if not self.dispatcher.schedule(0, self._replace, trigger, snippet_id, on_drop=self._replace_dropped):
+            self.is_replacing = False
+            return False
+        return True
+
+    def _replace_dropped(self):
+        """예약된 치환이 실행 전에 stop()으로 버려짐"""
+        self.is_replacing = False
+
+    def _replace(self, trigger: str, snippet_id: str):
+        started = time.monotonic()
+        proc_name = ""
+        timing = DEFAULT_TIMING
+        content = None
+
+        def settle(key):
+            if timing[key] > 0:
+                time.sleep(timing[key])
 
-    def _replace(self, trigger: str, content: str):
         try:
-            time.sleep(0.1)  # IME 조합 완료 대기
+            content = self.manager.get_content(snippet_id)
+            if content is None:
+                return  # 그사이 삭제됨
+
+            # 대상 앱 판별 → 타이밍 프로필 선택
+            hwnd, class_name, proc_name = get_foreground_app()
+            console = is_console_app(class_name, proc_name)
+            timing = self.timing.resolve(proc_name, is_ime_open(hwnd), console)
+            mode = timing['inject_mode']
+
+            # IME 조합 완료 대기 (앱 판별에 걸린 시간만큼 차감)
+            remaining = timing['ime_settle'] - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
 
             # 리스너 일시 중지 (pynput이 Ctrl+V를 중복 처리하는 것 방지)
-            if self.listener:
-                self.listener.stop()
-                self.listener = None
-            time.sleep(0.05)
+            # 리스너 유지 모드에서는 주입 이벤트가 표식으로 걸러지므로 생략
+            if not self.persistent_listener:
+                if self.listener:
+                    self.listener.stop()
+                    self.listener = None
+                settle('unhook_settle')
 
             # ctypes SendInput으로 백스페이스 (겹받침은 2키→1글자이므로 화면 글자수 기준)
-            backspace_count = calc_visual_len(trigger) + 1
-            send_backspaces(backspace_count)
-            time.sleep(0.05)
+            visual_len = self.visual_lens.get(trigger)
+            if visual_len is None:
+                visual_len = calc_visual_len(trigger)
+            backspace_count = visual_len + 1
+            # 스니펫 id별로 만들어 둔 INPUT 배열 재사용
+            cache_key = snippet_id
+
+            if mode == 'atomic' and len(content) <= 50:
+                # 백스페이스 + 텍스트를 한 번에 (대상 앱이 감당할 수 있을 때만)
+                send_replacement(backspace_count, content, cache_key)
+                settle('after_unicode')
+                return
 
-            # 콘솔/GUI 감지 후 분기
-            console = is_console_window()
+            send_backspaces(backspace_count, timing['backspace_interval'],
+                            batched=mode != 'paced')
+            settle('after_backspace')
 
+            # 콘솔/GUI 분기
             if console:
                 # 콘솔/터미널: UNICODE 직접 입력 (Ctrl+V는 터미널+셸 양쪽에서 중복 처리됨)
-                send_unicode_string(content)
-                time.sleep(0.1)
+                send_unicode_string(content, cache_key)
+                settle('after_unicode')
             elif len(content) <= 50:
                 # GUI 짧은 텍스트: UNICODE 직접 입력
-                send_unicode_string(content)
-                time.sleep(0.1)
+                send_unicode_string(content, cache_key)
+                settle('after_unicode')
             else:
                 # GUI 긴 텍스트: 클립보드 + Ctrl+V
                 try:
@@ -903,9 +3117,9 @@ class SnippetEngine(QObject):
                 except:
                     old_clipboard = ""
                 pyperclip.copy(content)
-                time.sleep(0.05)
+                settle('clipboard_settle')
                 send_paste()
-                time.sleep(0.2)
+                settle('after_paste')
                 try:
                     pyperclip.copy(old_clipboard)
                 except:
@@ -913,169 +3127,339 @@ class SnippetEngine(QObject):
         except Exception:
             pass
         finally:
-            self.buffer = ""
-            self.ctrl_pressed = False
-            self.alt_pressed = False
-            self.shift_pressed = False
             self._last_replace_time = time.monotonic()
-            self.is_replacing = False
-            # 리스너 재시작
-            if self.running:
-                self.listener = pynput_keyboard.Listener(
-                    on_press=self.on_press,
-                    on_release=self.on_release
-                )
-                self.listener.start()
+            self.timing.record(proc_name, timing, self._last_replace_time - started)
+            if content is not None:
+                self.manager.record_use(snippet_id)
+            if self.persistent_listener:
+                # 리스너가 계속 실제 입력을 추적했으므로 상태 유지
+                self.is_replacing = False
+            else:
+                self._reset_state()
+                self.ctrl_pressed = False
+                self.alt_pressed = False
+                self.shift_pressed = False
+                self.is_replacing = False
+                # 리스너 재시작 (중지 전에 끝난 경우는 그대로)
+                if self.running and self.listener is None:
+                    self.listener = self._make_listener()
+                    self.listener.start()
+
+    def _reset_input(self):
+        """시작/정지 시 - 입력 상태, 수식키, 치환 중 표시 초기화"""
+        with self._match_lock:
+            self._reset_state()
+        self.ctrl_pressed = False
+        self.alt_pressed = False
+        self.shift_pressed = False
+        self.is_replacing = False
 
     def start(self):
         if not self.running:
             self.running = True
-            self.buffer = ""
-            self.listener = pynput_keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
+            self._reset_input()
+            self.dispatcher.start()
+            self.listener = self._make_listener()
             self.listener.start()
 
     def stop(self):
         if self.running:
             self.running = False
-            self.buffer = ""
             if self.listener:
                 self.listener.stop()
                 self.listener = None
+            # 예약된 치환은 버리고 (on_drop), 실행 중인 치환은 끝날 때까지 기다린 뒤 초기화
+            self.dispatcher.stop()
+            self._reset_input()
+            self.timing.flush()
 
 
-class SnippetCard(QFrame):
-    """스니펫 카드 위젯"""
-    clicked = pyqtSignal(dict)
-    copyClicked = pyqtSignal(dict)
-    deleteClicked = pyqtSignal(dict)
+class SnippetFileWatcher(QObject):
+    """저장 폴더의 스니펫 파일이 외부 (다른 PC, 공유 드라이브 동기화)에서 바뀌면 다시 읽기
+
+    QFileSystemWatcher 알림과 주기적 서명 확인 (네트워크 드라이브 등 알림이 안 오는 경우)을
+    함께 쓴다. 읽기/파싱은 백그라운드 스레드에서 하고, 달라진 스니펫만 UI 스레드에서
+    SnippetManager.apply_external로 반영한다 (엔진에는 바뀐 트리거만 전달됨).
+    """
+    reloaded = pyqtSignal(int)  # 바뀐 스니펫 수
+    _loaded = pyqtSignal(object, object)  # (서명, 스니펫 목록 또는 None)
+
+    POLL_INTERVAL = 3000  # ms
+    SETTLE_DELAY = 500    # ms - 동기화 프로그램이 여러 파일을 쓰는 동안 대기
 
-    def __init__(self, snippet: dict, is_selected: bool = False, parent=None):
+    def __init__(self, manager: SnippetManager, parent=None):
         super().__init__(parent)
-        self.snippet = snippet
-        self.is_selected = is_selected
-        self.setup_ui()
+        self.manager = manager
+        self.store = manager.store
+        self.paths = self.store.watch_paths()
+        self._seen = self._signatures()
+        self._loading = False
+
+        self._settle = QTimer(self)
+        self._settle.setSingleShot(True)
+        self._settle.setInterval(self.SETTLE_DELAY)
+        self._settle.timeout.connect(self.check)
+        self._poll = QTimer(self)
+        self._poll.setInterval(self.POLL_INTERVAL)
+        self._poll.timeout.connect(self.check)
+        self._loaded.connect(self._apply)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._schedule)
+        self.watcher.directoryChanged.connect(self._schedule)
+        if self.paths:
+            self._rewatch()
+            self._poll.start()
+
+    def _signatures(self) -> dict:
+        return {path: file_signature(path) for path in self.paths}
+
+    def _rewatch(self):
+        """원자적 교체로 감시 대상이 빠지면 다시 등록 (폴더도 감시해 새 파일 생성 감지)"""
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        wanted = [p for p in self.paths if os.path.exists(p)]
+        folder = os.path.dirname(self.paths[0])
+        if os.path.isdir(folder):
+            wanted.append(folder)
+        missing = [p for p in wanted if p not in watched]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def _schedule(self, *args):
+        self._settle.start()
+
+    def check(self):
+        """파일 서명을 비교해 외부 변경이면 백그라운드에서 다시 읽기"""
+        self._rewatch()
+        signatures = self._signatures()
+        if signatures == self._seen or self._loading:
+            return
+        own = self.store.own_signatures
+        if all(signatures[p] == own.get(p) for p in self.paths):
+            self._seen = signatures  # 직접 쓴 것
+            return
+        self._loading = True
+        threading.Thread(target=self._load, args=(signatures,), daemon=True).start()
 
-    def setup_ui(self):
-        self.setFixedHeight(65)
-        self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        self.update_style()
+    def _load(self, signatures):
+        try:
+            snippets = self.store.read_external()
+        except Exception as e:
+            print(f"[Sync] 외부 변경 읽기 실패 (다음에 재시도): {e}")
+            snippets = None
+        self._loaded.emit(signatures, snippets)
 
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(12, 10, 12, 10)
-        layout.setSpacing(6)
+    def _apply(self, signatures, snippets):
+        self._loading = False
+        if snippets is None:
+            return
+        self._seen = signatures
+        changed = self.manager.apply_external(snippets)
+        if changed:
+            print(f"[Sync] 외부 변경 반영: {changed}개")
+            self.reloaded.emit(changed)
 
-        # 상단: 트리거 뱃지 + 버튼들
-        top_layout = QHBoxLayout()
-        top_layout.setSpacing(4)
 
-        # 트리거 뱃지
-        trigger_badge = QLabel(self.snippet["trigger"])
-        trigger_badge.setStyleSheet("""
-            background-color: #064e3b;
-            color: #6ee7b7;
-            border-radius: 4px;
-            padding: 3px 10px;
-            font-size: 12px;
-            font-family: 'Malgun Gothic';
-        """)
-        trigger_badge.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Fixed)
-        top_layout.addWidget(trigger_badge)
+class SnippetListModel(QAbstractListModel):
+    """스니펫 목록 모델 - 필터 결과의 id만 들고 있고 내용은 그릴 때 manager에서 읽음"""
+    SnippetRole = Qt.ItemDataRole.UserRole + 1
+    SelectedRole = Qt.ItemDataRole.UserRole + 2
+    PreviewRole = Qt.ItemDataRole.UserRole + 3
 
-        top_layout.addStretch()
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.filter_text = ""
+        self.ranked = False  # 검색 결과를 점수순으로
+        self.selected_id = None
+        self._ids = []
+        self._rows = {}  # id -> row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._ids):
+            return None
+        snippet_id = self._ids[index.row()]
+        if role == self.SelectedRole:
+            return snippet_id == self.selected_id
+        snippet = self.manager.get(snippet_id)
+        if snippet is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return snippet["trigger"]
+        if role == self.SnippetRole:
+            return snippet
+        if role == self.PreviewRole:
+            # 보이는 행만 그리므로 여기서 내용을 읽어도 됨 (sqlite는 이때 지연 로드)
+            return snippet["content"][:300].replace('\n', ' ')
+        return None
 
-        # 복사 버튼 (Segoe MDL2 Assets 폰트 사용)
-        self.copy_btn = QPushButton("\uE8C8")
-        self.copy_btn.setFixedSize(24, 24)
-        self.copy_btn.setStyleSheet("""
-            QPushButton {
-                background-color: transparent;
-                border: none;
-                border-radius: 4px;
-                font-size: 14px;
-                font-family: 'Segoe MDL2 Assets';
-                color: #94a3b8;
-            }
-            QPushButton:hover {
-                background-color: #334155;
-                color: #ffffff;
-            }
-        """)
-        self.copy_btn.clicked.connect(lambda: self.copyClicked.emit(self.snippet))
-        self.copy_btn.hide()
-        top_layout.addWidget(self.copy_btn)
-
-        # 삭제 버튼
-        self.delete_btn = QPushButton("\uE74D")
-        self.delete_btn.setFixedSize(24, 24)
-        self.delete_btn.setStyleSheet("""
-            QPushButton {
-                background-color: transparent;
-                border: none;
-                border-radius: 4px;
-                font-size: 14px;
-                font-family: 'Segoe MDL2 Assets';
-                color: #94a3b8;
-            }
-            QPushButton:hover {
-                background-color: #334155;
-                color: #ffffff;
-            }
-        """)
-        self.delete_btn.clicked.connect(lambda: self.deleteClicked.emit(self.snippet))
-        self.delete_btn.hide()
-        top_layout.addWidget(self.delete_btn)
-
-        layout.addLayout(top_layout)
-
-        # 하단: 내용 미리보기 (카드 너비에 맞게 자동 말줄임)
-        preview_text = self.snippet["content"].replace('\n', ' ')
-        preview_label = QLabel(preview_text)
-        preview_label.setStyleSheet("color: #94a3b8; font-size: 12px;")
-        preview_label.setMaximumWidth(280)
-        preview_label.setTextFormat(Qt.TextFormat.PlainText)
-        from PyQt6.QtCore import Qt as QtCore_Qt
-        preview_label.setWordWrap(False)
-        # QFontMetrics로 너비에 맞게 말줄임
-        metrics = preview_label.fontMetrics()
-        elided = metrics.elidedText(preview_text, QtCore_Qt.TextElideMode.ElideRight, 270)
-        preview_label.setText(elided)
-        layout.addWidget(preview_label)
-
-    def update_style(self):
-        if self.is_selected:
-            self.setStyleSheet("""
-                QFrame {
-                    background-color: #1e293b;
-                    border: 1px solid #334155;
-                    border-radius: 8px;
-                }
-            """)
+    def reload(self, filter_text=None):
+        """필터 다시 적용 (위젯 재생성 없음)"""
+        if filter_text is not None:
+            self.filter_text = filter_text
+        self.beginResetModel()
+        if self.filter_text.strip():
+            self._ids = self.manager.search(self.filter_text, self.ranked)
         else:
-            self.setStyleSheet("""
-                QFrame {
-                    background-color: transparent;
-                    border: none;
-                    border-radius: 8px;
-                }
-                QFrame:hover {
-                    background-color: #1e293b;
-                }
-            """)
+            self._ids = [s["id"] for s in self.manager.snippets]
+        self._rows = {snippet_id: row for row, snippet_id in enumerate(self._ids)}
+        self.endResetModel()
 
-    def enterEvent(self, event):
-        self.copy_btn.show()
-        self.delete_btn.show()
-        super().enterEvent(event)
+    def row_of(self, snippet_id):
+        return self._rows.get(snippet_id)
+
+    def set_selected(self, snippet_id):
+        """선택 표시 변경 - 바뀐 두 행만 다시 그림"""
+        old, self.selected_id = self.selected_id, snippet_id
+        for changed in (old, snippet_id):
+            row = self._rows.get(changed)
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [self.SelectedRole])
+
+
+class SnippetItemDelegate(QStyledItemDelegate):
+    """스니펫 행 그리기 - 기존 카드 모양 (트리거 뱃지, 미리보기, 마우스 올리면 복사/삭제)"""
+    clicked = pyqtSignal(dict)
+    copyClicked = pyqtSignal(dict)
+    deleteClicked = pyqtSignal(dict)
+
+    ROW_HEIGHT = 65
+    SPACING = 4
+    BUTTON = 24
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.badge_font = QFont("Malgun Gothic")
+        self.badge_font.setPixelSize(12)
+        self.preview_font = QFont()
+        self.preview_font.setPixelSize(12)
+        self.icon_font = QFont("Segoe MDL2 Assets")
+        self.icon_font.setPixelSize(14)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT + self.SPACING)
+
+    def _card_rect(self, option):
+        return option.rect.adjusted(0, 0, 0, -self.SPACING)
+
+    def _button_rects(self, option):
+        card = self._card_rect(option)
+        top = card.top() + 10
+        delete = QRect(card.right() - 12 - self.BUTTON + 1, top, self.BUTTON, self.BUTTON)
+        copy = QRect(delete.left() - 4 - self.BUTTON, top, self.BUTTON, self.BUTTON)
+        return copy, delete
+
+    def paint(self, painter, option, index):
+        snippet = index.data(SnippetListModel.SnippetRole)
+        if snippet is None:
+            return
+        selected = index.data(SnippetListModel.SelectedRole)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        card = self._card_rect(option)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # 카드 배경
+        if selected:
+            painter.setPen(QPen(QColor("#334155"), 1))
+            painter.setBrush(QColor("#1e293b"))
+            painter.drawRoundedRect(QRectF(card).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+        elif hovered:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#1e293b"))
+            painter.drawRoundedRect(QRectF(card), 8, 8)
+
+        # 트리거 뱃지
+        painter.setFont(self.badge_font)
+        metrics = QFontMetrics(self.badge_font)
+        max_badge = card.width() - 24 - (2 * self.BUTTON + 8 if hovered else 0)
+        trigger = metrics.elidedText(snippet["trigger"], Qt.TextElideMode.ElideRight, max(max_badge - 20, 10))
+        badge = QRect(card.left() + 12, card.top() + 10,
+                      metrics.horizontalAdvance(trigger) + 20, metrics.height() + 6)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#064e3b"))
+        painter.drawRoundedRect(QRectF(badge), 4, 4)
+        painter.setPen(QColor("#6ee7b7"))
+        painter.drawText(badge, Qt.AlignmentFlag.AlignCenter, trigger)
+
+        # 내용 미리보기 (너비에 맞게 말줄임)
+        painter.setFont(self.preview_font)
+        preview_rect = QRect(card.left() + 12, badge.bottom() + 7, card.width() - 24, 16)
+        preview = QFontMetrics(self.preview_font).elidedText(
+            index.data(SnippetListModel.PreviewRole) or "", Qt.TextElideMode.ElideRight, preview_rect.width())
+        painter.setPen(QColor("#94a3b8"))
+        painter.drawText(preview_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, preview)
+
+        # 복사/삭제 버튼 (마우스 올렸을 때만)
+        if hovered and option.widget is not None:
+            cursor = option.widget.viewport().mapFromGlobal(QCursor.pos())
+            painter.setFont(self.icon_font)
+            for rect, glyph in zip(self._button_rects(option), ("\uE8C8", "\uE74D")):
+                over = rect.contains(cursor)
+                if over:
+                    painter.setPen(Qt.PenStyle.NoPen)
+                    painter.setBrush(QColor("#334155"))
+                    painter.drawRoundedRect(QRectF(rect), 4, 4)
+                painter.setPen(QColor("#ffffff" if over else "#94a3b8"))
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, glyph)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """클릭 위치로 선택/복사/삭제 구분 (버튼 위젯 없이)"""
+        if event.type() == QEvent.Type.MouseButtonPress:
+            return True
+        if event.type() != QEvent.Type.MouseButtonRelease or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        snippet = index.data(SnippetListModel.SnippetRole)
+        if snippet is None:
+            return False
+        pos = event.position().toPoint()
+        copy_rect, delete_rect = self._button_rects(option)
+        if copy_rect.contains(pos):
+            self.copyClicked.emit(snippet)
+        elif delete_rect.contains(pos):
+            self.deleteClicked.emit(snippet)
+        elif self._card_rect(option).contains(pos):
+            self.clicked.emit(snippet)
+        return True
+
+
+class SnippetListView(QListView):
+    """스니펫 목록 뷰 - 보이는 행만 그림"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMouseTracking(True)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.viewport().setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self._hover_row = -1
+
+    def mouseMoveEvent(self, event):
+        # 같은 행 안에서 움직여도 버튼 강조가 바뀌도록 해당 행만 다시 그림
+        index = self.indexAt(event.position().toPoint())
+        for row in {self._hover_row, index.row()}:
+            if row >= 0:
+                self.viewport().update(self.visualRect(self.model().index(row, 0)))
+        self._hover_row = index.row()
+        super().mouseMoveEvent(event)
 
     def leaveEvent(self, event):
-        self.copy_btn.hide()
-        self.delete_btn.hide()
+        if self._hover_row >= 0 and self.model() is not None:
+            self.viewport().update(self.visualRect(self.model().index(self._hover_row, 0)))
+        self._hover_row = -1
         super().leaveEvent(event)
 
-    def mousePressEvent(self, event):
-        self.clicked.emit(self.snippet)
-        super().mousePressEvent(event)
-
 
 class QfredApp(QMainWindow):
     """메인 GUI 애플리케이션"""
@@ -1100,6 +3484,16 @@ class QfredApp(QMainWindow):
         self.setup_tray()
         self.load_snippets_list()
 
+        # 다른 곳에서 스니펫 파일이 바뀌면 변경분만 반영
+        self.file_watcher = SnippetFileWatcher(manager, self)
+        self.file_watcher.reloaded.connect(self.on_external_reload)
+
+    def on_external_reload(self, changed: int):
+        """외부 변경 반영 후 목록 갱신"""
+        if self.selected_id and self.manager.get(self.selected_id) is None:
+            self.on_new()
+        self.load_snippets_list()
+
     def setup_ui(self):
         central = QWidget()
         self.setCentralWidget(central)
@@ -1214,6 +3608,37 @@ class QfredApp(QMainWindow):
         self.search_input.textChanged.connect(self.on_search)
         search_layout.addWidget(self.search_input)
 
+        # 정렬 전환: 목록 순서 ↔ 관련도/사용 횟수순
+        self.rank_btn = QPushButton("★")
+        self.rank_btn.setCheckable(True)
+        self.rank_btn.setChecked(self.app_settings.ranked_search)
+        self.rank_btn.setFixedSize(26, 26)
+        self.rank_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self.rank_btn.setToolTip("관련도 + 자주 쓰는 순으로 정렬")
+        self.rank_btn.setStyleSheet("""
+            QPushButton {
+                background-color: transparent;
+                border: none;
+                border-radius: 4px;
+                color: #64748b;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #334155;
+            }
+            QPushButton:checked {
+                color: #fbbf24;
+            }
+        """)
+        self.rank_btn.toggled.connect(self.on_rank_toggled)
+        search_layout.addWidget(self.rank_btn)
+
+        # 입력이 잠시 멈췄을 때만 검색 (빠르게 칠 때 키마다 다시 찾지 않음)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(lambda: self.load_snippets_list(self.search_input.text()))
+
         sidebar_layout.addWidget(search_frame)
 
         # SAVED SNIPPETS 라벨 + 카운트
@@ -1238,12 +3663,18 @@ class QfredApp(QMainWindow):
 
         sidebar_layout.addLayout(label_frame)
 
-        # 스니펫 리스트 (스크롤)
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
+        # 스니펫 리스트 (모델/뷰 - 보이는 행만 그림)
+        self.snippet_model = SnippetListModel(self.manager, self)
+        self.snippet_model.ranked = self.app_settings.ranked_search
+        self.snippet_delegate = SnippetItemDelegate(self)
+        self.snippet_delegate.clicked.connect(self.on_select)
+        self.snippet_delegate.copyClicked.connect(self.on_copy_snippet)
+        self.snippet_delegate.deleteClicked.connect(self.on_delete_snippet)
+        self.snippet_view = SnippetListView()
+        self.snippet_view.setModel(self.snippet_model)
+        self.snippet_view.setItemDelegate(self.snippet_delegate)
+        self.snippet_view.setStyleSheet("""
+            QListView {
                 background-color: transparent;
                 border: none;
             }
@@ -1268,14 +3699,7 @@ class QfredApp(QMainWindow):
             }
         """)
 
-        self.snippet_list_widget = QWidget()
-        self.snippet_list_layout = QVBoxLayout(self.snippet_list_widget)
-        self.snippet_list_layout.setContentsMargins(0, 0, 0, 0)
-        self.snippet_list_layout.setSpacing(4)
-        self.snippet_list_layout.addStretch()
-
-        scroll_area.setWidget(self.snippet_list_widget)
-        sidebar_layout.addWidget(scroll_area, 1)
+        sidebar_layout.addWidget(self.snippet_view, 1)
 
         # + New 버튼
         new_btn = QPushButton("+ New")
@@ -1771,35 +4195,19 @@ class QfredApp(QMainWindow):
         else:
             QMessageBox.warning(self, '업데이트 실패', '다운로드에 실패했습니다.\n나중에 다시 시도해주세요.')
 
-    def load_snippets_list(self, filter_text=""):
-        """스니펫 리스트 로드"""
-        # 기존 위젯 제거
-        while self.snippet_list_layout.count() > 1:
-            item = self.snippet_list_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
-        filtered = []
-        for snippet in self.manager.snippets:
-            if filter_text:
-                if filter_text.lower() not in snippet["trigger"].lower() and \
-                   filter_text.lower() not in snippet["content"].lower():
-                    continue
-            filtered.append(snippet)
-
-        # 카운트 업데이트
-        self.count_badge.setText(str(len(filtered)))
-
-        # 카드 추가
-        for snippet in filtered:
-            card = SnippetCard(snippet, snippet["id"] == self.selected_id)
-            card.clicked.connect(self.on_select)
-            card.copyClicked.connect(self.on_copy_snippet)
-            card.deleteClicked.connect(self.on_delete_snippet)
-            self.snippet_list_layout.insertWidget(self.snippet_list_layout.count() - 1, card)
+    def load_snippets_list(self, filter_text=None):
+        """스니펫 리스트 다시 읽기 (filter_text가 None이면 현재 검색어 유지)"""
+        self.snippet_model.selected_id = self.selected_id
+        self.snippet_model.reload(filter_text)
+        self.count_badge.setText(str(self.snippet_model.rowCount()))
 
     def on_search(self, text):
-        self.load_snippets_list(text)
+        self.search_timer.start()
+
+    def on_rank_toggled(self, checked):
+        self.app_settings.ranked_search = checked
+        self.snippet_model.ranked = checked
+        self.load_snippets_list()
 
     def on_select(self, snippet):
         """스니펫 선택"""
@@ -1816,7 +4224,8 @@ class QfredApp(QMainWindow):
         if self.current_tab != "snippets":
             self.switch_tab("snippets")
 
-        self.load_snippets_list()
+        # 선택 표시만 바꿈 (목록은 그대로)
+        self.snippet_model.set_selected(self.selected_id)
 
     def on_new(self):
         """새 스니펫"""
@@ -1826,7 +4235,7 @@ class QfredApp(QMainWindow):
         self.content_input.clear()
         self.save_btn.setText("💾  Save")
         self.cancel_btn.hide()
-        self.load_snippets_list()
+        self.snippet_model.set_selected(None)
 
     def on_save(self):
         """저장"""
@@ -1837,20 +4246,15 @@ class QfredApp(QMainWindow):
             return
 
         # 자동 감지: 한글 포함 → 한글 트리거, 그 외 → 그대로 저장
-        has_korean = any('\uAC00' <= c <= '\uD7A3' or '\u3131' <= c <= '\u3163' for c in trigger_input)
-        if has_korean:
-            qwerty_converted = convert_to_qwerty(trigger_input)
-            trigger = convert_to_korean(qwerty_converted)
-        else:
-            trigger = trigger_input
+        trigger = normalize_trigger(trigger_input)
 
+        # 엔진은 SnippetManager 변경 알림으로 증분 갱신됨
         if self.selected_id:
             self.manager.update(self.selected_id, trigger, content)
         else:
             snippet = self.manager.add(trigger, content)
             self.selected_id = snippet["id"]
 
-        self.engine.refresh_triggers()
         self.load_snippets_list()
         self.header_label.setText("Edit Snippet")
         self.save_btn.setText("💾  Update")
@@ -1859,14 +4263,12 @@ class QfredApp(QMainWindow):
     def on_copy_snippet(self, snippet):
         """스니펫 복사"""
         new_trigger = snippet["trigger"] + "_copy"
-        existing = [s["trigger"] for s in self.manager.snippets]
         counter = 1
-        while new_trigger in existing:
+        while self.manager.find_by_trigger(new_trigger):
             new_trigger = f"{snippet['trigger']}_copy{counter}"
             counter += 1
 
         self.manager.add(new_trigger, snippet["content"])
-        self.engine.refresh_triggers()
         self.load_snippets_list()
 
     def on_delete_snippet(self, snippet):
@@ -1878,26 +4280,25 @@ class QfredApp(QMainWindow):
         )
         if reply == QMessageBox.StandardButton.Yes:
             self.manager.delete(snippet["id"])
-            self.engine.refresh_triggers()
             if self.selected_id == snippet["id"]:
                 self.on_new()
-            else:
-                self.load_snippets_list()
+            self.load_snippets_list()
 
     def open_settings(self):
         """설정 창 열기"""
-        dialog = SettingsDialog(self.app_settings, self)
+        dialog = SettingsDialog(self.app_settings, self, manager=self.manager)
         dialog.exec()
 
 
 class SettingsDialog(QDialog):
     """설정 다이얼로그 (앱 설정 + 로컬 저장 설정)"""
 
-    def __init__(self, app_settings, parent=None):
+    def __init__(self, app_settings, parent=None, manager=None):
         super().__init__(parent)
         self.app_settings = app_settings
+        self.manager = manager
         self.setWindowTitle("스니펫 설정")
-        self.setFixedSize(500, 520)
+        self.setFixedSize(500, 640 if manager else 540)
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowType.WindowMaximizeButtonHint)
         self.setSizeGripEnabled(False)
         self.setStyleSheet("""
@@ -2034,6 +4435,66 @@ class SettingsDialog(QDialog):
         self.file_path_label.setWordWrap(True)
         self.update_file_path_label()
         layout.addWidget(self.file_path_label)
+        layout.addSpacing(8)
+
+        # 저장 방식 (재시작 후 적용)
+        self.sqlite_check = QCheckBox("SQLite 저장소 사용 (대용량 라이브러리용, 재시작 후 적용)")
+        self.sqlite_check.setChecked(self.app_settings.storage_backend == 'sqlite')
+        self.sqlite_check.setToolTip("켜면 snippets.json을 snippets.db로 가져오고, 끄면 snippets.db 내용을 "
+                                     "snippets.json으로 옮깁니다 (다음 실행 때).")
+        self.sqlite_check.toggled.connect(self.update_file_path_label)
+        layout.addWidget(self.sqlite_check)
+
+        if self.manager is not None:
+            layout.addSpacing(12)
+            line2 = QFrame()
+            line2.setFrameShape(QFrame.Shape.HLine)
+            line2.setStyleSheet("background-color: #334155;")
+            line2.setFixedHeight(1)
+            layout.addWidget(line2)
+            layout.addSpacing(12)
+
+            # ===== 가져오기/내보내기 섹션 =====
+            io_title = QLabel("가져오기 / 내보내기")
+            io_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #ffffff;")
+            layout.addWidget(io_title)
+            layout.addSpacing(4)
+
+            io_desc = QLabel("CSV / TSV / JSON 파일 (trigger, content 열)")
+            io_desc.setStyleSheet("font-size: 12px; color: #94a3b8;")
+            layout.addWidget(io_desc)
+            layout.addSpacing(4)
+
+            io_frame = QFrame()
+            io_frame.setStyleSheet("QFrame { background: transparent; }")
+            io_layout = QHBoxLayout(io_frame)
+            io_layout.setContentsMargins(0, 0, 0, 0)
+            io_layout.setSpacing(8)
+
+            self.duplicate_combo = QComboBox()
+            self.duplicate_combo.addItem("중복 트리거: 기존 유지", 'skip')
+            self.duplicate_combo.addItem("중복 트리거: 덮어쓰기", 'replace')
+            self.duplicate_combo.addItem("중복 트리거: 이름 바꿔 추가", 'rename')
+            self.duplicate_combo.setFixedHeight(36)
+            self.duplicate_combo.setStyleSheet("""
+                QComboBox {
+                    background-color: #1e293b; border: 1px solid #334155;
+                    border-radius: 6px; padding: 4px 10px; color: #ffffff; font-size: 12px;
+                }
+                QComboBox QAbstractItemView { background-color: #1e293b; color: #ffffff; }
+            """)
+            io_layout.addWidget(self.duplicate_combo, 1)
+
+            import_btn = QPushButton("가져오기")
+            import_btn.setFixedSize(90, 36)
+            import_btn.clicked.connect(self.import_snippets)
+            io_layout.addWidget(import_btn)
+
+            export_btn = QPushButton("내보내기")
+            export_btn.setFixedSize(90, 36)
+            export_btn.clicked.connect(self.export_snippets)
+            io_layout.addWidget(export_btn)
+            layout.addWidget(io_frame)
 
         layout.addStretch()
 
@@ -2062,6 +4523,42 @@ class SettingsDialog(QDialog):
 
         layout.addWidget(btn_frame)
 
+    def import_snippets(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "스니펫 가져오기", "", "스니펫 파일 (*.csv *.tsv *.json);;모든 파일 (*)")
+        if not path:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            report = self.manager.import_file(path, self.duplicate_combo.currentData())
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.warning(self, '가져오기 실패', f"파일을 읽을 수 없습니다.\n\n{e}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        parent = self.parent()
+        if parent is not None and hasattr(parent, 'load_snippets_list'):
+            parent.load_snippets_list()
+        QMessageBox.information(
+            self, '가져오기 완료',
+            f"추가 {report['added']}개 (이름 변경 {report['renamed']}개)\n"
+            f"덮어쓰기 {report['replaced']}개, 건너뜀 {report['skipped']}개, 잘못된 항목 {report['invalid']}개")
+
+    def export_snippets(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "스니펫 내보내기", "snippets.csv", "CSV (*.csv);;TSV (*.tsv);;JSON (*.json)")
+        if not path:
+            return
+        if os.path.splitext(path)[1].lower() not in SNIPPET_FILE_FORMATS:
+            path += '.csv'
+        try:
+            count = self.manager.export_file(path)
+        except Exception as e:
+            QMessageBox.warning(self, '내보내기 실패', str(e))
+            return
+        QMessageBox.information(self, '내보내기 완료', f"{count}개를 저장했습니다.\n{path}")
+
     def browse_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "스니펫 저장 폴더 선택", self.folder_input.text())
         if folder:
@@ -2074,12 +4571,15 @@ class SettingsDialog(QDialog):
 
     def update_file_path_label(self):
         folder = self.folder_input.text()
-        self.file_path_label.setText(f"저장 파일: {os.path.join(folder, 'snippets.json')}")
+        sqlite_check = getattr(self, 'sqlite_check', None)
+        filename = 'snippets.db' if sqlite_check and sqlite_check.isChecked() else 'snippets.json'
+        self.file_path_label.setText(f"저장 파일: {os.path.join(folder, filename)}")
 
     def save_settings(self):
         self.app_settings.start_with_windows = self.startup_check.isChecked()
         self.app_settings.start_minimized = self.minimized_check.isChecked()
         self.app_settings.storage_folder = self.folder_input.text()
+        self.app_settings.storage_backend = 'sqlite' if self.sqlite_check.isChecked() else 'json'
         self.accept()
 
 
@@ -2143,8 +4643,179 @@ class NavButton(QFrame):
         super().mousePressEvent(event)
 
 
-class DownloadWorker(QThread):
-    """yt-dlp 다운로드 워커 스레드"""
+# URL 정규화 시 버리는 추적용 쿼리 파라미터
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'igshid', 'si', 'feature', 'share_source', 'ref', 'ref_src'}
+
+
+def normalize_media_url(url: str) -> str:
+    """같은 영상을 가리키는 URL을 한 키로 (공유 파라미터/조각 제거, YouTube 단축 주소 통일)"""
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return url.strip()
+    scheme = (parsed.scheme or 'https').lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port:
+        host = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip('/') or '/'
+    params = [(k, v) for k, vs in parse_qs(parsed.query, keep_blank_values=True).items() for v in vs
+              if k not in _TRACKING_PARAMS and not k.startswith('utm_')]
+
+    bare = host[4:] if host.startswith('www.') else host
+    if bare in ('youtu.be', 'youtube.com', 'm.youtube.com', 'music.youtube.com'):
+        video_id = None
+        if bare == 'youtu.be':
+            video_id = path.strip('/')
+        elif path.startswith('/shorts/') or path.startswith('/live/'):
+            video_id = path.split('/')[2]
+        elif path == '/watch':
+            video_id = dict(params).get('v')
+        if video_id:
+            return f"https://www.youtube.com/watch?v={video_id}"
+
+    query = "&".join(f"{k}={v}" for k, v in sorted(params))
+    return f"{scheme}://{host}{path}" + (f"?{query}" if query else "")
+
+
+class InfoCache:
+    """yt-dlp 추출 결과 (sanitize_info로 정리한 info dict) TTL 캐시 - 키는 normalize_media_url
+
+    같은 URL로 다시 받거나 (형식만 바꿔서, 일시 정지 후 재개 등) 프레임/텍스트 추출을 할 때
+    페이지 해석을 건너뛴다. 포맷 URL은 서명이 만료되므로 오래 두지 않는다.
+    저장한 dict는 여러 작업이 같이 읽으므로 바꾸지 않는다 - 다운로드에는 _info_for_download 사본을 넘김.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (만료 시각, info)
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        key = normalize_media_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                info = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+        return info
+
+    def put(self, url, info):
+        """info는 저장 후 바꾸지 않아야 함 (_ydl_resolve가 정리한 사본을 넘김)"""
+        # 재생목록 등은 다운로드 때 다시 추출하므로 저장하지 않음
+        if info.get('_type', 'video') != 'video':
+            return
+        key = normalize_media_url(url)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, info)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        with self._lock:
+            self._entries.pop(normalize_media_url(url), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+INFO_CACHE = InfoCache()
+
+
+def _ydl_extract(ydl, url):
+    """추출 + 처리 (방송 대기 _wait_for_video, 형식 선택 등) 후 sanitize_info로 정리해 캐시에 저장"""
+    info = ydl.extract_info(url, download=False)
+    if info.get('_type', 'video') == 'video':
+        # --load-info-json과 같은 형태 (requested_formats 등 처리 결과는 빼고 다시 처리할 수 있게)
+        info = ydl.sanitize_info(info, remove_private_keys=True)
+        INFO_CACHE.put(url, info)
+    return info
+
+
+def _ydl_resolve(ydl, url):
+    """(info, 캐시 사용 여부) - 캐시에 없으면 한 번 추출해서 저장 (info는 읽기 전용)"""
+    info = INFO_CACHE.get(url)
+    if info is not None:
+        return info, True
+    return _ydl_extract(ydl, url), False
+
+
+def _info_for_download(info) -> dict:
+    """process_ie_result에 넘길 사본 - yt-dlp가 처리하면서 바꾸는 부분만 복사
+
+    최상위 dict, formats/thumbnails 항목 (http_headers 포함), 자막 항목. 나머지 값은 캐시와 공유.
+    """
+    info = dict(info)
+    for key in ('formats', 'thumbnails'):
+        if info.get(key):
+            entries = []
+            for entry in info[key]:
+                entry = dict(entry)
+                if isinstance(entry.get('http_headers'), dict):
+                    entry['http_headers'] = dict(entry['http_headers'])
+                entries.append(entry)
+            info[key] = entries
+    for key in ('subtitles', 'automatic_captions'):
+        if info.get(key):
+            info[key] = {lang: [dict(track) for track in tracks] for lang, tracks in info[key].items()}
+    return info
+
+
+def _ydl_download(ydl, url, info, cached=False):
+    """해석된 info로 다운로드 (yt-dlp의 --load-info-json과 같은 경로). 실제로 쓴 info 반환
+
+    info는 이 ydl과 다른 옵션 (영상/오디오/자막)으로 처리한 것이어도 되고, 형식은 여기서 다시 고른다.
+    실패하면 (만료된 포맷 URL, 추출기/HTTP 오류 등) 캐시 항목을 지우고, 캐시된 info였으면
+    한 번만 새로 추출해서 다시 시도한다. 취소는 다시 시도하지 않는다.
+    """
+    if info.get('_type', 'video') != 'video':
+        ydl.download([url])  # 재생목록 등 - 처리된 결과를 다시 쓸 수 없음
+        return info
+    try:
+        ydl.process_ie_result(_info_for_download(info), download=True)
+        return info
+    except yt_dlp.utils.DownloadCancelled:
+        raise
+    except Exception as e:
+        INFO_CACHE.invalidate(url)
+        exc_info = getattr(e, 'exc_info', None)
+        if not cached or (exc_info and isinstance(exc_info[1], yt_dlp.utils.DownloadCancelled)):
+            raise
+    print(f"[Download] 캐시된 정보로 실패, 다시 추출: {url}")
+    info = _ydl_extract(ydl, url)
+    ydl.process_ie_result(_info_for_download(info), download=True)
+    return info
+
+
+def _info_summary(info) -> dict:
+    """info_ready 신호용 제목/길이/썸네일 (thumbnail이 없으면 thumbnails 목록의 마지막)"""
+    duration = info.get('duration')
+    thumbnail = info.get('thumbnail') or ''
+    if not thumbnail and info.get('thumbnails'):
+        thumbnail = info['thumbnails'][-1].get('url', '')
+    return {
+        'title': info.get('title', 'Unknown'),
+        'duration': f"{int(duration) // 60}:{int(duration) % 60:02d}" if duration else "",
+        'thumbnail': thumbnail,
+    }
+
+
+class DownloadWorker(QObject):
+    """yt-dlp 다운로드 작업 - DownloadScheduler의 실행 스레드가 run()을 호출 (신호는 UI 스레드로 전달)"""
     progress = pyqtSignal(dict)   # {'percent': float, 'speed': str, 'eta': str}
     finished = pyqtSignal(dict)   # {'success': bool, 'title': str, 'path': str, 'error': str}
     info_ready = pyqtSignal(dict) # {'title': str, 'duration': str, 'thumbnail': str}
@@ -2153,65 +4824,77 @@ class DownloadWorker(QThread):
         super().__init__()
         self.url = url
         self.output_path = output_path
-        self.mode = mode  # 'video' | 'audio' | 'subtitle'
+        self.mode = mode  # 'video' | 'audio' | 'subtitle' | 'all'
         self._cancelled = False
 
     def cancel(self):
         self._cancelled = True
 
+    def reset(self):
+        """일시 정지 (cancel) 후 다시 실행하기 전에 호출"""
+        self._cancelled = False
+
+    def _ydl_opts(self, mode, ffmpeg_path):
+        """모드별 yt-dlp 옵션"""
+        has_ffmpeg = bool(ffmpeg_path)
+        ydl_opts = {
+            'outtmpl': os.path.join(self.output_path, '%(title)s.%(ext)s'),
+            'quiet': True,
+            'no_warnings': True,
+            'progress_hooks': [self._progress_hook],
+            'noplaylist': True,
+            'continuedl': True,  # 남아 있는 .part 파일은 Range 요청으로 이어받음 (재시작/재개)
+        }
+        if ffmpeg_path:
+            ydl_opts['ffmpeg_location'] = ffmpeg_path
+
+        if mode == 'subtitle':
+            ydl_opts['writesubtitles'] = True
+            ydl_opts['writeautomaticsub'] = True
+            ydl_opts['subtitleslangs'] = ['ko', 'en', 'ja']
+            ydl_opts['subtitlesformat'] = 'srt/ass/vtt/best'
+            ydl_opts['skip_download'] = True
+            if has_ffmpeg:
+                # skip_download면 post_process 단계가 돌지 않으므로 다운로드 전에 변환
+                ydl_opts['postprocessors'] = [{
+                    'key': 'FFmpegSubtitlesConvertor',
+                    'format': 'srt',
+                    'when': 'before_dl',
+                }]
+        elif mode == 'audio':
+            if has_ffmpeg:
+                ydl_opts['format'] = 'bestaudio/best'
+                ydl_opts['postprocessors'] = [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': 'mp3',
+                    'preferredquality': '192',
+                }]
+            else:
+                ydl_opts['format'] = 'bestaudio/best'
+        else:  # video
+            if has_ffmpeg:
+                ydl_opts['format'] = 'bestvideo+bestaudio/best'
+                ydl_opts['merge_output_format'] = 'mp4'
+            else:
+                ydl_opts['format'] = 'best'
+        return ydl_opts
+
+    def _emit_info(self, info):
+        summary = _info_summary(info)
+        self.info_ready.emit(summary)
+        return summary['title']
+
     def run(self):
         try:
             ffmpeg_path = _find_ffmpeg()
-            has_ffmpeg = bool(ffmpeg_path)
-            ydl_opts = {
-                'outtmpl': os.path.join(self.output_path, '%(title)s.%(ext)s'),
-                'quiet': True,
-                'no_warnings': True,
-                'progress_hooks': [self._progress_hook],
-                'noplaylist': True,
-            }
-            if ffmpeg_path:
-                ydl_opts['ffmpeg_location'] = ffmpeg_path
-
-            if self.mode == 'subtitle':
-                ydl_opts['writesubtitles'] = True
-                ydl_opts['writeautomaticsub'] = True
-                ydl_opts['subtitleslangs'] = ['ko', 'en', 'ja']
-                ydl_opts['subtitlesformat'] = 'srt/ass/vtt/best'
-                ydl_opts['skip_download'] = True
-                if has_ffmpeg:
-                    ydl_opts['postprocessors'] = [{
-                        'key': 'FFmpegSubtitlesConvertor',
-                        'format': 'srt',
-                    }]
-            elif self.mode == 'audio':
-                if has_ffmpeg:
-                    ydl_opts['format'] = 'bestaudio/best'
-                    ydl_opts['postprocessors'] = [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }]
-                else:
-                    ydl_opts['format'] = 'bestaudio/best'
-            else:  # video
-                if has_ffmpeg:
-                    ydl_opts['format'] = 'bestvideo+bestaudio/best'
-                    ydl_opts['merge_output_format'] = 'mp4'
-                else:
-                    ydl_opts['format'] = 'best'
+            if self.mode == 'all':
+                self._run_all(ffmpeg_path)
+                return
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # 먼저 정보 추출
-                info = ydl.extract_info(self.url, download=False)
-                title = info.get('title', 'Unknown')
-                duration = info.get('duration')
-                dur_str = f"{int(duration) // 60}:{int(duration) % 60:02d}" if duration else ""
-                self.info_ready.emit({
-                    'title': title,
-                    'duration': dur_str,
-                    'thumbnail': info.get('thumbnail', ''),
-                })
+            with yt_dlp.YoutubeDL(self._ydl_opts(self.mode, ffmpeg_path)) as ydl:
+                # 먼저 정보 추출 (같은 URL을 최근에 해석했으면 캐시 사용)
+                info, cached = _ydl_resolve(ydl, self.url)
+                title = self._emit_info(info)
 
                 if self._cancelled:
                     self.finished.emit({'success': False, 'title': title, 'path': '', 'error': 'Cancelled'})
@@ -2226,8 +4909,8 @@ class DownloadWorker(QThread):
                         return
                     self.progress.emit({'percent': 30.0, 'speed': '', 'eta': ''})
 
-                # 다운로드 실행
-                ydl.download([self.url])
+                # 추출한 info로 바로 다운로드
+                _ydl_download(ydl, self.url, info, cached)
 
             if not self._cancelled:
                 if self.mode == 'subtitle':
@@ -2236,6 +4919,57 @@ class DownloadWorker(QThread):
         except Exception as e:
             self.finished.emit({'success': False, 'title': '', 'path': '', 'error': str(e)})
 
+    def _run_all(self, ffmpeg_path):
+        """영상 + MP3 + 자막: 정보 추출 한 번, 미디어 다운로드 한 번
+
+        추출한 info를 단계마다 다시 쓰고, MP3는 병합된 영상에서 ffmpeg로 뽑는다.
+        자막은 같은 info에서 받으며 실패해도 영상/MP3는 성공으로 둔다.
+        """
+        opts = self._ydl_opts('video', ffmpeg_path)
+        if ffmpeg_path:
+            opts['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }]
+            opts['keepvideo'] = True  # 변환 후 mp4 유지
+            opts['postprocessor_hooks'] = [self._postprocessor_hook]
+        notes = []
+
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info, cached = _ydl_resolve(ydl, self.url)
+            title = self._emit_info(info)
+            if self._cancelled:
+                self.finished.emit({'success': False, 'title': title, 'path': '', 'error': 'Cancelled'})
+                return
+            info = _ydl_download(ydl, self.url, info, cached)
+
+        if not ffmpeg_path:
+            # 변환할 ffmpeg가 없으면 같은 info로 오디오 스트림만 받는다 (추출은 다시 안 함)
+            with yt_dlp.YoutubeDL(self._ydl_opts('audio', '')) as ydl:
+                _ydl_download(ydl, self.url, info)
+
+        if info.get('subtitles') or info.get('automatic_captions'):
+            self.progress.emit({'percent': 100.0, 'speed': '자막', 'eta': ''})
+            try:
+                with yt_dlp.YoutubeDL(self._ydl_opts('subtitle', ffmpeg_path)) as ydl:
+                    _ydl_download(ydl, self.url, info)
+            except Exception as e:
+                if self._cancelled:
+                    raise
+                print(f"[Download] 자막 실패: {e}")
+                notes.append("자막 실패")
+        else:
+            notes.append("자막 없음")
+
+        if not self._cancelled:
+            self.finished.emit({'success': True, 'title': title, 'path': self.output_path,
+                                'error': '', 'note': ", ".join(notes)})
+
+    def _postprocessor_hook(self, d):
+        if d['status'] == 'started' and d.get('postprocessor') == 'ExtractAudio':
+            self.progress.emit({'percent': 100.0, 'speed': 'MP3 변환', 'eta': ''})
+
     def _progress_hook(self, d):
         if self._cancelled:
             raise yt_dlp.utils.DownloadCancelled()
@@ -2247,13 +4981,238 @@ class DownloadWorker(QThread):
                 percent = d.get('downloaded_bytes', 0) / d['total_bytes_estimate'] * 100
             speed = d.get('_speed_str', '').strip()
             eta = d.get('_eta_str', '').strip()
-            self.progress.emit({'percent': percent, 'speed': speed, 'eta': eta})
+            self.progress.emit({'percent': percent, 'speed': speed, 'eta': eta,
+                                'downloaded': d.get('downloaded_bytes', 0),
+                                'total': d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+                                'part': d.get('tmpfilename', '')})
         elif d['status'] == 'finished':
             self.progress.emit({'percent': 100.0, 'speed': '', 'eta': ''})
 
 
-class DouyinDownloadWorker(QThread):
-    """도우인/틱톡 다운로드 워커 (맥미니 Douyin Worker API 경유)"""
+def _format_speed(bps: float) -> str:
+    """yt-dlp와 같은 모양의 속도 문자열 (카드 표시용)"""
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if bps < 1024 or unit == 'GiB':
+            return f"{bps:.2f}{unit}/s"
+        bps /= 1024
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class SegmentedDownloader:
+    """HTTP Range 구간 병렬 다운로더 (도우인 등 직접 파일 URL용)
+
+    파일을 connections개 구간으로 나눠 연결마다 따로 받고, 미리 크기를 잡아 둔 <파일>.part에
+    각자 위치로 바로 쓴다. 진행 상황은 <파일>.part.json에 주기적으로 저장하므로 취소/오류 뒤
+    다시 run()하면 받은 부분은 건너뛴다. 서버가 Range를 지원하지 않으면 연결 하나로 받는다.
+    on_progress(받은 바이트, 전체 바이트, 초당 바이트, 남은 초)는 PROGRESS_INTERVAL마다 한 번.
+    """
+
+    CONNECTIONS = 4
+    MIN_SEGMENT = 1024 * 1024       # 이보다 작은 구간으로는 나누지 않음
+    BUFFER = 256 * 1024
+    PROGRESS_INTERVAL = 0.25        # 초
+    STATE_INTERVAL = 1.0            # 초 - .part.json 저장 주기
+    RETRIES = 3                     # 구간별 재시도 (받은 위치부터)
+
+    def __init__(self, url, path, headers=None, connections=CONNECTIONS,
+                 on_progress=None, is_cancelled=None, timeout=30):
+        self.url = url
+        self.path = path
+        self.part_path = path + '.part'
+        self.state_path = path + '.part.json'
+        self.headers = dict(headers or {})
+        self.connections = max(1, connections)
+        self.on_progress = on_progress
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.timeout = timeout
+        self.total = 0
+        self.resumed_bytes = 0      # 이어받기로 건너뛴 바이트
+        self._segments = []         # [시작, 끝(포함), 받은 바이트]
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _request(self, url, start=None, end=None):
+        headers = dict(self.headers)
+        if start is not None:
+            headers['Range'] = f"bytes={start}-" + (str(end) if end is not None else "")
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout)
+
+    def run(self) -> bool:
+        """다운로드. 완료하면 True, 취소되면 False (이어받기용 .part 유지). 실패는 예외"""
+        self._stop.clear()
+        self._errors = []
+        # 1) Range 지원/전체 크기 확인 - 첫 바이트만 요청
+        resp = self._request(self.url, 0, 0)
+        content_range = resp.headers.get('Content-Range', '')
+        if resp.status != 206 or '/' not in content_range or content_range.endswith('/*'):
+            # Range 미지원: 받은 응답이 곧 전체 파일
+            return self._run_single(resp)
+        resp.read()
+        resp.close()
+        self.total = int(content_range.rsplit('/', 1)[1])
+        url = resp.geturl() or self.url  # 리다이렉트된 최종 주소로 구간 요청
+        validator = resp.headers.get('ETag') or resp.headers.get('Last-Modified') or ''
+
+        # 2) 이어받기 상태 불러오기 / 새로 나누기
+        if not self._load_state(validator):
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+            count = max(1, min(self.connections, self.total // self.MIN_SEGMENT))
+            size = self.total // count
+            self._segments = [[i * size, (i + 1) * size - 1 if i < count - 1 else self.total - 1, 0]
+                              for i in range(count)]
+        self.resumed_bytes = sum(seg[2] for seg in self._segments)
+
+        # 3) 미리 크기 잡아 두기 (구간별로 제자리에 씀)
+        with open(self.part_path, 'r+b' if os.path.exists(self.part_path) else 'wb') as f:
+            f.truncate(self.total)
+        self._save_state(validator)
+
+        threads = []
+        for seg in self._segments:
+            if seg[0] + seg[2] <= seg[1]:
+                t = threading.Thread(target=self._fetch_segment, args=(url, seg), daemon=True,
+                                     name="SegmentFetch")
+                t.start()
+                threads.append(t)
+
+        # 4) 진행 표시 (구간 스레드가 끝날 때까지)
+        started = last = last_state = time.monotonic()
+        last_bytes = self.resumed_bytes
+        speed = 0.0
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(self.PROGRESS_INTERVAL / len(threads))
+            if self.is_cancelled() or self._errors:
+                self._stop.set()
+            now = time.monotonic()
+            done = sum(seg[2] for seg in self._segments)
+            if now - last >= self.PROGRESS_INTERVAL:
+                # 최근 구간 속도에 지수 평균 (ETA가 튀지 않게)
+                current = (done - last_bytes) / (now - last)
+                speed = current if speed == 0 else speed * 0.7 + current * 0.3
+                last, last_bytes = now, done
+                if self.on_progress:
+                    eta = (self.total - done) / speed if speed > 0 else None
+                    self.on_progress(done, self.total, speed, eta)
+            if now - last_state >= self.STATE_INTERVAL:
+                self._save_state(validator)
+                last_state = now
+
+        self._save_state(validator)
+        done = sum(seg[2] for seg in self._segments)
+        if done != self.total:
+            if self._errors:
+                raise self._errors[0]
+            if self._stop.is_set() or self.is_cancelled():
+                return False
+            raise IOError(f"다운로드 크기 불일치 ({done}/{self.total})")
+        os.replace(self.part_path, self.path)
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+        if self.on_progress:
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.on_progress(self.total, self.total, (self.total - self.resumed_bytes) / elapsed, 0)
+        return True
+
+    def _fetch_segment(self, url, seg):
+        buf = bytearray(self.BUFFER)
+        view = memoryview(buf)
+        attempts = 0
+        with open(self.part_path, 'r+b', buffering=0) as f:
+            while seg[0] + seg[2] <= seg[1] and not self._stop.is_set():
+                pos = seg[0] + seg[2]
+                try:
+                    with self._request(url, pos, seg[1]) as resp:
+                        if resp.status != 206:
+                            raise IOError("서버가 구간 요청을 무시했습니다")
+                        f.seek(pos)
+                        while not self._stop.is_set():
+                            n = resp.readinto(view[:min(self.BUFFER, seg[1] - seg[0] - seg[2] + 1)])
+                            if not n:
+                                break
+                            f.write(view[:n])
+                            seg[2] += n
+                    if seg[0] + seg[2] <= seg[1] and not self._stop.is_set():
+                        raise IOError("연결이 일찍 끊겼습니다")
+                except Exception as e:
+                    attempts += 1
+                    if self._stop.is_set():
+                        return
+                    if attempts > self.RETRIES:
+                        self._errors.append(e)
+                        return
+                    print(f"[Segment] {pos}-{seg[1]} 재시도 {attempts}: {e}")
+                    time.sleep(0.5 * attempts)
+
+    def _run_single(self, resp):
+        """Range 미지원 서버: 연결 하나로 처음부터 받는다 (이어받기 없음)"""
+        with resp:
+            self.total = int(resp.headers.get('Content-Length') or 0)
+            buf = bytearray(self.BUFFER)
+            view = memoryview(buf)
+            done = 0
+            started = last = time.monotonic()
+            with open(self.part_path, 'wb') as f:
+                while True:
+                    if self.is_cancelled():
+                        return False
+                    n = resp.readinto(view)
+                    if not n:
+                        break
+                    f.write(view[:n])
+                    done += n
+                    now = time.monotonic()
+                    if self.on_progress and now - last >= self.PROGRESS_INTERVAL:
+                        last = now
+                        speed = done / (now - started)
+                        eta = (self.total - done) / speed if self.total and speed > 0 else None
+                        self.on_progress(done, self.total, speed, eta)
+        if self.total and done != self.total:
+            raise IOError(f"다운로드 크기 불일치 ({done}/{self.total})")
+        self.total = done
+        os.replace(self.part_path, self.path)
+        return True
+
+    def _load_state(self, validator) -> bool:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get('total') != self.total or state.get('validator', '') != validator
+                    or not os.path.exists(self.part_path)
+                    or os.path.getsize(self.part_path) != self.total):
+                return False
+            self._segments = [[int(a), int(b), int(d)] for a, b, d in state['segments']]
+            return bool(self._segments)
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _save_state(self, validator):
+        state = {
+            'url': self.url,
+            'total': self.total,
+            'validator': validator,
+            'segments': [list(seg) for seg in self._segments],
+        }
+        tmp = self.state_path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            print(f"[Segment] 상태 저장 실패: {e}")
+
+
+class DouyinDownloadWorker(QObject):
+    """도우인/틱톡 다운로드 작업 (맥미니 Douyin Worker API 경유) - DownloadWorker와 같은 방식으로 실행"""
     progress = pyqtSignal(dict)
     finished = pyqtSignal(dict)
     info_ready = pyqtSignal(dict)
@@ -2265,10 +5224,14 @@ class DouyinDownloadWorker(QThread):
         self.url = url
         self.output_path = output_path
         self._cancelled = False
+        self._part_path = ''
 
     def cancel(self):
         self._cancelled = True
 
+    def reset(self):
+        self._cancelled = False
+
     def run(self):
         try:
             # 1) 도우인 워커에서 영상 정보 가져오기
@@ -2327,28 +5290,15 @@ class DouyinDownloadWorker(QThread):
             os.makedirs(self.output_path, exist_ok=True)
             file_path = os.path.join(self.output_path, f"{safe_title}.mp4")
 
-            req2 = urllib.request.Request(download_url, headers={
+            # 여러 연결로 구간을 나눠 받고, 중간에 멈췄으면 받은 부분부터 이어받음
+            self._part_path = file_path + '.part'
+            downloader = SegmentedDownloader(download_url, file_path, headers={
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
                 'Referer': 'https://www.douyin.com/',
-            })
-            with urllib.request.urlopen(req2, timeout=120) as resp2:
-                total = int(resp2.headers.get('Content-Length', 0))
-                downloaded = 0
-                block = 8192
-                with open(file_path, 'wb') as f:
-                    while True:
-                        if self._cancelled:
-                            self.finished.emit({'success': False, 'title': safe_title, 'path': '', 'error': 'Cancelled'})
-                            return
-                        chunk = resp2.read(block)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total > 0:
-                            pct = downloaded / total * 100
-                            speed = ""
-                            self.progress.emit({'percent': pct, 'speed': speed, 'eta': ''})
+            }, on_progress=self._on_progress, is_cancelled=lambda: self._cancelled)
+            if not downloader.run():
+                self.finished.emit({'success': False, 'title': safe_title, 'path': '', 'error': 'Cancelled'})
+                return
 
             self.progress.emit({'percent': 100.0, 'speed': '', 'eta': ''})
             self.finished.emit({'success': True, 'title': safe_title, 'path': self.output_path, 'error': ''})
@@ -2356,10 +5306,390 @@ class DouyinDownloadWorker(QThread):
         except Exception as e:
             self.finished.emit({'success': False, 'title': '', 'path': '', 'error': str(e)})
 
+    def _on_progress(self, done, total, speed, eta):
+        pct = done / total * 100 if total else 0.0
+        self.progress.emit({
+            'percent': pct,
+            'speed': _format_speed(speed) if speed else '',
+            'eta': _format_eta(eta) if eta is not None else '',
+            'downloaded': done,
+            'total': total,
+            'part': self._part_path,
+        })
+
+
+def download_host(url: str) -> str:
+    """호스트별 동시 다운로드 제한용 키 (소문자, www. 제외)"""
+    try:
+        host = (urlparse(url).hostname or "").lower()
+    except ValueError:
+        host = ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class DownloadScheduler(QObject):
+    """다운로드 대기열 - 전체/호스트별 동시 실행 수 제한, 우선순위, 일시 정지
+
+    submit()으로 넣은 워커 (DownloadWorker 등 - run()/cancel()/reset()과 finished 신호가 있는 QObject)의
+    run()을 미리 띄워 둔 실행 스레드에서 호출한다 (작업마다 스레드를 새로 만들지 않음). 우선순위가 높은 것부터, 같으면 넣은 순서대로.
+    실행 중인 작업을 일시 정지하면 워커를 cancel()로 멈추고 대기열에 다시 둔다.
+    워커의 finished 결과는 일시 정지로 멈춘 경우를 빼고 finished(item_id, 결과)로 전달한다.
+    """
+    queued = pyqtSignal(str)          # item_id - 대기열에 들어감 (재개 포함)
+    started = pyqtSignal(str)         # item_id - 실행 시작
+    paused = pyqtSignal(str)          # item_id - 일시 정지됨
+    finished = pyqtSignal(str, dict)  # item_id, 워커 결과
+
+    def __init__(self, max_concurrent: int = 3, per_host: int = 2, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_host = max(1, per_host)
+        self._jobs = {}        # item_id -> {"worker", "host", "priority", "seq", "state", "result"}
+        self._heap = []        # (-우선순위, 순번, item_id) - 바뀐 항목은 꺼낼 때 버림
+        self._seq = itertools.count()
+        self._host_running = Counter()
+        self._running = 0
+        self._runners = []
+        self._paused_all = False
+        self._stopping = False
+        self._cond = threading.Condition()
+
+    # ===== 대기열 조작 (UI 스레드) =====
+
+    def submit(self, item_id: str, worker, url: str, priority: int = 0, paused: bool = False):
+        """작업 추가. paused=True면 일시 정지 상태로 넣음 (resume 전까지 시작 안 함)"""
+        job = {"worker": worker, "host": download_host(url), "priority": priority,
+               "seq": next(self._seq), "state": 'paused' if paused else 'queued', "result": None}
+        # 결과는 실행 스레드에서 바로 받아 두고, 일시 정지가 아닐 때만 내보냄
+        worker.finished.connect(lambda result, j=job: j.__setitem__("result", result),
+                                Qt.ConnectionType.DirectConnection)
+        with self._cond:
+            self._jobs[item_id] = job
+            if not paused:
+                self._push(item_id, job)
+            self._ensure_runners()
+            self._cond.notify_all()
+        if paused:
+            self.paused.emit(item_id)
+        else:
+            self.queued.emit(item_id)
+
+    def cancel(self, item_id: str) -> str:
+        """작업 취소 - 취소 전 상태 반환 ('running'이면 워커가 멈춘 뒤 finished가 옴, 없으면 '')"""
+        with self._cond:
+            job = self._jobs.get(item_id)
+            if job is None:
+                return ''
+            state = job["state"]
+            if state in ('running', 'pausing', 'resuming'):
+                job["state"] = 'cancelled'
+                job["worker"].cancel()
+                return 'running'
+            del self._jobs[item_id]
+            return state
+
+    def pause(self, item_id: str):
+        with self._cond:
+            job = self._jobs.get(item_id)
+            if job is None or job["state"] in ('paused', 'pausing', 'cancelled'):
+                return
+            if job["state"] == 'resuming':
+                job["state"] = 'pausing'
+                return
+            if job["state"] == 'running':
+                job["state"] = 'pausing'
+                job["worker"].cancel()
+                return  # 워커가 멈추면 paused 신호
+            job["state"] = 'paused'
+        self.paused.emit(item_id)
+
+    def resume(self, item_id: str):
+        with self._cond:
+            job = self._jobs.get(item_id)
+            if job is None or job["state"] not in ('paused', 'pausing'):
+                return
+            if job["state"] == 'pausing':
+                job["state"] = 'resuming'  # 아직 멈추기 전 - 멈추면 바로 대기열로
+                return
+            job["state"] = 'queued'
+            self._push(item_id, job)
+            self._cond.notify_all()
+        self.queued.emit(item_id)
+
+    def pause_all(self):
+        """새 작업 시작을 멈추고 실행 중인 작업도 일시 정지"""
+        with self._cond:
+            self._paused_all = True
+            ids = [item_id for item_id, job in self._jobs.items() if job["state"] in ('queued', 'running')]
+        for item_id in ids:
+            self.pause(item_id)
+
+    def resume_all(self):
+        with self._cond:
+            self._paused_all = False
+            ids = [item_id for item_id, job in self._jobs.items() if job["state"] in ('paused', 'pausing')]
+            self._cond.notify_all()
+        for item_id in ids:
+            self.resume(item_id)
+
+    @property
+    def paused_all(self) -> bool:
+        return self._paused_all
+
+    def set_priority(self, item_id: str, priority: int):
+        with self._cond:
+            job = self._jobs.get(item_id)
+            if job is None:
+                return
+            job["priority"] = priority
+            if job["state"] == 'queued':
+                self._push(item_id, job)
+                self._cond.notify_all()
+
+    def top_priority(self) -> int:
+        with self._cond:
+            return max((job["priority"] for job in self._jobs.values()), default=0)
+
+    def set_limits(self, max_concurrent: int, per_host: int):
+        with self._cond:
+            self.max_concurrent = max(1, max_concurrent)
+            self.per_host = max(1, per_host)
+            self._ensure_runners()
+            self._cond.notify_all()
+
+    def state(self, item_id: str):
+        """'queued' | 'running' | 'pausing' | 'resuming' | 'paused' | 'cancelled' | None (없음/끝남)"""
+        job = self._jobs.get(item_id)
+        return job["state"] if job else None
+
+    def active_count(self) -> int:
+        return self._running
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(1 for job in self._jobs.values() if job["state"] == 'queued')
+
+    def shutdown(self, timeout: float = 2.0):
+        """실행 중인 워커를 모두 멈추고 실행 스레드 종료 (전체 timeout초까지 대기)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._stopping = True
+            for job in self._jobs.values():
+                if job["state"] in ('running', 'pausing', 'resuming'):
+                    job["worker"].cancel()
+            self._cond.notify_all()
+        for runner in self._runners:
+            runner.join(max(0.0, deadline - time.monotonic()))
+
+    # ===== 실행 스레드 =====
+
+    def _push(self, item_id: str, job: dict):
+        heapq.heappush(self._heap, (-job["priority"], job["seq"], item_id))
+
+    def _ensure_runners(self):
+        while len(self._runners) < self.max_concurrent:
+            runner = threading.Thread(target=self._run, name=f"DownloadRunner-{len(self._runners) + 1}",
+                                      daemon=True)
+            self._runners.append(runner)
+            runner.start()
+
+    def _take(self):
+        """시작할 수 있는 가장 앞선 작업 (_cond 보유 상태에서 호출)"""
+        if self._stopping or self._paused_all or self._running >= self.max_concurrent:
+            return None, None
+        skipped = []
+        found = (None, None)
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            neg_priority, seq, item_id = entry
+            job = self._jobs.get(item_id)
+            if job is None or job["state"] != 'queued' or job["seq"] != seq or -neg_priority != job["priority"]:
+                continue  # 취소/일시 정지/우선순위 변경으로 무효
+            if self._host_running[job["host"]] >= self.per_host:
+                skipped.append(entry)
+                continue
+            found = (item_id, job)
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    item_id, job = self._take()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                job["state"] = 'running'
+                job["result"] = None
+                self._running += 1
+                self._host_running[job["host"]] += 1
+            self._run_job(item_id, job)
+
+    def _run_job(self, item_id: str, job: dict):
+        """작업 하나 실행 - 워커가 예외를 내도 실패로 끝내고 호스트 자리를 돌려준다"""
+        state = 'done'
+        try:
+            with self._cond:
+                # 시작 전에 일시 정지/종료로 cancel()된 워커는 그대로 둠 (바로 멈춤)
+                if job["state"] == 'running' and not self._stopping:
+                    job["worker"].reset()  # 일시 정지 후 재개한 워커
+            self.started.emit(item_id)
+            job["worker"].run()
+        except Exception as e:
+            print(f"[Download] 작업 실패 ({item_id}): {e}")
+            job["result"] = {'success': False, 'title': '', 'path': '', 'error': str(e)}
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._host_running[job["host"]] -= 1
+                state = job["state"]
+                completed = bool(job["result"] and job["result"].get('success'))
+                if state == 'pausing' and not completed:
+                    job["state"] = 'paused'
+                elif state == 'resuming' and not completed:
+                    job["state"] = 'queued'  # 멈추는 사이에 재개됨
+                    self._push(item_id, job)
+                else:
+                    state = 'done'
+                    self._jobs.pop(item_id, None)
+                self._cond.notify_all()
+
+            if state == 'pausing':
+                self.paused.emit(item_id)
+            elif state == 'resuming':
+                self.queued.emit(item_id)
+            else:
+                self.finished.emit(item_id, job["result"] or {'success': False, 'title': '', 'path': '',
+                                                               'error': 'Cancelled'})
+
+
+DOWNLOAD_JOBS_FILE = os.path.join(APP_DIR, "download_jobs.json")
+
+# 받던 파일 (<이름>.part)과 함께 남는 임시 파일: .part.json (구간 정보), .ytdl (조각 상태),
+# .part-FragN (조각), 조각의 .part
+_PARTIAL_SUFFIX = re.compile(r"\.(part(-Frag\d+(\.part)?)?(\.json)?|ytdl)$")
+
+
+def download_partial_files(part: str) -> list:
+    """part (<이름>.part) 다운로드가 남긴 임시 파일 전부 (<이름>.* 중 임시 파일 형식만)"""
+    base = part[:-len('.part')] if part.endswith('.part') else part
+    return [path for path in glob.glob(glob.escape(base) + '.*')
+            if _PARTIAL_SUFFIX.fullmatch(path[len(base):])]
+
+
+class DownloadJournal:
+    """끝나지 않은 다운로드 작업 기록 (download_jobs.json) - 종료/비정상 종료 후 대기열 복원용
+
+    작업마다 URL, 모드, 저장 경로, 받은 바이트, 임시 (.part) 파일을 남긴다. 이어받기 자체는
+    파일 쪽에서 한다: yt-dlp는 continuedl로 .part 파일 뒤에 Range로 이어 쓰고,
+    도우인은 SegmentedDownloader가 <파일>.part.json의 구간 정보로 이어받는다.
+    진행률 갱신이 잦아도 쓰기는 JsonPersister로 모아서 몇 초에 한 번만 한다.
+    형식: {"version": 1, "jobs": [{"id", "url", "mode", "output_path", "options", "title",
+           "priority", "state", "bytes_done", "total", "part_files", "added"}]}
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path = path or DOWNLOAD_JOBS_FILE
+        self.jobs = OrderedDict()  # item_id -> 작업 dict
+        self._parts = {}           # item_id -> {part 파일: 받은 바이트}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for job in data.get("jobs", []):
+                    if job.get("id") and job.get("url"):
+                        self.jobs[job["id"]] = job
+                        self._parts[job["id"]] = {p: 0 for p in job.get("part_files", [])}
+            except:
+                print(f"[Journal] {path} 읽기 실패 - 무시")
+        self._persister = JsonPersister(path, generations=0, delay=1.0, max_delay=5.0)
+
+    def _schedule(self):
+        self._persister.schedule({"version": 1, "jobs": [dict(job) for job in self.jobs.values()]})
+
+    def add(self, item_id: str, url: str, mode: str, output_path: str, options=None, priority: int = 0):
+        with self._lock:
+            old = self.jobs.get(item_id, {})
+            self.jobs[item_id] = {
+                "id": item_id,
+                "url": url,
+                "mode": mode,
+                "output_path": output_path,
+                "options": options or {},
+                "title": old.get("title", ""),
+                "priority": priority,
+                "state": 'queued',
+                "bytes_done": old.get("bytes_done", 0),
+                "total": old.get("total", 0),
+                "part_files": old.get("part_files", []),
+                "added": old.get("added", time.time()),
+            }
+            self._parts.setdefault(item_id, {})
+            self._schedule()
+
+    def update(self, item_id: str, **fields):
+        with self._lock:
+            job = self.jobs.get(item_id)
+            if job is None or all(job.get(k) == v for k, v in fields.items()):
+                return
+            job.update(fields)
+            self._schedule()
+
+    def progress(self, item_id: str, p: dict):
+        """워커 progress 신호 (downloaded/total/part 키가 있을 때만 기록)"""
+        part = p.get('part')
+        if not part:
+            return
+        with self._lock:
+            job = self.jobs.get(item_id)
+            if job is None:
+                return
+            parts = self._parts.setdefault(item_id, {})
+            parts[part] = p.get('downloaded', 0)
+            job["bytes_done"] = sum(parts.values())
+            job["total"] = p.get('total', 0) or job["total"]
+            if part not in job["part_files"]:
+                job["part_files"] = job["part_files"] + [part]
+            self._schedule()
+
+    def remove(self, item_id: str, delete_parts: bool = False):
+        """기록 삭제. delete_parts면 남은 임시 파일도 지움 (사용자가 취소한 경우)"""
+        with self._lock:
+            job = self.jobs.pop(item_id, None)
+            self._parts.pop(item_id, None)
+            if job is None:
+                return
+            self._schedule()
+        if delete_parts:
+            for part in job.get("part_files", []):
+                for path in download_partial_files(part):
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        print(f"[Journal] 임시 파일 삭제 실패: {e}")
+
+    def pending(self) -> list:
+        with self._lock:
+            return [dict(job) for job in self.jobs.values()]
+
+    def flush(self):
+        self._persister.flush()
+
+    def close(self):
+        self._persister.stop()
+
 
 class DownloadItemCard(QFrame):
     """다운로드 큐 아이템 카드"""
-    cancelClicked = pyqtSignal(str)  # item_id
+    cancelClicked = pyqtSignal(str)    # item_id
+    pauseClicked = pyqtSignal(str)     # item_id (일시 정지/재개 전환)
+    priorityClicked = pyqtSignal(str)  # item_id (대기열 맨 앞으로)
 
     def __init__(self, item_id, url, output_path="", parent=None):
         super().__init__(parent)
@@ -2392,6 +5722,27 @@ class DownloadItemCard(QFrame):
         self.status_label.setStyleSheet("color: #94a3b8; font-size: 11px; border: none; background: transparent;")
         top.addWidget(self.status_label)
 
+        small_btn_style = """
+            QPushButton { background: transparent; border: none; color: #64748b; font-size: 12px; }
+            QPushButton:hover { color: #e2e8f0; }
+        """
+        self.priority_btn = QPushButton("\u21e7")
+        self.priority_btn.setFixedSize(20, 20)
+        self.priority_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self.priority_btn.setToolTip("먼저 받기")
+        self.priority_btn.setStyleSheet(small_btn_style)
+        self.priority_btn.clicked.connect(lambda: self.priorityClicked.emit(self.item_id))
+        self.priority_btn.hide()
+        top.addWidget(self.priority_btn)
+
+        self.pause_btn = QPushButton("\u23f8")
+        self.pause_btn.setFixedSize(20, 20)
+        self.pause_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self.pause_btn.setToolTip("일시 정지")
+        self.pause_btn.setStyleSheet(small_btn_style)
+        self.pause_btn.clicked.connect(lambda: self.pauseClicked.emit(self.item_id))
+        top.addWidget(self.pause_btn)
+
         self.cancel_btn = QPushButton("\u2715")
         self.cancel_btn.setFixedSize(20, 20)
         self.cancel_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
@@ -2435,6 +5786,29 @@ class DownloadItemCard(QFrame):
         self.title_label.setText(display)
         self.title_label.setToolTip(title)
 
+    def set_queued(self):
+        self.status_label.setText("대기열")
+        self.status_label.setStyleSheet("color: #94a3b8; font-size: 11px; border: none; background: transparent;")
+        self.speed_label.setText("")
+        self.pause_btn.setText("\u23f8")
+        self.pause_btn.setToolTip("일시 정지")
+        self.priority_btn.show()
+
+    def set_started(self):
+        self.status_label.setText("시작")
+        self.status_label.setStyleSheet("color: #4a946c; font-size: 11px; border: none; background: transparent;")
+        self.pause_btn.setText("\u23f8")
+        self.pause_btn.setToolTip("일시 정지")
+        self.priority_btn.hide()
+
+    def set_paused(self):
+        self.status_label.setText("일시정지")
+        self.status_label.setStyleSheet("color: #f59e0b; font-size: 11px; border: none; background: transparent;")
+        self.speed_label.setText("")
+        self.pause_btn.setText("\u25b6")
+        self.pause_btn.setToolTip("재개")
+        self.priority_btn.hide()
+
     def set_progress(self, percent, speed="", eta=""):
         self.progress_bar.setValue(int(percent))
         self.status_label.setText("다운로드 중")
@@ -2444,13 +5818,15 @@ class DownloadItemCard(QFrame):
             info += f" | {eta}"
         self.speed_label.setText(info)
 
-    def set_finished(self, success, error=""):
+    def set_finished(self, success, error="", note=""):
         self.cancel_btn.hide()
+        self.pause_btn.hide()
+        self.priority_btn.hide()
         if success:
             self.progress_bar.setValue(100)
             self.status_label.setText("완료")
             self.status_label.setStyleSheet("color: #34d399; font-size: 11px; border: none; background: transparent;")
-            self.speed_label.setText("")
+            self.speed_label.setText(note)
             self.progress_bar.setStyleSheet("""
                 QProgressBar { background-color: #334155; border: none; border-radius: 3px; }
                 QProgressBar::chunk { background-color: #34d399; border-radius: 3px; }
@@ -2484,13 +5860,15 @@ class DownloadItemCard(QFrame):
 
     def set_cancelled(self):
         self.cancel_btn.hide()
+        self.pause_btn.hide()
+        self.priority_btn.hide()
         self.status_label.setText("취소됨")
         self.status_label.setStyleSheet("color: #f59e0b; font-size: 11px; border: none; background: transparent;")
         self.speed_label.setText("")
 
 
-class FrameExtractWorker(QThread):
-    """영상에서 프레임 이미지 추출 워커 (yt-dlp 다운로드 → ffmpeg 추출)"""
+class FrameExtractWorker(QObject):
+    """영상에서 프레임 이미지 추출 작업 (yt-dlp 다운로드 → ffmpeg 추출) - DownloadWorker와 같은 방식으로 실행"""
     progress = pyqtSignal(dict)
     finished = pyqtSignal(dict)
     info_ready = pyqtSignal(dict)
@@ -2506,6 +5884,9 @@ class FrameExtractWorker(QThread):
     def cancel(self):
         self._cancelled = True
 
+    def reset(self):
+        self._cancelled = False
+
     def run(self):
         try:
             ffmpeg_bin = _find_ffmpeg()
@@ -2528,18 +5909,17 @@ class FrameExtractWorker(QThread):
             }
 
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-                title = info.get('title', 'Unknown')
-                duration = info.get('duration') or 0
-                dur_str = f"{int(duration) // 60}:{int(duration) % 60:02d}" if duration else ""
-                self.info_ready.emit({'title': title, 'duration': dur_str, 'thumbnail': info.get('thumbnail', '')})
+                info, cached = _ydl_resolve(ydl, self.url)
+                summary = _info_summary(info)
+                title = summary['title']
+                self.info_ready.emit(summary)
 
                 if self._cancelled:
                     self._cleanup(tmp_dir)
                     self.finished.emit({'success': False, 'title': title, 'path': '', 'error': 'Cancelled'})
                     return
 
-                ydl.download([self.url])
+                _ydl_download(ydl, self.url, info, cached)
 
             if self._cancelled:
                 self._cleanup(tmp_dir)
@@ -2771,17 +6151,16 @@ class TextExtractWorker(QThread):
             }
 
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-                title = info.get('title', 'Unknown')
-                duration = info.get('duration') or 0
-                dur_str = f"{int(duration) // 60}:{int(duration) % 60:02d}" if duration else ""
-                self.info_ready.emit({'title': title, 'duration': dur_str, 'thumbnail': info.get('thumbnail', '')})
+                info, cached = _ydl_resolve(ydl, self.url)
+                summary = _info_summary(info)
+                title = summary['title']
+                self.info_ready.emit(summary)
 
                 if self._cancelled:
                     self._cleanup(tmp_dir)
                     self.finished.emit({'success': False, 'title': title, 'path': '', 'error': 'Cancelled'})
                     return
-                ydl.download([self.url])
+                _ydl_download(ydl, self.url, info, cached)
 
             if self._cancelled:
                 self._cleanup(tmp_dir)
@@ -3108,7 +6487,7 @@ class DownloaderSettingsDialog(QDialog):
         super().__init__(parent)
         self.app_settings = app_settings
         self.setWindowTitle("다운로더 설정")
-        self.setFixedSize(500, 480)
+        self.setFixedSize(500, 560)
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowType.WindowMaximizeButtonHint)
         self.setSizeGripEnabled(False)
         self.setStyleSheet("""
@@ -3161,6 +6540,46 @@ class DownloaderSettingsDialog(QDialog):
         browse_btn.clicked.connect(self._browse_folder)
         ffl.addWidget(browse_btn)
         layout.addWidget(ff)
+        layout.addSpacing(12)
+
+        # 동시 다운로드 수
+        cl = QLabel("동시 다운로드")
+        cl.setStyleSheet("font-size: 12px; color: #94a3b8;")
+        layout.addWidget(cl)
+        layout.addSpacing(4)
+
+        combo_style = """
+            QComboBox {
+                background-color: #1e293b; border: 1px solid #334155;
+                border-radius: 6px; padding: 4px 10px; color: #ffffff; font-size: 12px;
+            }
+            QComboBox QAbstractItemView { background-color: #1e293b; color: #ffffff; }
+        """
+        cf = QHBoxLayout()
+        cf.setSpacing(8)
+        total_label = QLabel("전체")
+        total_label.setStyleSheet("font-size: 12px;")
+        cf.addWidget(total_label)
+        self.concurrency_combo = QComboBox()
+        self.concurrency_combo.setStyleSheet(combo_style)
+        self.concurrency_combo.setFixedSize(70, 32)
+        for n in range(1, 9):
+            self.concurrency_combo.addItem(str(n), n)
+        self.concurrency_combo.setCurrentIndex(max(0, min(7, self.app_settings.download_concurrency - 1)))
+        cf.addWidget(self.concurrency_combo)
+        cf.addSpacing(16)
+        host_label = QLabel("사이트당")
+        host_label.setStyleSheet("font-size: 12px;")
+        cf.addWidget(host_label)
+        self.per_host_combo = QComboBox()
+        self.per_host_combo.setStyleSheet(combo_style)
+        self.per_host_combo.setFixedSize(70, 32)
+        for n in range(1, 9):
+            self.per_host_combo.addItem(str(n), n)
+        self.per_host_combo.setCurrentIndex(max(0, min(7, self.app_settings.download_per_host - 1)))
+        cf.addWidget(self.per_host_combo)
+        cf.addStretch()
+        layout.addLayout(cf)
         layout.addSpacing(16)
 
         # 구분선
@@ -3302,6 +6721,8 @@ class DownloaderSettingsDialog(QDialog):
 
     def _save(self):
         self.app_settings.download_folder = self.dl_folder_input.text()
+        self.app_settings.download_concurrency = self.concurrency_combo.currentData()
+        self.app_settings.download_per_host = self.per_host_combo.currentData()
         groups = []
         for i in range(self.group_list.count()):
             text = self.group_list.item(i).text()
@@ -3353,9 +6774,25 @@ class DownloaderPage(QWidget):
         self.setStyleSheet("background-color: #0f172a;")
         self.workers = {}  # item_id -> DownloadWorker
         self.cards = {}    # item_id -> DownloadItemCard
+        self._cancelled = set()  # 사용자가 취소한 item_id (이후 결과로 카드 덮어쓰지 않음)
         self.queue_count = 0
         self.empty_widget = None
+
+        # 동시 다운로드 수 제한 (설정: 전체 / 호스트별)
+        self.scheduler = DownloadScheduler(
+            app_settings.download_concurrency if app_settings else 3,
+            app_settings.download_per_host if app_settings else 2,
+            self)
+        self.scheduler.queued.connect(lambda iid: self._card_call(iid, 'set_queued', 'queued'))
+        self.scheduler.started.connect(lambda iid: self._card_call(iid, 'set_started', 'running'))
+        self.scheduler.paused.connect(self._on_paused)
+        self.scheduler.finished.connect(self._on_finished)
+
+        # 끝나지 않은 작업 기록 (재시작하면 대기열 복원)
+        self.journal = DownloadJournal()
+        self._closing = False
         self.setup_ui()
+        self._restore_jobs()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -3503,6 +6940,20 @@ class DownloaderPage(QWidget):
         q_label.setStyleSheet("font-size: 10px; font-weight: bold; color: #64748b;")
         q_header.addWidget(q_label)
         q_header.addStretch()
+        self.pause_all_btn = QPushButton("\u23f8 모두 일시정지")
+        self.pause_all_btn.setCheckable(True)
+        self.pause_all_btn.setFixedHeight(22)
+        self.pause_all_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self.pause_all_btn.setStyleSheet("""
+            QPushButton {
+                background: transparent; border: none; color: #64748b;
+                font-size: 10px; font-weight: bold; padding: 0 8px;
+            }
+            QPushButton:hover { color: #e2e8f0; }
+            QPushButton:checked { color: #f59e0b; }
+        """)
+        self.pause_all_btn.toggled.connect(self._on_pause_all)
+        q_header.addWidget(self.pause_all_btn)
         self.q_count = QLabel("0")
         self.q_count.setFixedSize(22, 22)
         self.q_count.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -3665,32 +7116,23 @@ class DownloaderPage(QWidget):
             interval = dlg.interval
             img_format = dlg.img_format
 
-            # 상태 바
-            self.status_dot.setStyleSheet("color: #4a946c; font-size: 8px; border: none; background: transparent;")
-            self.status_text.setText("이미지 추출 중...")
+            # 상태 바 (진행 상태는 대기열에 넣을 때 갱신)
             self.path_label.setText(f"저장: {output_path}")
 
-            item_id = str(uuid.uuid4())[:8]
-            card = DownloadItemCard(item_id, url, output_path=output_path)
-            card.set_title(f"이미지 추출 준비 중... [{img_format.upper()}]")
-            card.cancelClicked.connect(self.on_cancel)
-            self.queue_layout.insertWidget(self.queue_layout.count() - 1, card)
-            self.cards[item_id] = card
-            self.queue_count += 1
-            self.q_count.setText(str(self.queue_count))
-
-            worker = FrameExtractWorker(url, output_path, interval, img_format)
-            worker.info_ready.connect(lambda info, c=card: c.set_title(f"🖼 {info['title']}"))
-            worker.progress.connect(lambda p, c=card: c.set_progress(p['percent'], p.get('speed', ''), p.get('eta', '')))
-            worker.finished.connect(lambda r, iid=item_id: self._on_finished(iid, r))
-            self.workers[item_id] = worker
-            worker.start()
+            self._start_job('frames', url, output_path,
+                            options={'interval': interval, 'img_format': img_format})
             return
 
 
+        is_douyin = any(k in url.lower() for k in ['douyin.com', 'v.douyin.com', 'tiktok.com', 'vt.tiktok.com'])
+
         # 모드 결정: 0=video, 1=audio, 2=subtitle, 3=all
-        if fmt_index == 3:
+        if fmt_index == 3 and is_douyin:
+            # 도우인 영상은 별도 워커라 정보를 공유할 수 없음
             modes = [('video', '[MP4]'), ('audio', '[MP3]'), ('subtitle', '[SRT]')]
+        elif fmt_index == 3:
+            # 정보 추출 1회 + 다운로드 1회로 MP4/MP3/SRT를 모두 만드는 작업 하나
+            modes = [('all', '[MP4+MP3+SRT]')]
         elif fmt_index == 2:
             modes = [('subtitle', '')]
         elif fmt_index == 1:
@@ -3698,55 +7140,167 @@ class DownloaderPage(QWidget):
         else:
             modes = [('video', '')]
 
-        # 상태 바 업데이트
-        self.status_dot.setStyleSheet("color: #4a946c; font-size: 8px; border: none; background: transparent;")
-        self.status_text.setText("다운로드 중...")
+        # 상태 바 (진행 상태는 대기열에 넣을 때 갱신)
         self.path_label.setText(f"저장: {output_path}")
 
-        is_douyin = any(k in url.lower() for k in ['douyin.com', 'v.douyin.com', 'tiktok.com', 'vt.tiktok.com'])
-
         for mode, tag in modes:
-            item_id = str(uuid.uuid4())[:8]
-
-            # 카드 생성
-            card = DownloadItemCard(item_id, url, output_path=output_path)
-            if tag:
-                card.set_title(f"다운로드 준비 중... {tag}")
-            card.cancelClicked.connect(self.on_cancel)
-            self.queue_layout.insertWidget(self.queue_layout.count() - 1, card)
-            self.cards[item_id] = card
-
-            # 카운트 업데이트
-            self.queue_count += 1
-            self.q_count.setText(str(self.queue_count))
-
-            # 워커 시작
             if is_douyin and mode == 'video':
-                worker = DouyinDownloadWorker(url, output_path)
-            else:
-                worker = DownloadWorker(url, output_path, mode)
+                mode = 'douyin'
+            self._start_job(mode, url, output_path, options={'tag': tag} if tag else None)
 
+    @staticmethod
+    def _create_worker(mode, url, output_path, options):
+        """작업 모드별 워커 (새 다운로드와 재시작 후 복원 공용)"""
+        if mode == 'frames':
+            return FrameExtractWorker(url, output_path, options.get('interval', 1.0),
+                                      options.get('img_format', 'webp'))
+        if mode == 'douyin':
+            return DouyinDownloadWorker(url, output_path)
+        return DownloadWorker(url, output_path, mode)
+
+    def _start_job(self, mode, url, output_path, options=None, item_id=None, priority=0,
+                   paused=False, title=''):
+        """카드와 워커를 만들어 대기열과 작업 기록에 넣음 (워커는 순서가 오면 실행)"""
+        options = options or {}
+        item_id = item_id or str(uuid.uuid4())[:8]
+        tag = options.get('tag', '')
+        card = self._add_card(item_id, url, output_path)
+        worker = self._create_worker(mode, url, output_path, options)
+
+        if mode == 'frames':
+            card.set_title(f"🖼 {title}" if title else
+                           f"이미지 추출 준비 중... [{options.get('img_format', 'webp').upper()}]")
+            worker.info_ready.connect(lambda info, c=card: c.set_title(f"🖼 {info['title']}"))
+        else:
+            if title or tag:
+                card.set_title(f"{title} {tag}".strip() if title else f"다운로드 준비 중... {tag}")
             if tag:
                 worker.info_ready.connect(lambda info, c=card, t=tag: c.set_title(f"{info['title']} {t}"))
             else:
                 worker.info_ready.connect(lambda info, c=card: c.set_title(info['title']))
-            worker.progress.connect(lambda p, c=card: c.set_progress(p['percent'], p.get('speed', ''), p.get('eta', '')))
-            worker.finished.connect(lambda r, iid=item_id: self._on_finished(iid, r))
-            self.workers[item_id] = worker
-            worker.start()
+        worker.info_ready.connect(lambda info, iid=item_id: self.journal.update(iid, title=info['title']))
+        worker.progress.connect(lambda p, c=card: c.set_progress(p['percent'], p.get('speed', ''), p.get('eta', '')))
+        worker.progress.connect(lambda p, iid=item_id: self.journal.progress(iid, p))
+
+        self.journal.add(item_id, url, mode, output_path, options, priority)
+        self._enqueue(item_id, worker, url, priority, paused)
+        return card
+
+    def _restore_jobs(self):
+        """지난 실행에서 끝나지 않은 작업을 대기열에 다시 넣음 (일시 정지였던 것은 그대로)"""
+        jobs = self.journal.pending()
+        if not jobs:
+            return
+        print(f"[Downloader] 이전 작업 {len(jobs)}개 복원")
+        if self.empty_widget and self.empty_widget.isVisible():
+            self.empty_widget.hide()
+        for job in jobs:
+            try:
+                card = self._start_job(job["mode"], job["url"], job["output_path"], job.get("options"),
+                                       item_id=job["id"], priority=job.get("priority", 0),
+                                       paused=job.get("state") == 'paused', title=job.get("title", ""))
+                done, total = job.get("bytes_done", 0), job.get("total", 0)
+                if done and any(os.path.exists(part) for part in job.get("part_files", [])):
+                    # 상태 표시 (대기열/일시정지)는 그대로 두고 받아 둔 양만 표시
+                    card.progress_bar.setValue(int(done / total * 100) if total else 0)
+                    card.speed_label.setText(f"이어받기 {done / 1048576:.1f}MB")
+            except Exception as e:
+                print(f"[Downloader] 작업 복원 실패 ({job.get('url')}): {e}")
+                self.journal.remove(job.get("id", ""))
+
+    def shutdown(self):
+        """앱 종료 - 작업 기록을 남긴 채 워커를 멈춤 (다음 실행에서 이어받기)"""
+        self._closing = True
+        self.journal.flush()
+        self.scheduler.shutdown()
+        self.journal.close()
+
+    def _add_card(self, item_id, url, output_path):
+        card = DownloadItemCard(item_id, url, output_path=output_path)
+        card.cancelClicked.connect(self.on_cancel)
+        card.pauseClicked.connect(self.on_pause)
+        card.priorityClicked.connect(self.on_priority)
+        self.queue_layout.insertWidget(self.queue_layout.count() - 1, card)
+        self.cards[item_id] = card
+
+        # 카운트 업데이트
+        self.queue_count += 1
+        self.q_count.setText(str(self.queue_count))
+        return card
+
+    def _enqueue(self, item_id, worker, url, priority=0, paused=False):
+        self.workers[item_id] = worker
+        self.scheduler.submit(item_id, worker, url, priority, paused)
+        self._update_status()
+
+    def _card_call(self, item_id, method, state=None):
+        card = self.cards.get(item_id)
+        if card and item_id not in self._cancelled:
+            getattr(card, method)()
+        if state and not self._closing:
+            self.journal.update(item_id, state=state)
+        self._update_status()
+
+    def _update_status(self):
+        running = self.scheduler.active_count()
+        pending = self.scheduler.pending_count()
+        if running or pending:
+            self.status_dot.setStyleSheet("color: #4a946c; font-size: 8px; border: none; background: transparent;")
+            text = f"다운로드 중... ({running}개 진행"
+            self.status_text.setText(text + (f", {pending}개 대기)" if pending else ")"))
+        else:
+            self.status_dot.setStyleSheet("color: #64748b; font-size: 8px; border: none; background: transparent;")
+            self.status_text.setText("일시정지" if self.scheduler.paused_all else "대기 중")
 
     def on_cancel(self, item_id):
-        worker = self.workers.get(item_id)
-        if worker:
-            worker.cancel()
+        self._cancelled.add(item_id)
+        if self.scheduler.cancel(item_id) != 'running':
+            # 실행 전이었으면 결과가 오지 않으므로 바로 정리 (실행 중이면 멈춘 뒤 _on_finished에서)
+            worker = self.workers.pop(item_id, None)
+            if worker:
+                worker.deleteLater()
+            self.journal.remove(item_id, delete_parts=True)
         card = self.cards.get(item_id)
         if card:
             card.set_cancelled()
+        self._update_status()
+
+    def on_pause(self, item_id):
+        if self.scheduler.state(item_id) in ('paused', 'pausing'):
+            self.scheduler.resume(item_id)
+        else:
+            self.scheduler.pause(item_id)
+            card = self.cards.get(item_id)
+            if card:
+                card.set_paused()
+        self._update_status()
+
+    def on_priority(self, item_id):
+        priority = self.scheduler.top_priority() + 1
+        self.scheduler.set_priority(item_id, priority)
+        self.journal.update(item_id, priority=priority)
+
+    def _on_pause_all(self, checked):
+        if checked:
+            self.pause_all_btn.setText("\u25b6 모두 재개")
+            self.scheduler.pause_all()
+        else:
+            self.pause_all_btn.setText("\u23f8 모두 일시정지")
+            self.scheduler.resume_all()
+        self._update_status()
+
+    def _on_paused(self, item_id):
+        self._card_call(item_id, 'set_paused', 'paused')
 
     def _on_finished(self, item_id, result):
+        if self._closing:
+            return  # 종료로 멈춘 작업은 기록에 남겨 다음 실행에서 이어받음
+        # 실패한 작업의 .part는 남겨 둠 (같은 URL을 다시 받으면 이어받음), 취소면 지움
+        self.journal.remove(item_id, delete_parts=item_id in self._cancelled)
+
         card = self.cards.get(item_id)
-        if card:
-            card.set_finished(result['success'], result.get('error', ''))
+        if card and item_id not in self._cancelled:
+            card.set_finished(result['success'], result.get('error', ''), result.get('note', ''))
 
         # 텍스트 추출 성공 시 결과 다이얼로그 표시
         if result.get('is_text_extract') and result.get('success'):
@@ -3764,18 +7318,18 @@ class DownloaderPage(QWidget):
         worker = self.workers.pop(item_id, None)
         if worker:
             worker.deleteLater()
+        self._cancelled.discard(item_id)
 
         # 활성 다운로드가 없으면 상태 복원
-        active = any(w.isRunning() for w in self.workers.values())
-        if not active:
-            self.status_dot.setStyleSheet("color: #64748b; font-size: 8px; border: none; background: transparent;")
-            self.status_text.setText("대기 중")
+        self._update_status()
 
     def _open_settings(self):
         dialog = DownloaderSettingsDialog(self.app_settings, self)
         if dialog.exec():
             self._refresh_groups()
             self.path_label.setText(f"저장: {self.app_settings.download_folder}")
+            self.scheduler.set_limits(self.app_settings.download_concurrency,
+                                      self.app_settings.download_per_host)
 
 
 class ColorPickerPage(QWidget):
@@ -5680,14 +9234,19 @@ class MainShell(QMainWindow):
             print(f"[MainShell] 백그라운드 다운로드: {youtube_url} → {output_path}")
             self.tray_icon.showMessage("Qfred", f"다운로드 시작: {title_hint}", QSystemTrayIcon.MessageIcon.Information, 3000)
 
-            # 백그라운드 워커
+            # 백그라운드 워커 (다운로더 대기열의 동시 실행 제한을 함께 따름)
             worker = DownloadWorker(youtube_url, output_path, 'video')
+            item_id = f"bg-{uuid.uuid4().hex[:8]}"
             title_box = [title_hint]  # mutable for closure
+            scheduler = self.downloader.scheduler
 
             def on_info(info):
                 title_box[0] = info.get('title', title_hint)
 
-            def on_finished(result):
+            def on_finished(finished_id, result):
+                if finished_id != item_id:
+                    return
+                scheduler.finished.disconnect(on_finished)
                 if result.get('success'):
                     self.tray_icon.showMessage("Qfred", f"다운로드 완료: {title_box[0]}", QSystemTrayIcon.MessageIcon.Information, 5000)
                 else:
@@ -5696,12 +9255,12 @@ class MainShell(QMainWindow):
                     self._bg_workers.remove(worker)
 
             worker.info_ready.connect(on_info)
-            worker.finished.connect(on_finished)
+            scheduler.finished.connect(on_finished)
 
             if not hasattr(self, '_bg_workers'):
                 self._bg_workers = []
             self._bg_workers.append(worker)
-            worker.start()
+            scheduler.submit(item_id, worker, youtube_url)
 
         except Exception as e:
             print(f"[MainShell] URL 처리 오류: {e}")
@@ -5894,11 +9453,14 @@ def main():
     os.makedirs(app_settings.storage_folder, exist_ok=True)
 
     # 매니저 및 엔진 초기화
-    manager = SnippetManager(snippets_file=app_settings.snippets_file)
-    engine = SnippetEngine(manager)
+    manager = SnippetManager(snippets_file=app_settings.snippets_file,
+                             backend=app_settings.storage_backend)
+    app.aboutToQuit.connect(manager.close)
+    engine = SnippetEngine(manager, persistent_listener=app_settings.persistent_listener)
 
     # MainShell로 감싸서 네비게이션 바 추가
     window = MainShell(manager, engine, app_settings)
+    app.aboutToQuit.connect(window.downloader.shutdown)
 
     # 트레이 모드: 설정에 따라 창 표시 여부 결정
     if app_settings.start_minimized: